@@ -0,0 +1,64 @@
+"""Rebuilding part of a layout, with and without solver.batch().
+
+A row layout is built, then the constraints of a subtree of widgets are
+removed and added again, as a UI toolkit does when a subtree is
+re-rendered.
+
+Run with ``python -m benchmarks.batch [n_widgets] [subtree_size]``.
+"""
+from __future__ import print_function, unicode_literals, absolute_import, division
+
+import sys
+import time
+
+from cassowary import SimplexSolver, Variable
+
+from .layouts import add_widget_constraints
+
+
+def build(n_widgets, row_length=8):
+    solver = SimplexSolver()
+    widgets = []
+    with solver.batch():
+        previous = None
+        for i in range(n_widgets):
+            if i % row_length == 0:
+                previous = None
+            left = Variable('left%s' % i, 10.0 * i)
+            width = Variable('width%s' % i, 10.0)
+            widgets.append([left, width, previous, add_widget_constraints(solver, left, width, previous)])
+            previous = (left, width)
+    return solver, widgets
+
+
+def rebuild(solver, subtree):
+    for widget in subtree:
+        for cn in widget[3]:
+            solver.remove_constraint(cn)
+    for widget in subtree:
+        widget[3] = add_widget_constraints(solver, widget[0], widget[1], widget[2])
+
+
+def rebuild_batched(solver, subtree):
+    with solver.batch():
+        rebuild(solver, subtree)
+
+
+def main(argv):
+    n_widgets = int(argv[1]) if len(argv) > 1 else 400
+    subtree_size = int(argv[2]) if len(argv) > 2 else 64
+    print('%d widgets, rebuilding %d (%d constraint removals and additions)' % (
+        n_widgets, subtree_size, 4 * subtree_size))
+
+    for rebuilder in (rebuild_batched, rebuild):
+        solver, widgets = build(n_widgets)
+        optimize_count = solver.optimize_count
+        start = time.time()
+        rebuilder(solver, widgets[-subtree_size:])
+        elapsed = time.time() - start
+        print('%s: %.3fs, %d optimize passes' % (
+            rebuilder.__name__, elapsed, solver.optimize_count - optimize_count))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,84 @@
+"""Loading a layout one constraint at a time, or as one sparse matrix.
+
+Run with ``python -m benchmarks.bulk_load [n_rows]``.
+"""
+from __future__ import print_function, unicode_literals, absolute_import, division
+
+import sys
+import time
+
+from cassowary import SimplexSolver, Variable, REQUIRED, MEDIUM, WEAK
+from cassowary.expression import Constraint
+
+
+def row_layout_matrix(n_widgets, row_length=8):
+    """The constraints of layouts.row_layout as a CSR matrix.
+
+    The stay on each left edge is expressed as a weak equality. Returns
+    the variables and the arguments for add_constraints_from_matrix.
+    """
+    variables = []
+    indptr = [0]
+    indices = []
+    data = []
+    operators = []
+    rhs = []
+    strengths = []
+
+    def add_row(terms, operator, value, strength):
+        for index, coeff in terms:
+            indices.append(index)
+            data.append(coeff)
+        indptr.append(len(indices))
+        operators.append(operator)
+        rhs.append(value)
+        strengths.append(strength)
+
+    for i in range(n_widgets):
+        left = len(variables)
+        width = left + 1
+        variables.append(Variable('left%s' % i, 10.0 * i))
+        variables.append(Variable('width%s' % i, 10.0))
+
+        add_row([(width, 1.0)], Constraint.GEQ, 10, REQUIRED)
+        if i % row_length == 0:
+            add_row([(left, 1.0)], Constraint.GEQ, 0, REQUIRED)
+        else:
+            add_row([(left, 1.0), (left - 2, -1.0), (left - 1, -1.0)], Constraint.GEQ, 0, REQUIRED)
+        add_row([(width, 1.0)], Constraint.EQ, 50, MEDIUM)
+        add_row([(left, 1.0)], Constraint.EQ, 10.0 * i, WEAK)
+
+    return variables, (indptr, indices, data, operators, rhs, strengths)
+
+
+def load_one_by_one(variables, matrix):
+    indptr, indices, data, operators, rhs, strengths = matrix
+    solver = SimplexSolver()
+    for i in range(len(indptr) - 1):
+        terms = range(indptr[i], indptr[i + 1])
+        solver.add_constraint(Constraint.from_arrays(
+            [variables[indices[k]] for k in terms], [data[k] for k in terms],
+            operators[i], rhs[i], strengths[i]
+        ))
+    return solver
+
+
+def load_matrix(variables, matrix):
+    solver = SimplexSolver()
+    solver.add_constraints_from_matrix(variables, *matrix)
+    return solver
+
+
+def main(argv):
+    n_rows = int(argv[1]) if len(argv) > 1 else 20000
+    variables, matrix = row_layout_matrix(n_rows // 4)
+    print('%d rows, %d variables' % (len(matrix[0]) - 1, len(variables)))
+
+    for loader in (load_matrix, load_one_by_one):
+        start = time.time()
+        loader(variables, matrix)
+        print('%s: %.3fs' % (loader.__name__, time.time() - start))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,53 @@
+"""Solving a small, dense system with each tableau backend.
+
+Every constraint involves a random selection of the variables, so the
+tableau fills in quickly as it is pivoted.
+
+Run with ``python -m benchmarks.dense [n_variables] [n_constraints] [terms]``.
+"""
+from __future__ import print_function, unicode_literals, absolute_import, division
+
+import random
+import sys
+import time
+
+from cassowary import SimplexSolver, Variable, MEDIUM, WEAK
+from cassowary.expression import Constraint
+
+
+def dense_system(solver, n_variables, n_constraints, terms, seed=0):
+    rnd = random.Random(seed)
+    variables = [Variable('x%s' % i, rnd.uniform(0, 100)) for i in range(n_variables)]
+    for v in variables:
+        solver.add_stay(v, WEAK)
+    for i in range(n_constraints):
+        chosen = rnd.sample(variables, terms)
+        expr = Constraint.from_arrays(
+            chosen, [rnd.uniform(0.5, 2.0) for v in chosen],
+            Constraint.LEQ, rnd.uniform(50, 100) * terms, MEDIUM
+        )
+        solver.add_constraint(expr)
+    return variables
+
+
+def main(argv):
+    n_variables = int(argv[1]) if len(argv) > 1 else 60
+    n_constraints = int(argv[2]) if len(argv) > 2 else 60
+    terms = int(argv[3]) if len(argv) > 3 else 10
+    print('%d variables, %d constraints of %d terms' % (n_variables, n_constraints, terms))
+
+    for backend in ('dict', 'dense'):
+        try:
+            solver = SimplexSolver(backend=backend)
+        except ImportError as e:
+            print('    %-6s skipped: %s' % (backend, e))
+            continue
+        start = time.time()
+        with solver.batch():
+            dense_system(solver, n_variables, n_constraints, terms)
+        elapsed = time.time() - start
+        print('    %-6s %.3fs, %d pivots' % (backend, elapsed, solver.pricing.pivots))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
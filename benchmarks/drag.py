@@ -0,0 +1,63 @@
+"""Dragging a widget, with and without a persistent edit variable.
+
+A row layout is built, and the width of one widget is dragged through a
+series of gestures of a few frames each. ``sessions`` adds an edit
+variable and opens an edit() session for each gesture; ``persistent``
+registers the edit variable once, and only suggests values and resolves.
+
+Run with ``python -m benchmarks.drag [n_widgets] [n_gestures]``.
+"""
+from __future__ import print_function, unicode_literals, absolute_import, division
+
+import sys
+import time
+
+from cassowary import SimplexSolver
+
+from .layouts import row_layout
+
+FRAMES_PER_GESTURE = 6
+
+
+def frames(n_gestures):
+    for gesture in range(n_gestures):
+        yield [20 + (gesture * 7 + frame * 3) % 60 for frame in range(FRAMES_PER_GESTURE)]
+
+
+def sessions(solver, width, n_gestures):
+    for values in frames(n_gestures):
+        solver.add_edit_var(width)
+        with solver.edit():
+            for value in values:
+                solver.suggest_value(width, value)
+                solver.resolve()
+
+
+def persistent(solver, width, n_gestures):
+    solver.add_edit_var(width, persistent=True)
+    for values in frames(n_gestures):
+        for value in values:
+            solver.suggest_value(width, value)
+            solver.resolve()
+
+
+def main(argv):
+    n_widgets = int(argv[1]) if len(argv) > 1 else 2000
+    n_gestures = int(argv[2]) if len(argv) > 2 else 50
+    n_frames = n_gestures * FRAMES_PER_GESTURE
+    print('%d widgets, %d gestures of %d frames' % (n_widgets, n_gestures, FRAMES_PER_GESTURE))
+
+    for drag in (sessions, persistent):
+        solver = SimplexSolver()
+        with solver.batch():
+            widgets = row_layout(solver, n_widgets)
+        optimize_count = solver.optimize_count
+        start = time.time()
+        drag(solver, widgets[n_widgets // 2][1], n_gestures)
+        elapsed = time.time() - start
+        print('    %-10s %.3fms per frame, %d optimize passes' % (
+            drag.__name__, 1000 * elapsed / n_frames, solver.optimize_count - optimize_count))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
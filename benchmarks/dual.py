@@ -0,0 +1,67 @@
+"""Dual pivot counts during edit sessions, under each infeasibility rule.
+
+A row layout is built, and edge positions are dragged back and forth:
+first the left edge of the first widget in each row, which pushes the
+rest of the row along, then the width of every fourth widget. Every step
+suggests new values and calls resolve(). The "hash" rule repairs rows in
+hash order, as an unordered set of infeasible rows did.
+
+Run with ``python -m benchmarks.dual [n_widgets] [n_steps]``.
+"""
+from __future__ import print_function, unicode_literals, absolute_import, division
+
+import sys
+import time
+
+from cassowary import SimplexSolver
+from cassowary.tableau import INFEASIBILITY_RULES
+
+from .layouts import row_layout
+
+
+def hash_order(tableau, var):
+    return hash(var)
+
+
+def drag(rule, n_widgets, n_steps, edited, row_length=8):
+    solver = SimplexSolver()
+    solver.infeasible_rows.rule = rule
+    widgets = row_layout(solver, n_widgets, row_length)
+    dragged = edited(widgets, row_length)
+    for v in dragged:
+        solver.add_edit_var(v)
+
+    dual_pivot_count = solver.dual_pivot_count
+    start = time.time()
+    with solver.edit():
+        for step in range(n_steps):
+            offset = 10.0 * (step % 20 if step % 40 < 20 else 20 - step % 20)
+            for n, v in enumerate(dragged):
+                solver.suggest_value(v, 10 + offset + 5 * (n % 3))
+            solver.resolve()
+    return solver.dual_pivot_count - dual_pivot_count, time.time() - start
+
+
+def row_starts(widgets, row_length):
+    return [left for left, width in widgets[::row_length]]
+
+
+def widths(widgets, row_length):
+    return [width for left, width in widgets[::4]]
+
+
+def main(argv):
+    n_widgets = int(argv[1]) if len(argv) > 1 else 400
+    n_steps = int(argv[2]) if len(argv) > 2 else 100
+    print('%d widgets, %d resolve() steps' % (n_widgets, n_steps))
+
+    rules = sorted(INFEASIBILITY_RULES.items()) + [('hash', hash_order)]
+    for edited in (row_starts, widths):
+        print('%s:' % edited.__name__)
+        for name, rule in rules:
+            pivots, elapsed = drag(rule, n_widgets, n_steps, edited)
+            print('    %-10s %8d dual pivots  %.3fs' % (name, pivots, elapsed))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,73 @@
+"""Choosing the entering variable, with the index and by sorting the objective row.
+
+A row layout is built, then the widths of a few widgets are dragged. Each
+time optimize() asks for an entering variable, the choice is made both by
+the default pricing strategy, Bland's rule with its index of candidates
+(``index``), and as optimize() used to, by sorting the objective row by
+variable name and taking the first pivotable variable with a negative
+coefficient (``sort``). Only the time spent choosing is counted; the
+index's choice is the one used.
+
+Run with ``python -m benchmarks.entering [n_widgets] [n_frames]``.
+"""
+from __future__ import print_function, unicode_literals, absolute_import, division
+
+import sys
+import time
+
+from cassowary import SimplexSolver
+
+from .layouts import row_layout
+
+
+def by_name(z_row):
+    "The entering variable optimize() chose by sorting the objective row."
+    for v, c in sorted(z_row.terms.items(), key=lambda x: x[0].name):
+        if v.is_pivotable and c < 0.0:
+            return v
+    return None
+
+
+def main(argv):
+    n_widgets = int(argv[1]) if len(argv) > 1 else 2000
+    n_frames = int(argv[2]) if len(argv) > 2 else 20
+
+    solver = SimplexSolver()
+    with solver.batch():
+        widgets = row_layout(solver, n_widgets)
+
+    timings = [0, 0, 0.0, 0.0]
+    pricing = solver.pricing
+    entering_variable = pricing.entering_variable
+
+    def timed_entering_variable(solver, z_var):
+        start = time.time()
+        v = entering_variable(solver, z_var)
+        timings[2] = timings[2] + time.time() - start
+        z_row = solver.rows[z_var]
+        start = time.time()
+        by_name(z_row)
+        timings[3] = timings[3] + time.time() - start
+        timings[0] = timings[0] + 1
+        timings[1] = timings[1] + len(z_row.terms)
+        return v
+
+    pricing.entering_variable = timed_entering_variable
+    dragged = [width for left, width in widgets[::max(1, n_widgets // 8)]]
+    for width in dragged:
+        solver.add_edit_var(width)
+    with solver.edit():
+        for frame in range(n_frames):
+            for width in dragged:
+                solver.suggest_value(width, 20 + frame % 30)
+            solver.resolve()
+
+    choices, terms, indexed, sorting = timings
+    print('%d widgets, %d frames: %d choices, %.0f objective terms on average' % (
+        n_widgets, n_frames, choices, terms / choices))
+    print('    index  %.1fus per choice' % (1e6 * indexed / choices))
+    print('    sort   %.1fus per choice' % (1e6 * sorting / choices))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
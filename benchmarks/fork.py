@@ -0,0 +1,51 @@
+"""What-if evaluation, by rebuilding a layout and with solver.fork().
+
+A row layout is built; then the question "what would the layout be if
+one widget were 300 wide?" is answered without disturbing it, by
+building the same layout again in a second solver, and by forking the
+live solver. The number of rows the fork had to copy is reported.
+
+Run with ``python -m benchmarks.fork [n_widgets] [backend]``.
+"""
+from __future__ import print_function, unicode_literals, absolute_import, division
+
+import sys
+import time
+
+from cassowary import SimplexSolver
+
+from .layouts import row_layout
+
+
+def build(n_widgets, backend):
+    solver = SimplexSolver(backend=backend)
+    with solver.batch():
+        widgets = row_layout(solver, n_widgets)
+    return solver, widgets
+
+
+def main(argv):
+    n_widgets = int(argv[1]) if len(argv) > 1 else 2000
+    backend = argv[2] if len(argv) > 2 else None
+    solver, widgets = build(n_widgets, backend)
+    left, width = widgets[n_widgets // 2]
+    print('%d widgets, %d rows' % (n_widgets, len(solver.rows)))
+
+    start = time.time()
+    rebuilt, rebuilt_widgets = build(n_widgets, backend)
+    rebuilt.add_constraint(rebuilt_widgets[n_widgets // 2][1] == 300)
+    elapsed = time.time() - start
+    print('    rebuild  %.3fs' % elapsed)
+
+    start = time.time()
+    fork = solver.fork()
+    forked = time.time() - start
+    fork.add_constraint(width == 300)
+    elapsed = time.time() - start
+    print('    fork     %.3fs (fork() %.3fs), %d rows copied' % (
+        elapsed, forked, len(fork.rows) - len(fork.shared_rows)))
+    print('    width %s in the fork, %s in the live solver' % (fork.value_for(width), width.value))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,64 @@
+"""Finding the constraints on a widget, by scanning and with constraints_for().
+
+A row layout is built, keeping the list of every constraint added, as a
+caller without an index has to. Then the constraints on each of a number
+of widgets are found: ``scan`` by checking the terms of every constraint
+in the list, and ``indexed`` with solver.constraints_for().
+
+Run with ``python -m benchmarks.incidence [n_widgets] [n_lookups] [backend]``.
+"""
+from __future__ import print_function, unicode_literals, absolute_import, division
+
+import sys
+import time
+
+from cassowary import SimplexSolver
+
+from .layouts import row_layout
+
+
+def scan(constraints, left, width):
+    return [cn for cn in constraints if left in cn.expression.terms or width in cn.expression.terms]
+
+
+def indexed(solver, left, width):
+    found = solver.constraints_for(left)
+    found.extend(cn for cn in solver.constraints_for(width) if left not in cn.expression.terms)
+    return found
+
+
+def main(argv):
+    n_widgets = int(argv[1]) if len(argv) > 1 else 2000
+    n_lookups = int(argv[2]) if len(argv) > 2 else 100
+    backend = argv[3] if len(argv) > 3 else None
+
+    solver = SimplexSolver(backend=backend)
+    constraints = []
+    original = solver.add_constraint
+
+    def add_constraint(cn, strength=None, weight=None):
+        cn = original(cn, strength, weight)
+        constraints.append(cn)
+        return cn
+    solver.add_constraint = add_constraint
+
+    start = time.time()
+    with solver.batch():
+        widgets = row_layout(solver, n_widgets)
+    print('%d widgets, %d constraints, built in %.3fs' % (n_widgets, len(constraints), time.time() - start))
+
+    step = max(1, n_widgets // n_lookups)
+    lookups = widgets[::step][:n_lookups]
+    for name, find in (
+            ('scan', lambda left, width: scan(constraints, left, width)),
+            ('indexed', lambda left, width: indexed(solver, left, width))):
+        start = time.time()
+        for left, width in lookups:
+            found = find(left, width)
+        elapsed = time.time() - start
+        print('    %-8s %.3fms per widget (%d constraints on the last)' % (
+            name, 1000 * elapsed / len(lookups), len(found)))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,60 @@
+from __future__ import print_function, unicode_literals, absolute_import, division
+
+from cassowary import SimplexSolver, Variable, MEDIUM, WEAK
+from cassowary.expression import Constraint
+
+
+def row_layout(solver, n_widgets, row_length=8):
+    """Lay out ``n_widgets`` boxes in rows, four constraints per widget.
+
+    Each widget gets a required minimum width, a required "sits to the
+    right of its neighbour" inequality, a medium preferred width and a
+    weak stay on its left edge. Every ``row_length`` widgets a new row is
+    started. Returns the list of (left, width) pairs.
+    """
+    widgets = []
+    previous = None
+    for i in range(n_widgets):
+        if i % row_length == 0:
+            previous = None
+
+        left = Variable('left%s' % i, 10.0 * i)
+        width = Variable('width%s' % i, 10.0)
+        add_widget_constraints(solver, left, width, previous)
+
+        previous = (left, width)
+        widgets.append(previous)
+    return widgets
+
+
+def widget_constraints(left, width, previous):
+    "The constraints row_layout uses for one widget, and the variable to stay."
+    if previous is None:
+        position = Constraint(left, Constraint.GEQ, 0)
+    else:
+        position = Constraint(left, Constraint.GEQ, previous[0] + previous[1])
+    return [
+        Constraint(width, Constraint.GEQ, 10),
+        position,
+        Constraint(width, Constraint.EQ, 50, MEDIUM),
+    ], left
+
+
+def add_widget_constraints(solver, left, width, previous):
+    "Add the constraints for one widget. Returns the constraints added."
+    constraints, stay = widget_constraints(left, width, previous)
+    added = [solver.add_constraint(cn) for cn in constraints]
+    added.append(solver.add_stay(stay, WEAK))
+    return added
+
+
+def documents(n_constraints, per_document=100, backend=None):
+    """Build one solver per document until ``n_constraints`` are added.
+
+    Returns a list of (solver, widgets) pairs.
+    """
+    docs = []
+    for i in range(n_constraints // per_document):
+        solver = SimplexSolver(backend=backend)
+        docs.append((solver, row_layout(solver, per_document // 4)))
+    return docs
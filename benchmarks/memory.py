@@ -0,0 +1,33 @@
+"""Memory used per constraint by a large layout.
+
+Run with ``python -m benchmarks.memory [n_constraints] [backend]``.
+"""
+from __future__ import print_function, unicode_literals, absolute_import, division
+
+import gc
+import sys
+import tracemalloc
+
+from .layouts import documents
+
+
+def main(argv):
+    n_constraints = int(argv[1]) if len(argv) > 1 else 50000
+    backend = argv[2] if len(argv) > 2 else None
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    docs = documents(n_constraints, backend=backend)
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    count = sum(len(solver.marker_vars) for solver, widgets in docs)
+    print('%d constraints in %d solvers' % (count, len(docs)))
+    print('total: %.1f MiB' % (used / (1024 * 1024)))
+    print('bytes per constraint: %.0f' % (used / count))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,63 @@
+"""Combining sub-layouts, by re-adding their constraints and with solver.merge().
+
+Three row layouts (a header, a sidebar and a grid) are built in solvers
+of their own, as if by separate workers. They are then combined into
+one solver, and a few coupling constraints are added: once by adding
+every constraint of the three layouts to a new solver, and once by
+merging the solvers of the sidebar and grid into the header's.
+
+Run with ``python -m benchmarks.merge [n_widgets] [backend]``.
+"""
+from __future__ import print_function, unicode_literals, absolute_import, division
+
+import sys
+import time
+
+from cassowary import SimplexSolver
+from cassowary.expression import Constraint
+
+from .layouts import row_layout
+
+PARTS = ('header', 'sidebar', 'grid')
+
+
+def couple(solver, layouts):
+    "Place each layout to the right of the last widget of the previous one."
+    for previous, layout in zip(layouts, layouts[1:]):
+        left, width = previous[-1]
+        solver.add_constraint(Constraint(layout[0][0], Constraint.GEQ, left + width))
+
+
+def main(argv):
+    n_widgets = int(argv[1]) if len(argv) > 1 else 1000
+    backend = argv[2] if len(argv) > 2 else None
+    print('%d widgets in each of %s' % (n_widgets, ', '.join(PARTS)))
+
+    start = time.time()
+    solver = SimplexSolver(backend=backend)
+    with solver.batch():
+        layouts = [row_layout(solver, n_widgets) for part in PARTS]
+    couple(solver, layouts)
+    print('    re-add  %.3fs' % (time.time() - start))
+
+    solvers = []
+    layouts = []
+    for part in PARTS:
+        part_solver = SimplexSolver(backend=backend)
+        with part_solver.batch():
+            layouts.append(row_layout(part_solver, n_widgets))
+        solvers.append(part_solver)
+
+    start = time.time()
+    solver = solvers[0]
+    for other in solvers[1:]:
+        solver.merge(other)
+    merged = time.time() - start
+    optimize_count = solver.optimize_count
+    couple(solver, layouts)
+    print('    merge   %.3fs (merge() %.3fs), %d optimizations for the coupling' % (
+        time.time() - start, merged, solver.optimize_count - optimize_count))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
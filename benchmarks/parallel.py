@@ -0,0 +1,58 @@
+"""Independent documents, in a PartitionedSolver and in a ParallelSolver.
+
+A number of documents, each a row layout, are built in a batch. Then, in
+each frame, an edit variable of every document is given a new value and
+the system is resolved. A PartitionedSolver solves the documents one
+after another; a ParallelSolver solves each worker's documents at the
+same time as the others'. The speedup depends on the number of cores.
+
+Run with ``python -m benchmarks.parallel [n_documents] [n_widgets] [n_frames] [processes]``.
+"""
+from __future__ import print_function, unicode_literals, absolute_import, division
+
+import multiprocessing
+import sys
+import time
+
+from cassowary import ParallelSolver, PartitionedSolver
+
+from .layouts import row_layout
+
+
+def run(solver, n_documents, n_widgets, n_frames):
+    start = time.time()
+    with solver.batch():
+        # One row per document, so that each is a component of its own.
+        documents = [row_layout(solver, n_widgets, n_widgets) for i in range(n_documents)]
+    built = time.time() - start
+
+    widths = [widgets[-1][1] for widgets in documents]
+    for width in widths:
+        solver.add_edit_var(width, persistent=True)
+    start = time.time()
+    for frame in range(n_frames):
+        solver.suggest_values(widths, [20 + frame % 30] * len(widths))
+    dragged = time.time() - start
+    return built, dragged
+
+
+def main(argv):
+    n_documents = int(argv[1]) if len(argv) > 1 else 32
+    n_widgets = int(argv[2]) if len(argv) > 2 else 50
+    n_frames = int(argv[3]) if len(argv) > 3 else 50
+    processes = int(argv[4]) if len(argv) > 4 else multiprocessing.cpu_count()
+    print('%d documents of %d widgets, %d frames, %d cores' % (
+        n_documents, n_widgets, n_frames, multiprocessing.cpu_count()))
+
+    built, dragged = run(PartitionedSolver(), n_documents, n_widgets, n_frames)
+    print('    %-25s build %.3fs, %.3fms per frame' % (
+        'PartitionedSolver', built, 1000 * dragged / n_frames))
+    for n in sorted(set([1, processes])):
+        with ParallelSolver(n) as solver:
+            built, dragged = run(solver, n_documents, n_widgets, n_frames)
+        print('    %-25s build %.3fs, %.3fms per frame' % (
+            'ParallelSolver(%d)' % n, built, 1000 * dragged / n_frames))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,55 @@
+"""Independent rows, in one SimplexSolver and in a PartitionedSolver.
+
+A row layout is built; each row of widgets is independent of the others.
+A widget is then dragged, and a constraint is added to and removed from
+one row, repeatedly. A SimplexSolver works on a single tableau holding
+every row; a PartitionedSolver keeps each row in a solver of its own.
+
+Run with ``python -m benchmarks.partitioned [n_widgets] [n_steps] [backend]``.
+"""
+from __future__ import print_function, unicode_literals, absolute_import, division
+
+import sys
+import time
+
+from cassowary import PartitionedSolver, SimplexSolver
+from cassowary.expression import Constraint
+
+from .drag import persistent, FRAMES_PER_GESTURE
+from .layouts import row_layout
+
+
+def add_remove(solver, left, width, n_steps):
+    for step in range(n_steps):
+        cn = solver.add_constraint(Constraint(left + width, Constraint.LEQ, 100 + step % 50))
+        solver.remove_constraint(cn)
+
+
+def main(argv):
+    n_widgets = int(argv[1]) if len(argv) > 1 else 2000
+    n_steps = int(argv[2]) if len(argv) > 2 else 50
+    backend = argv[3] if len(argv) > 3 else None
+    print('%d widgets, %d steps' % (n_widgets, n_steps))
+
+    for cls in (SimplexSolver, PartitionedSolver):
+        solver = cls(backend=backend)
+        start = time.time()
+        with solver.batch():
+            widgets = row_layout(solver, n_widgets)
+        built = time.time() - start
+        left, width = widgets[n_widgets // 2]
+
+        start = time.time()
+        persistent(solver, width, n_steps)
+        dragged = time.time() - start
+
+        start = time.time()
+        add_remove(solver, left, width, n_steps)
+        changed = time.time() - start
+        print('    %-17s build %.3fs, drag %.3fms per frame, add and remove %.3fms' % (
+            cls.__name__, built, 1000 * dragged / (n_steps * FRAMES_PER_GESTURE),
+            1000 * changed / n_steps))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,120 @@
+"""Pivots per second on scaled-up versions of two end-to-end tests.
+
+Only the time spent in SimplexSolver.pivot() is counted.
+
+``polygon`` is test_quadrilateral with ``n`` corners: every corner has a
+weak stay, every edge a midpoint, the corners are paired so that one is
+at least 20 to the right of and below the other, and every point is kept
+on the canvas. Some corners are then dragged. ``buttons`` is test_buttons with ``n``
+buttons in a row, each at least 10 from the previous one, with a minimum
+and a preferred width; the window is then resized several times.
+
+Run with ``python -m benchmarks.pivots [n] [backend]``.
+"""
+from __future__ import print_function, unicode_literals, absolute_import, division
+
+import sys
+import time
+
+from cassowary import SimplexSolver, Variable, REQUIRED, STRONG, WEAK
+
+
+def polygon(solver, n):
+    corners = []
+    weight = 1.0
+    for i in range(n):
+        x = Variable('x%s' % i, 10.0 + i)
+        y = Variable('y%s' % i, 10.0 + (i * 37) % 400)
+        solver.add_stay(x, WEAK, weight)
+        solver.add_stay(y, WEAK, weight)
+        weight = 1.0 + (weight * 2.0) % 7
+        corners.append((x, y))
+
+    points = list(corners)
+    for i, (x, y) in enumerate(corners):
+        x2, y2 = corners[(i + 1) % n]
+        mx = Variable('mx%s' % i)
+        my = Variable('my%s' % i)
+        solver.add_constraint(mx == (x + x2) / 2)
+        solver.add_constraint(my == (y + y2) / 2)
+        points.append((mx, my))
+
+    for (x, y), (x2, y2) in zip(corners[::2], corners[1::2]):
+        solver.add_constraint(x + 20 <= x2)
+        solver.add_constraint(y + 20 <= y2)
+
+    for x, y in points:
+        solver.add_constraint(x >= 0)
+        solver.add_constraint(y >= 0)
+        solver.add_constraint(x <= 10000)
+        solver.add_constraint(y <= 500)
+
+    dragged = corners[::max(1, n // 8)]
+    for x, y in dragged:
+        solver.add_edit_var(x)
+        solver.add_edit_var(y)
+    with solver.edit():
+        for step in range(10):
+            for x, y in dragged:
+                solver.suggest_value(x, x.value + 5)
+                solver.suggest_value(y, (y.value + 40) % 450)
+            solver.resolve()
+
+
+def buttons(solver, n):
+    left_limit = Variable('left', 0)
+    right_limit = Variable('right', 0)
+    solver.add_stay(left_limit, REQUIRED)
+    solver.add_stay(right_limit, WEAK)
+
+    previous = None
+    for i in range(n):
+        left = Variable('left%s' % i, 0)
+        width = Variable('width%s' % i, 0)
+        if previous is None:
+            solver.add_constraint(left == left_limit + 50)
+        else:
+            solver.add_constraint(left >= previous[0] + previous[1] + 10)
+        solver.add_constraint(width >= 20)
+        solver.add_constraint(width == 20 + i % 90, STRONG)
+        previous = (left, width)
+    solver.add_constraint(left_limit + right_limit >= previous[0] + previous[1] + 50)
+
+    for size in (0.5, 2.0, 1.0, 3.0):
+        right_limit.value = size * right_limit.value
+        stay = solver.add_stay(right_limit, REQUIRED)
+        solver.remove_constraint(stay)
+
+
+def count_pivots(solver):
+    "Count the pivots the solver makes, and the time spent making them."
+    counter = [0, 0.0]
+    pivot = solver.pivot
+
+    def counting_pivot(entry_var, exit_var):
+        start = time.time()
+        pivot(entry_var, exit_var)
+        counter[0] = counter[0] + 1
+        counter[1] = counter[1] + time.time() - start
+
+    solver.pivot = counting_pivot
+    return counter
+
+
+def main(argv):
+    n = int(argv[1]) if len(argv) > 1 else 1000
+    backend = argv[2] if len(argv) > 2 else None
+    for scenario in (polygon, buttons):
+        solver = SimplexSolver(backend=backend)
+        counter = count_pivots(solver)
+        start = time.time()
+        scenario(solver, n)
+        elapsed = time.time() - start
+        pivots, pivoting = counter
+        print('%s(%d): %d variables, %.3fs; %d pivots in %.3fs, %.0f pivots/s' % (
+            scenario.__name__, n, len(solver.columns) + len(solver.rows),
+            elapsed, pivots, pivoting, pivots / pivoting))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
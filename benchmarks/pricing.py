@@ -0,0 +1,61 @@
+"""Primal pivot counts under each pricing strategy.
+
+A row layout is built one constraint at a time, and again with every
+constraint added before a single optimization pass; the widths are then
+dragged through an edit session.
+
+Run with ``python -m benchmarks.pricing [n_widgets]``.
+"""
+from __future__ import print_function, unicode_literals, absolute_import, division
+
+import sys
+import time
+
+from cassowary import SimplexSolver
+from cassowary.pricing import PRICING
+
+from .layouts import row_layout
+
+
+def incremental(pricing, n_widgets):
+    solver = SimplexSolver(pricing=pricing)
+    row_layout(solver, n_widgets)
+    return solver
+
+
+def batched(pricing, n_widgets):
+    solver = SimplexSolver(pricing=pricing)
+    with solver.batch():
+        row_layout(solver, n_widgets)
+    return solver
+
+
+def edit_session(pricing, n_widgets, n_steps=20):
+    solver = SimplexSolver(pricing=pricing)
+    widgets = row_layout(solver, n_widgets)
+    edited = [width for left, width in widgets[::8]]
+    for width in edited:
+        solver.add_edit_var(width)
+    with solver.edit():
+        for step in range(n_steps):
+            for width in edited:
+                solver.suggest_value(width, 20 + (step * 7) % 60)
+            solver.resolve()
+    return solver
+
+
+def main(argv):
+    n_widgets = int(argv[1]) if len(argv) > 1 else 400
+    print('%d widgets (%d constraints)' % (n_widgets, 4 * n_widgets))
+
+    for scenario in (incremental, batched, edit_session):
+        print('%s:' % scenario.__name__)
+        for name in sorted(PRICING):
+            start = time.time()
+            solver = scenario(name, n_widgets)
+            elapsed = time.time() - start
+            print('    %-8s %8d pivots  %.3fs' % (name, solver.pricing.pivots, elapsed))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
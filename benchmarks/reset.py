@@ -0,0 +1,54 @@
+"""Editing a few variables in a model where every variable has a stay.
+
+``n_vars`` variables each get a weak stay, and every tenth is kept at
+least 10 below the next. Ten of the variables are then dragged through
+an edit session; every frame resets the stay constants.
+
+Run with ``python -m benchmarks.reset [n_vars] [n_frames]``.
+"""
+from __future__ import print_function, unicode_literals, absolute_import, division
+
+import sys
+import time
+
+from cassowary import SimplexSolver, Variable, WEAK
+
+
+def build(n_vars):
+    solver = SimplexSolver()
+    variables = [Variable('x%s' % i, float(i)) for i in range(n_vars)]
+    with solver.batch():
+        for v in variables:
+            solver.add_stay(v, WEAK)
+        for i in range(0, n_vars - 1, 10):
+            solver.add_constraint(variables[i] + 10 <= variables[i + 1])
+    return solver, variables
+
+
+def drag(solver, edited, n_frames):
+    for v in edited:
+        solver.add_edit_var(v)
+    with solver.edit():
+        for frame in range(n_frames):
+            for n, v in enumerate(edited):
+                solver.suggest_value(v, 100.0 * n + (frame * 7) % 50)
+            solver.resolve()
+
+
+def main(argv):
+    n_vars = int(argv[1]) if len(argv) > 1 else 100000
+    n_frames = int(argv[2]) if len(argv) > 2 else 100
+
+    start = time.time()
+    solver, variables = build(n_vars)
+    print('%d stays, built in %.2fs' % (n_vars, time.time() - start))
+
+    edited = variables[:100:10]
+    start = time.time()
+    drag(solver, edited, n_frames)
+    elapsed = time.time() - start
+    print('%d-variable edit: %.3fms per frame' % (len(edited), 1000.0 * elapsed / n_frames))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
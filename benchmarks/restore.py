@@ -0,0 +1,54 @@
+"""Restoring the widths of a row layout from a saved document.
+
+A row layout is built, then ``n_restored`` widths are set to saved
+values: ``one_at_a_time`` with set_edited_value(), and ``together``
+with a single set_edited_values() call.
+
+Run with ``python -m benchmarks.restore [n_widgets] [n_restored]``.
+"""
+from __future__ import print_function, unicode_literals, absolute_import, division
+
+import sys
+import time
+
+from cassowary import SimplexSolver
+
+from .layouts import row_layout
+
+
+def one_at_a_time(solver, saved):
+    for v, value in saved.items():
+        solver.set_edited_value(v, value)
+
+
+def together(solver, saved):
+    solver.set_edited_values(saved)
+
+
+def main(argv):
+    n_widgets = int(argv[1]) if len(argv) > 1 else 2000
+    n_restored = int(argv[2]) if len(argv) > 2 else 200
+    print('%d widgets, restoring %d widths' % (n_widgets, n_restored))
+
+    results = []
+    for scenario in (one_at_a_time, together):
+        solver = SimplexSolver()
+        with solver.batch():
+            widgets = row_layout(solver, n_widgets)
+        saved = dict(
+            (width, 20.0 + (i * 13) % 70)
+            for i, (left, width) in enumerate(widgets[:n_restored])
+        )
+        optimize_count = solver.optimize_count
+        start = time.time()
+        scenario(solver, saved)
+        elapsed = time.time() - start
+        results.append([v.value for v in saved])
+        print('    %-14s %.3fs, %d optimize passes' % (
+            scenario.__name__, elapsed, solver.optimize_count - optimize_count))
+
+    print('    largest difference: %g' % max(abs(a - b) for a, b in zip(*results)))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
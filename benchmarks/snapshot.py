@@ -0,0 +1,51 @@
+"""Starting a solver from a snapshot, rather than by adding constraints.
+
+A row layout is built, with four constraints per widget, and written
+to a snapshot file. The solver is then discarded, as it would be when a
+process exits, and loaded from the file.
+
+Run with ``python -m benchmarks.snapshot [n_widgets] [backend]``.
+"""
+from __future__ import print_function, unicode_literals, absolute_import, division
+
+import gc
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from cassowary import SimplexSolver
+from cassowary import snapshot
+
+from .layouts import row_layout
+
+
+def main(argv):
+    n_widgets = int(argv[1]) if len(argv) > 1 else 10000
+    backend = argv[2] if len(argv) > 2 else None
+
+    start = time.time()
+    solver = SimplexSolver(backend=backend)
+    with solver.batch():
+        row_layout(solver, n_widgets)
+    print('%d constraints, built in %.2fs' % (len(solver.marker_vars), time.time() - start))
+
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'layout.snapshot')
+        start = time.time()
+        snapshot.dump(solver, path)
+        print('    dump  %.2fs, %d bytes' % (time.time() - start, os.path.getsize(path)))
+        del solver
+        gc.collect()
+
+        start = time.time()
+        loaded, variables, constraints = snapshot.load(path)
+        print('    load  %.2fs' % (time.time() - start))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,60 @@
+"""Removing the stays of a subtree of widgets.
+
+A row layout is built, then the stays on the last ``subtree_size``
+widgets are removed: ``one_at_a_time`` with remove_constraint(), and
+``bulk`` with a single remove_stays() call.
+
+Run with ``python -m benchmarks.stays [n_widgets] [subtree_size]``.
+"""
+from __future__ import print_function, unicode_literals, absolute_import, division
+
+import sys
+import time
+
+from cassowary import SimplexSolver, Variable
+
+from .layouts import add_widget_constraints
+
+
+def build(n_widgets, row_length=8):
+    "Build a row layout. Returns the solver and the (variable, stay) pairs."
+    solver = SimplexSolver()
+    stays = []
+    with solver.batch():
+        previous = None
+        for i in range(n_widgets):
+            if i % row_length == 0:
+                previous = None
+            left = Variable('left%s' % i, 10.0 * i)
+            width = Variable('width%s' % i, 10.0)
+            stays.append((left, add_widget_constraints(solver, left, width, previous)[-1]))
+            previous = (left, width)
+    return solver, stays
+
+
+def one_at_a_time(solver, stays):
+    for v, cn in stays:
+        solver.remove_constraint(cn)
+
+
+def bulk(solver, stays):
+    solver.remove_stays([v for v, cn in stays])
+
+
+def main(argv):
+    n_widgets = int(argv[1]) if len(argv) > 1 else 10000
+    subtree_size = int(argv[2]) if len(argv) > 2 else n_widgets // 2
+    print('%d widgets, removing %d stays' % (n_widgets, subtree_size))
+
+    for scenario in (one_at_a_time, bulk):
+        solver, stays = build(n_widgets)
+        optimize_count = solver.optimize_count
+        start = time.time()
+        scenario(solver, stays[-subtree_size:])
+        elapsed = time.time() - start
+        print('    %-14s %.3fs, %d optimize passes' % (
+            scenario.__name__, elapsed, solver.optimize_count - optimize_count))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,56 @@
+"""Per-frame cost of dragging a few widgets in a large layout.
+
+A row layout is built, and the widths of three widgets are dragged; each
+frame suggests new values and calls resolve(). The time spent copying
+solved values back to the variables is reported separately.
+
+Run with ``python -m benchmarks.sync [n_widgets] [n_frames]``.
+"""
+from __future__ import print_function, unicode_literals, absolute_import, division
+
+import sys
+import time
+
+from cassowary import SimplexSolver
+
+from .layouts import row_layout
+
+
+def main(argv):
+    n_widgets = int(argv[1]) if len(argv) > 1 else 5000
+    n_frames = int(argv[2]) if len(argv) > 2 else 100
+
+    solver = SimplexSolver()
+    start = time.time()
+    with solver.batch():
+        widgets = row_layout(solver, n_widgets)
+    print('%d widgets (%d constraints, %d variables) built in %.3fs' % (
+        n_widgets, 4 * n_widgets, 2 * n_widgets, time.time() - start))
+
+    sync = [0.0]
+    set_external_variables = solver.set_external_variables
+
+    def timed_set_external_variables():
+        start = time.time()
+        set_external_variables()
+        sync[0] = sync[0] + time.time() - start
+
+    solver.set_external_variables = timed_set_external_variables
+
+    dragged = [widgets[n_widgets // 4][1], widgets[n_widgets // 2][1], widgets[-1][1]]
+    for width in dragged:
+        solver.add_edit_var(width)
+
+    start = time.time()
+    with solver.edit():
+        for frame in range(n_frames):
+            for n, width in enumerate(dragged):
+                solver.suggest_value(width, 20 + (frame * (n + 3)) % 60)
+            solver.resolve()
+    elapsed = time.time() - start
+    print('%d frames: %.3fms per frame, of which %.3fms syncing variables' % (
+        n_frames, 1000 * elapsed / n_frames, 1000 * sync[0] / n_frames))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,56 @@
+"""Sending a constraint model to another process: pickle and wire.
+
+The constraints of a row layout are serialized with pickle, and with
+wire.encode(), then rebuilt with pickle.loads() and wire.decode().
+
+Run with ``python -m benchmarks.wire [n_widgets]``.
+"""
+from __future__ import print_function, unicode_literals, absolute_import, division
+
+import pickle
+import sys
+import time
+
+from cassowary import Variable, WEAK
+from cassowary import wire
+from cassowary.expression import StayConstraint
+
+from .layouts import widget_constraints
+
+
+def model(n_widgets, row_length=8):
+    "The constraints of a row layout, without a solver."
+    constraints = []
+    previous = None
+    for i in range(n_widgets):
+        if i % row_length == 0:
+            previous = None
+        left = Variable('left%s' % i, 10.0 * i)
+        width = Variable('width%s' % i, 10.0)
+        widget, stay = widget_constraints(left, width, previous)
+        constraints.extend(widget)
+        constraints.append(StayConstraint(stay, WEAK))
+        previous = (left, width)
+    return constraints
+
+
+def main(argv):
+    n_widgets = int(argv[1]) if len(argv) > 1 else 10000
+    constraints = model(n_widgets)
+    print('%d constraints' % len(constraints))
+
+    for name, dumps, loads in (
+        ('pickle', lambda cns: pickle.dumps(cns, 2), pickle.loads),
+        ('wire', wire.encode, wire.decode),
+    ):
+        start = time.time()
+        data = dumps(constraints)
+        encoded = time.time() - start
+        start = time.time()
+        loads(data)
+        decoded = time.time() - start
+        print('    %-8s %8d bytes, encode %.3fs, decode %.3fs' % (name, len(data), encoded, decoded))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -1,10 +1,23 @@
 from __future__ import print_function, unicode_literals, absolute_import
 
-from .expression import Variable
+from .expression import Variable, sum_terms
 from .error import RequiredFailure, ConstraintNotFound, InternalError
 from .simplex_solver import SimplexSolver
+from .partitioned_solver import PartitionedSolver
+from .parallel_solver import ParallelSolver
 from .utils import REQUIRED, STRONG, MEDIUM, WEAK
 
+# sum_terms() is also available as cassowary.sum(). That name is left
+# out of __all__, so that a star import doesn't replace the builtin sum().
+sum = sum_terms
+
+__all__ = [
+    'Variable', 'sum_terms',
+    'RequiredFailure', 'ConstraintNotFound', 'InternalError',
+    'SimplexSolver', 'PartitionedSolver', 'ParallelSolver',
+    'REQUIRED', 'STRONG', 'MEDIUM', 'WEAK',
+]
+
 # Examples of valid version strings
 # __version__ = '1.2.3.dev1'  # Development release 1
 # __version__ = '1.2.3a1'     # Alpha Release 1
@@ -0,0 +1,496 @@
+from __future__ import print_function, unicode_literals, absolute_import, division
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from .error import InternalError
+from .expression import AbstractVariable, Expression
+from .tableau import Tableau
+from .utils import approx_equal, EPSILON
+
+###########################################################################
+# Dense tableau storage
+#
+# The whole tableau is held in a 2-D NumPy array: every row variable is
+# given a row of the array, and every parametric variable a column. Each
+# pivot is then a single vectorized rank-1 update of the rows that contain
+# the entering variable. Storage grows with (rows x columns), so this is
+# only suitable for small to medium systems, but it is fast when pivoting
+# has filled the tableau in.
+###########################################################################
+
+
+class DenseTerms(object):
+    "A read-only, dict-like view of the terms of a DenseExpression."
+    __slots__ = ('expr',)
+
+    def __init__(self, expr):
+        self.expr = expr
+
+    def __len__(self):
+        return len(self.expr.nonzero())
+
+    def __iter__(self):
+        col_vars = self.expr.tableau.col_vars
+        return iter([col_vars[j] for j in self.expr.nonzero()])
+
+    def __contains__(self, v):
+        return self.expr.coefficient_for(v) != 0.0
+
+    def __getitem__(self, v):
+        c = self.expr.coefficient_for(v)
+        if c == 0.0:
+            raise KeyError(v)
+        return c
+
+    def get(self, v, default=None):
+        c = self.expr.coefficient_for(v)
+        if c == 0.0:
+            return default
+        return c
+
+    def keys(self):
+        return list(self)
+
+    def values(self):
+        return [c for v, c in self.items()]
+
+    def items(self):
+        tableau = self.expr.tableau
+        col_vars = tableau.col_vars
+        row = tableau.matrix[self.expr.row]
+        return [(col_vars[j], float(row[j])) for j in self.expr.nonzero()]
+
+
+class DenseExpression(object):
+    """A view of one row of a DenseTableau.
+
+    Provides the same interface as Expression for the operations the
+    solver performs on tableau rows. A coefficient of zero means the
+    variable does not appear in the row.
+    """
+    __slots__ = ('tableau', 'row')
+
+    def __init__(self, tableau, row):
+        self.tableau = tableau
+        self.row = row
+
+    def __repr__(self):
+        return repr(self.as_expression())
+
+    def as_expression(self):
+        expr = Expression(constant=self.constant)
+        for clv, coeff in self.terms.items():
+            expr.set_variable(clv, coeff)
+        return expr
+
+    def nonzero(self):
+        tableau = self.tableau
+        return numpy.flatnonzero(tableau.matrix[self.row, :len(tableau.col_vars)]).tolist()
+
+    @property
+    def constant(self):
+        return float(self.tableau.constants[self.row])
+
+    @constant.setter
+    def constant(self, value):
+        self.tableau.constants[self.row] = value
+
+    @property
+    def terms(self):
+        return DenseTerms(self)
+
+    @property
+    def is_constant(self):
+        return not self.nonzero()
+
+    def clone(self):
+        return self.as_expression()
+
+    ######################################################################
+    # Internal mechanisms
+    ######################################################################
+
+    def add_expression(self, expr, n=1.0, subject=None, solver=None):
+        if isinstance(expr, AbstractVariable):
+            expr = Expression(variable=expr)
+
+        self.constant = self.constant + n * expr.constant
+        for clv, coeff in expr.terms.items():
+            self.add_variable(clv, coeff * n, subject, solver)
+
+    def add_variable(self, v, cd=1.0, subject=None, solver=None):
+        coeff = self.coefficient_for(v)
+        if coeff:
+            new_coefficient = coeff + cd
+            if approx_equal(new_coefficient, 0.0):
+                if solver:
+                    solver.note_removed_variable(v, subject)
+                self.remove_variable(v)
+            else:
+                self.set_variable(v, new_coefficient)
+        else:
+            if not approx_equal(cd, 0.0):
+                self.set_variable(v, cd)
+                if solver:
+                    solver.note_added_variable(v, subject)
+
+    def set_variable(self, v, c):
+        # Allocate the column first; the matrix may be reallocated.
+        j = self.tableau.column_for(v)
+        self.tableau.matrix[self.row, j] = c
+
+    def remove_variable(self, v):
+        j = self.tableau.col_ids.get(v)
+        if j is None or self.tableau.matrix[self.row, j] == 0.0:
+            raise KeyError(v)
+        self.tableau.matrix[self.row, j] = 0.0
+
+    def any_pivotable_variable(self):
+        if self.is_constant:
+            raise InternalError('any_pivotable_variable called on a constant')
+
+        col_vars = self.tableau.col_vars
+        for j in self.nonzero():
+            if col_vars[j].is_pivotable:
+                return col_vars[j]
+        return None
+
+    def substitute_out(self, outvar, expr, subject=None, solver=None):
+        multiplier = self.coefficient_for(outvar)
+        self.remove_variable(outvar)
+        self.constant = self.constant + multiplier * expr.constant
+        for clv, coeff in expr.terms.items():
+            old_coefficient = self.coefficient_for(clv)
+            if old_coefficient:
+                new_coefficient = old_coefficient + multiplier * coeff
+                if approx_equal(new_coefficient, 0):
+                    solver.note_removed_variable(clv, subject)
+                    self.remove_variable(clv)
+                else:
+                    self.set_variable(clv, new_coefficient)
+            else:
+                self.set_variable(clv, multiplier * coeff)
+                if solver:
+                    solver.note_added_variable(clv, subject)
+
+    def change_subject(self, old_subject, new_subject):
+        self.set_variable(old_subject, self.new_subject(new_subject))
+
+    def multiply(self, x):
+        x = float(x)
+        self.constant = self.constant * x
+        self.tableau.matrix[self.row] *= x
+
+    def new_subject(self, subject):
+        value = self.coefficient_for(subject)
+        self.remove_variable(subject)
+        reciprocal = 1.0 / value
+        self.multiply(-reciprocal)
+        return reciprocal
+
+    def coefficient_for(self, clv):
+        j = self.tableau.col_ids.get(clv)
+        if j is None:
+            return 0.0
+        return float(self.tableau.matrix[self.row, j])
+
+
+class DenseColumn(object):
+    "A view of the rows a variable appears in."
+    __slots__ = ('tableau', 'var')
+
+    def __init__(self, tableau, var):
+        self.tableau = tableau
+        self.var = var
+
+    def rows(self):
+        tableau = self.tableau
+        j = tableau.col_ids.get(self.var)
+        if j is None:
+            return []
+        return numpy.flatnonzero(tableau.matrix[:len(tableau.row_vars), j]).tolist()
+
+    def __len__(self):
+        return len(self.rows())
+
+    def __iter__(self):
+        # Most recently added rows first.
+        row_vars = self.tableau.row_vars
+        return iter([row_vars[r] for r in reversed(self.rows())])
+
+    def __contains__(self, v):
+        tableau = self.tableau
+        r = tableau.row_ids.get(v)
+        j = tableau.col_ids.get(self.var)
+        return r is not None and j is not None and tableau.matrix[r, j] != 0.0
+
+    def __repr__(self):
+        return repr(set(self))
+
+    def add(self, v):
+        # Membership follows the coefficients in the matrix.
+        pass
+
+    def remove(self, v):
+        pass
+
+
+class DenseTableau(Tableau):
+    """A Tableau held in a dense 2-D NumPy array.
+
+    Pivots, and the primal and dual ratio tests, are vectorized operations
+    over the array. Requires NumPy.
+    """
+    def __init__(self, *args, **kwargs):
+        if numpy is None:
+            raise ImportError('The dense tableau backend requires NumPy')
+
+        # The storage must exist before any row is added, including
+        # the objective row added by SimplexSolver's constructor.
+        self.matrix = numpy.zeros((16, 16))
+        self.constants = numpy.zeros(16)
+
+        # Row index of each row variable, and the flags the ratio
+        # tests need for each row and column.
+        self.row_ids = {}
+        self.row_vars = []
+        self.row_pivotable = numpy.zeros(16, dtype=bool)
+        self.row_restricted = numpy.zeros(16, dtype=bool)
+        self.row_external = numpy.zeros(16, dtype=bool)
+        self.row_stay = numpy.zeros(16, dtype=bool)
+        self.free_rows = []
+
+        # Column index of each parametric variable.
+        self.col_ids = {}
+        self.col_vars = []
+        self.col_pivotable = numpy.zeros(16, dtype=bool)
+        self.free_cols = []
+
+        super(DenseTableau, self).__init__(*args, **kwargs)
+
+    ######################################################################
+    # Storage
+    ######################################################################
+
+    def _grow(self, n_rows, n_cols):
+        old_rows, old_cols = self.matrix.shape
+        if n_rows <= old_rows and n_cols <= old_cols:
+            return
+        new_rows = max(old_rows, 2 * n_rows)
+        new_cols = max(old_cols, 2 * n_cols)
+        matrix = numpy.zeros((new_rows, new_cols))
+        matrix[:old_rows, :old_cols] = self.matrix
+        self.matrix = matrix
+        if new_rows > old_rows:
+            self.constants = numpy.concatenate([self.constants, numpy.zeros(new_rows - old_rows)])
+            self.row_pivotable = numpy.concatenate([self.row_pivotable, numpy.zeros(new_rows - old_rows, dtype=bool)])
+            self.row_restricted = numpy.concatenate([self.row_restricted, numpy.zeros(new_rows - old_rows, dtype=bool)])
+            self.row_external = numpy.concatenate([self.row_external, numpy.zeros(new_rows - old_rows, dtype=bool)])
+            self.row_stay = numpy.concatenate([self.row_stay, numpy.zeros(new_rows - old_rows, dtype=bool)])
+        if new_cols > old_cols:
+            self.col_pivotable = numpy.concatenate([self.col_pivotable, numpy.zeros(new_cols - old_cols, dtype=bool)])
+
+    def column_for(self, var):
+        "The column index of var, allocating one if necessary."
+        j = self.col_ids.get(var)
+        if j is None:
+            if self.free_cols:
+                j = self.free_cols.pop()
+                self.col_vars[j] = var
+            else:
+                j = len(self.col_vars)
+                self._grow(len(self.row_vars), j + 1)
+                self.col_vars.append(var)
+            self.col_ids[var] = j
+            self.col_pivotable[j] = var.is_pivotable
+        return j
+
+    def _release_column(self, var):
+        j = self.col_ids.pop(var, None)
+        if j is not None:
+            self.matrix[:, j] = 0.0
+            self.col_vars[j] = None
+            self.col_pivotable[j] = False
+            self.free_cols.append(j)
+
+    def _row_for(self, var):
+        if self.free_rows:
+            r = self.free_rows.pop()
+            self.row_vars[r] = var
+        else:
+            r = len(self.row_vars)
+            self._grow(r + 1, len(self.col_vars))
+            self.row_vars.append(var)
+        self.row_ids[var] = r
+        self.row_pivotable[r] = var.is_pivotable
+        self.row_restricted[r] = var.is_restricted
+        self.row_external[r] = var.is_external
+        self.row_stay[r] = var in self.stay_vars
+        return r
+
+    def fork_rows(self, tableau):
+        # The storage is copied; the row and column views are rebuilt to
+        # refer to the copy.
+        for name in ('matrix', 'constants', 'row_pivotable', 'row_restricted',
+                     'row_external', 'row_stay', 'col_pivotable'):
+            setattr(tableau, name, getattr(self, name).copy())
+        tableau.row_ids = dict(self.row_ids)
+        tableau.row_vars = list(self.row_vars)
+        tableau.free_rows = list(self.free_rows)
+        tableau.col_ids = dict(self.col_ids)
+        tableau.col_vars = list(self.col_vars)
+        tableau.free_cols = list(self.free_cols)
+        tableau.rows = dict((v, DenseExpression(tableau, r)) for v, r in self.row_ids.items())
+        tableau.columns = dict((v, DenseColumn(tableau, v)) for v in self.columns)
+
+    ######################################################################
+    # Tableau interface
+    ######################################################################
+
+    def note_removed_variable(self, var, subject):
+        pass
+
+    def note_added_variable(self, var, subject):
+        if subject and var not in self.columns:
+            self.columns[var] = DenseColumn(self, var)
+
+    def add_row(self, var, expr):
+        r = self._row_for(var)
+        self.constants[r] = expr.constant
+        items = list(expr.terms.items())
+        # Allocate the columns first; the matrix may be reallocated.
+        cols = [self.column_for(clv) for clv, coeff in items]
+        self.matrix[r, cols] = [coeff for clv, coeff in items]
+        columns = self.columns
+        for clv, coeff in items:
+            if clv not in columns:
+                columns[clv] = DenseColumn(self, clv)
+            if clv.is_external:
+                self.external_parametric_vars.add(clv)
+                self.changed_external_vars.add(clv)
+
+        self.rows[var] = DenseExpression(self, r)
+        if var.is_external:
+            self.external_rows.add(var)
+            self.changed_external_vars.add(var)
+        if var in self.stay_vars:
+            self.changed_stay_vars.add(var)
+
+    def remove_row(self, var):
+        expr = self.rows.pop(var).as_expression()
+        r = self.row_ids.pop(var)
+        self.matrix[r] = 0.0
+        self.constants[r] = 0.0
+        self.row_vars[r] = None
+        self.row_pivotable[r] = False
+        self.row_restricted[r] = False
+        self.row_external[r] = False
+        self.row_stay[r] = False
+        self.free_rows.append(r)
+
+        try:
+            self.infeasible_rows.remove(var)
+        except KeyError:
+            pass
+        if var.is_external:
+            self.changed_external_vars.add(var)
+            try:
+                self.external_rows.remove(var)
+            except KeyError:
+                pass
+        return expr
+
+    def remove_column(self, var):
+        self.columns.pop(var, None)
+        self._release_column(var)
+
+        if var.is_external:
+            try:
+                self.external_rows.remove(var)
+            except KeyError:
+                pass
+
+            try:
+                self.external_parametric_vars.remove(var)
+            except KeyError:
+                pass
+
+    def substitute_out(self, oldVar, expr):
+        # Every row containing oldVar is updated at once: with m the
+        # column of oldVar, rows += outer(m, expr).
+        columns = self.columns
+        items = list(expr.terms.items())
+        cols = numpy.array([self.column_for(clv) for clv, coeff in items], dtype=int)
+        coeffs = numpy.array([coeff for clv, coeff in items])
+
+        n_rows = len(self.row_vars)
+        matrix = self.matrix
+        j = self.col_ids[oldVar]
+        rows = numpy.flatnonzero(matrix[:n_rows, j])
+        multipliers = matrix[rows, j]
+        matrix[rows, j] = 0.0
+        self.constants[rows] += multipliers * expr.constant
+
+        if len(cols):
+            block = numpy.ix_(rows, cols)
+            updated = matrix[block] + numpy.outer(multipliers, coeffs)
+            updated[numpy.abs(updated) < EPSILON] = 0.0
+            matrix[block] = updated
+
+            # Variables that now appear in a row they were not in before
+            # need a column.
+            present = (updated != 0.0).any(axis=0)
+            for n, (clv, coeff) in enumerate(items):
+                if present[n] and clv not in columns:
+                    columns[clv] = DenseColumn(self, clv)
+
+        constants = self.constants
+        infeasible = rows[self.row_restricted[rows] & (constants[rows] < 0.0)]
+        row_vars = self.row_vars
+        for r in infeasible.tolist():
+            self.infeasible_rows.add(row_vars[r])
+        for r in rows[self.row_external[rows]].tolist():
+            self.changed_external_vars.add(row_vars[r])
+        for r in rows[self.row_stay[rows]].tolist():
+            self.changed_stay_vars.add(row_vars[r])
+
+        if oldVar.is_external:
+            self.changed_external_vars.add(oldVar)
+            self.external_rows.add(oldVar)
+            try:
+                self.external_parametric_vars.remove(oldVar)
+            except KeyError:
+                pass
+
+        del columns[oldVar]
+        self._release_column(oldVar)
+
+    ######################################################################
+    # Ratio tests
+    ######################################################################
+
+    def exit_variable(self, entry_var):
+        j = self.col_ids.get(entry_var)
+        if j is None:
+            return None, float('inf')
+        n_rows = len(self.row_vars)
+        column = self.matrix[:n_rows, j]
+        rows = numpy.flatnonzero((column < 0.0) & self.row_pivotable[:n_rows])
+        if not len(rows):
+            return None, float('inf')
+        ratios = -self.constants[rows] / column[rows]
+        # Ties go to the most recently added row.
+        best = len(ratios) - 1 - int(numpy.argmin(ratios[::-1]))
+        return self.row_vars[rows[best]], float(ratios[best])
+
+    def dual_entering_variable(self, z_row, expr):
+        n_cols = len(self.col_vars)
+        row = self.matrix[expr.row, :n_cols]
+        cols = numpy.flatnonzero((row > 0.0) & self.col_pivotable[:n_cols])
+        if not len(cols):
+            return None
+        ratios = self.matrix[z_row.row, cols] / row[cols]
+        return self.col_vars[cols[int(numpy.argmin(ratios))]]
@@ -1,7 +1,9 @@
 from __future__ import print_function, unicode_literals, absolute_import, division
 
+import itertools
+
 from .error import InternalError
-from .utils import approx_equal, REQUIRED, STRONG, repr_strength
+from .utils import approx_equal, as_list, REQUIRED, STRONG, repr_strength
 
 ###########################################################################
 # Variables
@@ -10,13 +12,24 @@ from .utils import approx_equal, REQUIRED, STRONG, repr_strength
 # quantities that are to be solved and constrained.
 ###########################################################################
 
+# Source of variable ordinals. Ordinals give variables a stable, unique
+# ordering, which the solver uses to make pivoting deterministic.
+_ordinals = itertools.count()
+
+
 class AbstractVariable(object):
-    def __init__(self, name):
-        self.name = name
-        self.is_dummy = False
-        self.is_external = False
-        self.is_pivotable = False
-        self.is_restricted = False
+    # Variables are created in large numbers (every constraint mints at
+    # least one slack or dummy variable), so they carry no instance
+    # dictionary. The kind flags are constant for each class.
+    __slots__ = ('ordinal',)
+
+    is_dummy = False
+    is_external = False
+    is_pivotable = False
+    is_restricted = False
+
+    def __init__(self):
+        self.ordinal = next(_ordinals)
 
     def __rmul__(self, x):
         return self.__mul__(x)
@@ -55,9 +68,13 @@ class AbstractVariable(object):
         if isinstance(x, (int, float)):
             return Expression(self, constant=x)
         elif isinstance(x, Expression):
-            return Expression(self) + x
+            result = Expression(self)
+            result.add_expression(x, 1.0)
+            return result
         elif isinstance(x, AbstractVariable):
-            return Expression(self) + Expression(x)
+            result = Expression(self)
+            result.add_variable(x, 1.0)
+            return result
         else:
             return NotImplemented
 
@@ -65,9 +82,13 @@ class AbstractVariable(object):
         if isinstance(x, (int, float)):
             return Expression(self, -1.0, constant=x)
         elif isinstance(x, Expression):
-            return x - Expression(self)
+            result = x.clone()
+            result.add_variable(self, -1.0)
+            return result
         elif isinstance(x, AbstractVariable):
-            return Expression(x) - Expression(self)
+            result = Expression(x)
+            result.add_variable(self, -1.0)
+            return result
         else:
             return NotImplemented
 
@@ -75,18 +96,26 @@ class AbstractVariable(object):
         if isinstance(x, (int, float)):
             return Expression(self, constant=-x)
         elif isinstance(x, Expression):
-            return Expression(self) - x
+            result = Expression(self)
+            result.add_expression(x, -1.0)
+            return result
         elif isinstance(x, AbstractVariable):
-            return Expression(self) - Expression(x)
+            result = Expression(self)
+            result.add_variable(x, -1.0)
+            return result
         else:
             return NotImplemented
 
 
 class Variable(AbstractVariable):
+    __slots__ = ('name', 'value')
+
+    is_external = True
+
     def __init__(self, name, value=0.0):
-        super(Variable, self).__init__(name)
+        super(Variable, self).__init__()
+        self.name = name
         self.value = float(value)
-        self.is_external = True
 
     def __repr__(self):
         return '%s[%s]' % (self.name, self.value)
@@ -125,28 +154,50 @@ class Variable(AbstractVariable):
 
 
 class DummyVariable(AbstractVariable):
+    __slots__ = ('number',)
+
+    is_dummy = True
+    is_restricted = True
+
     def __init__(self, number):
-        super(DummyVariable, self).__init__(name='d%s' % (number))
-        self.is_dummy = True
-        self.is_restricted = True
+        super(DummyVariable, self).__init__()
+        self.number = number
+
+    @property
+    def name(self):
+        # Internal names are only needed for debugging output,
+        # so they are generated on demand rather than stored.
+        return 'd%s' % self.number
 
     def __repr__(self):
         return '%s:dummy' % self.name
 
 
 class ObjectiveVariable(AbstractVariable):
+    __slots__ = ('name',)
+
     def __init__(self, name):
-        super(ObjectiveVariable, self).__init__(name)
+        super(ObjectiveVariable, self).__init__()
+        self.name = name
 
     def __repr__(self):
         return '%s:obj' % self.name
 
 
 class SlackVariable(AbstractVariable):
+    __slots__ = ('prefix', 'number')
+
+    is_pivotable = True
+    is_restricted = True
+
     def __init__(self, prefix, number):
-        super(SlackVariable, self).__init__(name='%s%s' % (prefix, number))
-        self.is_pivotable = True
-        self.is_restricted = True
+        super(SlackVariable, self).__init__()
+        self.prefix = prefix
+        self.number = number
+
+    @property
+    def name(self):
+        return '%s%s' % (self.prefix, self.number)
 
     def __repr__(self):
         return '%s:slack' % self.name
@@ -159,6 +210,8 @@ class SlackVariable(AbstractVariable):
 
 
 class Expression(object):
+    __slots__ = ('constant', 'terms')
+
     def __init__(self, variable=None, value=1.0, constant=0.0):
         assert isinstance(constant, (float, int))
         assert variable is None or isinstance(variable, AbstractVariable)
@@ -169,6 +222,29 @@ class Expression(object):
         if variable:
             self.set_variable(variable, float(value))
 
+    @classmethod
+    def from_arrays(cls, variables, coefficients, constant=0.0):
+        """Build an expression from parallel sequences of variables and coefficients.
+
+        Both arguments may be lists, NumPy arrays, or any other sequence or
+        buffer supporting ``tolist()``. Terms with a coefficient that is
+        approximately zero are dropped, as add_variable() drops them;
+        repeated variables are combined.
+        """
+        variables = as_list(variables)
+        coefficients = [float(c) for c in as_list(coefficients)]
+        if len(variables) != len(coefficients):
+            raise ValueError('from_arrays() requires one coefficient per variable')
+
+        expr = cls(constant=float(constant))
+        terms = dict(zip(variables, coefficients))
+        if len(terms) == len(variables):
+            expr.terms = dict((v, c) for v, c in terms.items() if not approx_equal(c, 0.0))
+        else:
+            for v, c in zip(variables, coefficients):
+                expr.add_variable(v, c)
+        return expr
+
     def __repr__(self):
         parts = []
         if not approx_equal(self.constant, 0.0) or self.is_constant:
@@ -186,8 +262,7 @@ class Expression(object):
 
     def clone(self):
         expr = Expression(constant=self.constant)
-        for clv, value in self.terms.items():
-            expr.set_variable(clv, value)
+        expr.terms = dict(self.terms)
         return expr
 
     ######################################################################
@@ -235,24 +310,38 @@ class Expression(object):
                 return NotImplemented
         return result
 
+    def __imul__(self, x):
+        if isinstance(x, (float, int)):
+            self.multiply(x)
+        elif isinstance(x, Expression) and x.is_constant:
+            self.multiply(x.constant)
+        else:
+            return NotImplemented
+        return self
+
     def __radd__(self, x):
         return self.__add__(x)
 
     def __add__(self, x):
+        if isinstance(x, (Expression, Variable, int, float)):
+            return self.clone().__iadd__(x)
+        else:
+            return NotImplemented
+
+    def __iadd__(self, x):
+        # In-place addition modifies this expression, so an expression
+        # can be accumulated term by term without copying it each time.
         if isinstance(x, Expression):
-            result = self.clone()
-            result.add_expression(x, 1.0)
-            return result
+            if x is self:
+                x = x.clone()
+            self.add_expression(x, 1.0)
         elif isinstance(x, Variable):
-            result = self.clone()
-            result.add_variable(x, 1.0)
-            return result
+            self.add_variable(x, 1.0)
         elif isinstance(x, (int, float)):
-            result = self.clone()
-            result.add_expression(Expression(constant=x), 1.0)
-            return result
+            self.constant = self.constant + x
         else:
             return NotImplemented
+        return self
 
     def __rsub__(self, x):
         if isinstance(x, Expression):
@@ -274,20 +363,23 @@ class Expression(object):
             return NotImplemented
 
     def __sub__(self, x):
+        if isinstance(x, (Expression, Variable, int, float)):
+            return self.clone().__isub__(x)
+        else:
+            return NotImplemented
+
+    def __isub__(self, x):
         if isinstance(x, Expression):
-            result = self.clone()
-            result.add_expression(x, -1.0)
-            return result
+            if x is self:
+                x = x.clone()
+            self.add_expression(x, -1.0)
         elif isinstance(x, Variable):
-            result = self.clone()
-            result.add_variable(x, -1.0)
-            return result
+            self.add_variable(x, -1.0)
         elif isinstance(x, (int, float)):
-            result = self.clone()
-            result.add_expression(Expression(constant=x), -1.0)
-            return result
+            self.constant = self.constant - x
         else:
             return NotImplemented
+        return self
 
     ######################################################################
     # Mathematical operators
@@ -337,6 +429,16 @@ class Expression(object):
         for clv, coeff in expr.terms.items():
             self.add_variable(clv, coeff * n, subject, solver)
 
+    def add_term(self, item, n=1.0):
+        if isinstance(item, AbstractVariable):
+            self.add_variable(item, n)
+        elif isinstance(item, Expression):
+            self.add_expression(item, n)
+        elif isinstance(item, (int, float)):
+            self.constant = self.constant + n * item
+        else:
+            raise TypeError('Cannot add %r to an expression' % (item,))
+
     def add_variable(self, v, cd=1.0, subject=None, solver=None):
         # print 'expression: add_variable', v, cd
         coeff = self.terms.get(v)
@@ -409,6 +511,30 @@ class Expression(object):
         return self.terms.get(clv, 0.0)
 
 
+def sum_terms(items, coeffs=None):
+    """Build a single Expression from a sequence of terms.
+
+    ``items`` may contain variables, expressions and constants. If
+    ``coeffs`` is provided, it must be a sequence of the same length, and
+    each item is multiplied by the corresponding coefficient.
+
+    Unlike the builtin ``sum()``, which copies the partial result at every
+    step, the expression is built in a single pass.
+    """
+    expr = Expression()
+    if coeffs is None:
+        for item in items:
+            expr.add_term(item, 1.0)
+    else:
+        items = list(items)
+        coeffs = list(coeffs)
+        if len(items) != len(coeffs):
+            raise ValueError('sum_terms() requires one coefficient per item')
+        for item, coeff in zip(items, coeffs):
+            expr.add_term(item, coeff)
+    return expr
+
+
 ###########################################################################
 # Constraint
 #
@@ -417,12 +543,15 @@ class Expression(object):
 ###########################################################################
 
 class AbstractConstraint(object):
+    __slots__ = ('strength', 'weight')
+
+    is_edit_constraint = False
+    is_inequality = False
+    is_stay_constraint = False
+
     def __init__(self, strength, weight=1.0):
         self.strength = strength
         self.weight = weight
-        self.is_edit_constraint = False
-        self.is_inequality = False
-        self.is_stay_constraint = False
 
     @property
     def is_required(self):
@@ -432,28 +561,46 @@ class AbstractConstraint(object):
         return '%s:{%s}(%s)' % (repr_strength(self.strength), self.weight, self.expression)
 
 class EditConstraint(AbstractConstraint):
+    __slots__ = ('variable', 'expression')
+
+    is_edit_constraint = True
+
     def __init__(self, variable, strength=STRONG, weight=1.0):
         super(EditConstraint, self).__init__(strength, weight)
         self.variable = variable
         self.expression = Expression(variable, -1.0, variable.value)
-        self.is_edit_constraint = True
+
+    def clone(self):
+        c = EditConstraint(self.variable, strength=self.strength, weight=self.weight)
+        c.expression = self.expression.clone()
+        return c
 
     def __repr__(self):
         return 'edit:%s' % super(EditConstraint, self).__repr__()
 
 
 class StayConstraint(AbstractConstraint):
+    __slots__ = ('variable', 'expression')
+
+    is_stay_constraint = True
+
     def __init__(self, variable, strength=STRONG, weight=1.0):
         super(StayConstraint, self).__init__(strength, weight)
         self.variable = variable
         self.expression = Expression(variable, -1.0, variable.value)
-        self.is_stay_constraint=True
+
+    def clone(self):
+        c = StayConstraint(self.variable, strength=self.strength, weight=self.weight)
+        c.expression = self.expression.clone()
+        return c
 
     def __repr__(self):
         return 'stay:%s' % super(StayConstraint, self).__repr__()
 
 
 class Constraint(AbstractConstraint):
+    __slots__ = ('expression', 'is_inequality')
+
     LEQ = -1
     EQ = 0
     GEQ = 1
@@ -468,7 +615,9 @@ class Constraint(AbstractConstraint):
         if isinstance(param1, Expression):
             if param2 is None:
                 super(Constraint, self).__init__(strength=strength, weight=weight)
-                self.expression = param1
+                # A copy, so that changing param1 in place, with += or
+                # -=, doesn't change the constraint.
+                self.expression = param1.clone()
             elif isinstance(param2, Expression):
                 super(Constraint, self).__init__(strength=strength, weight=weight)
                 self.expression = param1.clone()
@@ -595,6 +744,26 @@ class Constraint(AbstractConstraint):
 
         self.is_inequality = operator != self.EQ
 
+    @classmethod
+    def from_arrays(cls, variables, coefficients, operator=EQ, rhs=0.0, strength=REQUIRED, weight=1.0):
+        """Define the constraint ``sum(coefficients * variables) <operator> rhs``.
+
+        ``variables`` and ``coefficients`` are parallel sequences, as accepted
+        by Expression.from_arrays().
+        """
+        if operator == cls.LEQ:
+            expr = Expression.from_arrays(variables, [-c for c in as_list(coefficients)], float(rhs))
+        elif operator == cls.EQ or operator == cls.GEQ:
+            expr = Expression.from_arrays(variables, coefficients, -float(rhs))
+        else:
+            raise InternalError("Invalid operator in Constraint constructor")
+
+        cn = cls.__new__(cls)
+        AbstractConstraint.__init__(cn, strength, weight)
+        cn.expression = expr
+        cn.is_inequality = operator != cls.EQ
+        return cn
+
     def clone(self):
         c = Constraint(self.expression, strength=self.strength, weight=self.weight)
         c.is_inequality = self.is_inequality
@@ -0,0 +1,97 @@
+from __future__ import print_function, unicode_literals, absolute_import, division
+
+from array import array
+import json
+import struct
+import sys
+
+###########################################################################
+# Packed arrays
+#
+# The binary formats (solver snapshots and encoded models) are laid out
+# the same way: a magic string, the length of a JSON header, the header,
+# and a sequence of flat arrays of numbers, each aligned to 8 bytes. The
+# header records the type, size and position of each array, and the byte
+# order they were written in.
+###########################################################################
+
+
+def pack(magic, header, arrays):
+    """Lay out a header and a list of (name, array) pairs.
+
+    ``header`` is a JSON-serializable dictionary; the description of the
+    arrays is added to it. Returns the packed bytes.
+    """
+    header = dict(header, byteorder=sys.byteorder, arrays={})
+    offset = 0
+    for name, values in arrays:
+        header['arrays'][name] = [values.typecode, values.itemsize, offset, len(values)]
+        offset = offset + _aligned(len(values) * values.itemsize)
+
+    header = json.dumps(header, sort_keys=True).encode('utf-8')
+    start = _aligned(len(magic) + 4 + len(header))
+    parts = [magic, struct.pack('<I', len(header)), header]
+    parts.append(b'\0' * (start - len(magic) - 4 - len(header)))
+    for name, values in arrays:
+        data = _to_bytes(values)
+        parts.append(data)
+        parts.append(b'\0' * (_aligned(len(data)) - len(data)))
+    return b''.join(parts)
+
+
+def unpack(magic, buf):
+    """Read the header and arrays laid out by pack().
+
+    ``buf`` may be any buffer; the arrays are read from it directly
+    where possible. Returns the header, and a dictionary mapping the
+    name of each array to a list of its values.
+    """
+    if buf[:len(magic)] != magic:
+        raise ValueError('Unrecognized data; expected it to start with %r' % (magic,))
+    header_length, = struct.unpack('<I', buf[len(magic):len(magic) + 4])
+    header_end = len(magic) + 4 + header_length
+    header = json.loads(buf[len(magic) + 4:header_end].decode('utf-8'))
+    swap = header['byteorder'] != sys.byteorder
+    start = _aligned(header_end)
+    arrays = {}
+    for name, (typecode, itemsize, offset, length) in header['arrays'].items():
+        typecode = str(typecode)
+        if array(typecode).itemsize != itemsize:
+            raise ValueError('Array %s has items of %d bytes; expected %d' % (name, itemsize, array(typecode).itemsize))
+        arrays[name] = _from_buffer(buf, typecode, start + offset, length, swap)
+    return header, arrays
+
+
+def as_strength(strength):
+    "A strength read back from an array of floats; strengths are conventionally integers."
+    return int(strength) if strength == int(strength) else strength
+
+
+def _aligned(n):
+    return (n + 7) // 8 * 8
+
+
+def _to_bytes(values):
+    try:
+        return values.tobytes()
+    except AttributeError:
+        return values.tostring()
+
+
+def _from_buffer(buf, typecode, offset, length, swap):
+    "Read an array from a buffer, as a list."
+    values = array(typecode)
+    end = offset + length * values.itemsize
+    if not swap and hasattr(memoryview, 'cast'):
+        # Read straight from the buffer, without copying it first.
+        with memoryview(buf) as whole:
+            with whole[offset:end].cast(typecode) as view:
+                return view.tolist()
+    data = buf[offset:end]
+    try:
+        values.frombytes(data)
+    except AttributeError:
+        values.fromstring(data)
+    if swap:
+        values.byteswap()
+    return values.tolist()
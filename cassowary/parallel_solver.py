@@ -0,0 +1,638 @@
+from __future__ import print_function, unicode_literals, absolute_import, division
+
+import multiprocessing
+from array import array
+from collections import OrderedDict
+
+from . import wire
+from .error import ConstraintNotFound, InternalError
+from .expression import EditConstraint, StayConstraint
+from .partitioned_solver import PartitionedSolver, constraint_nodes
+from .simplex_solver import SolverBatchContext, SolverEditContext
+from .utils import index_of, renumber, suggestions, with_strength, STRONG, WEAK
+
+###########################################################################
+# Parallel solving
+#
+# A ParallelSolver spreads the independent parts of a system over worker
+# processes. The caller's process keeps a union-find structure over the
+# variables, like PartitionedSolver, to decide which worker holds each
+# component; each worker holds a PartitionedSolver for the components it
+# was given. Operations are queued for each worker, and sent as one
+# message per worker when the system is solved, so the workers solve
+# their components at the same time. Each worker replies with the values
+# that changed, which are copied to the caller's variables.
+#
+# Variables and constraints are known to the workers by number. Added
+# constraints are sent with wire.encode().
+###########################################################################
+
+
+class Worker(PartitionedSolver):
+    "The solver in a worker process."
+    def __init__(self, backend=None, pricing=None):
+        super(Worker, self).__init__(backend=backend, pricing=pricing)
+        # Variables and constraints, by number, and their numbers.
+        self.variables = {}
+        self.variable_ids = {}
+        self.constraints_by_id = {}
+        self.constraint_ids = {}
+
+        # The latest value of each variable changed since the last reply.
+        self.changes = {}
+
+    def new_solver(self):
+        solver = super(Worker, self).new_solver()
+        solver.change_tolerance = 0.0
+        solver.add_change_listener(self.note_changes)
+        return solver
+
+    def note_changes(self, changes):
+        for v, old, new in changes:
+            self.changes[v] = new
+
+    def run(self, solve, ops):
+        """Apply a list of operations, as a batch, then solve if solve is set.
+
+        Returns the changed values, as arrays of variable numbers and
+        values, the results of any exports, and the failures, as
+        ``(constraint number, exception)`` pairs.
+        """
+        exported = []
+        failures = []
+        with self.batch():
+            for op in ops:
+                try:
+                    self.apply(op, exported, failures)
+                except Exception as e:
+                    failures.append((None, e))
+        if solve:
+            self.solve()
+
+        variable_ids = self.variable_ids
+        ids = array('i', [variable_ids[v] for v in self.changes])
+        values = array('d', self.changes.values())
+        self.changes = {}
+        return ids, values, exported, failures
+
+    def apply(self, op, exported, failures):
+        if op[0] == 'add':
+            failures.extend(self.add(*op[1:]))
+        elif op[0] == 'remove':
+            for n in op[1]:
+                self.remove_constraint(self.pop_constraint(n))
+        elif op[0] == 'remove_stays':
+            for cn in self.remove_stays([self.variables[n] for n in op[1]]):
+                self.pop_constraint(self.constraint_ids[cn])
+        elif op[0] == 'persist':
+            for n in op[1]:
+                self.add_edit_var(self.variables[n], persistent=True)
+        elif op[0] == 'suggest':
+            for n, x in zip(op[1], op[2]):
+                self.suggest_value(self.variables[n], x)
+        elif op[0] == 'resolve':
+            self.resolve()
+        elif op[0] == 'settle':
+            self.settle()
+        elif op[0] == 'export':
+            exported.append(self.export(op[1]))
+        else:
+            raise InternalError('Unknown operation %r' % (op[0],))
+
+    def pop_constraint(self, n):
+        "Forget the number of a constraint; returns the constraint."
+        cn = self.constraints_by_id.pop(n)
+        del self.constraint_ids[cn]
+        return cn
+
+    def add(self, numbers, variable_ids, n_known, known_values, data, persistent):
+        "Add encoded constraints. Returns the failures."
+        variables = self.variables
+        known = [variables[n] for n in variable_ids[:n_known]]
+        for v, x in zip(known, known_values):
+            v.value = x
+        table, constraints = wire.decode(data, known)
+        for n, v in zip(variable_ids[n_known:], table[n_known:]):
+            variables[n] = v
+            self.variable_ids[v] = n
+
+        failures = []
+        persistent = set(persistent)
+        for n, cn in zip(numbers, constraints):
+            try:
+                self.add_constraint(cn)
+            except Exception as e:
+                failures.append((n, e))
+                continue
+            self.constraints_by_id[n] = cn
+            self.constraint_ids[cn] = n
+            if n in persistent:
+                self.solver_for(cn.variable).edit_var_map[cn.variable].persistent = True
+        return failures
+
+    def export(self, numbers):
+        """Remove the components of constraints, so that they can be added to another worker.
+
+        The constraints must make up whole components. The components
+        are discarded, rather than their constraints removed, so the
+        stays of other components aren't reset.
+
+        Returns the ``(value, persistent)`` pairs from held(), or None
+        for constraints other than stays and edits, by constraint number.
+        """
+        constraints = [self.pop_constraint(n) for n in numbers]
+        roots = []
+        for cn in constraints:
+            root = self.find(constraint_nodes(cn)[0])
+            if not any(r is root for r in roots):
+                roots.append(root)
+
+        held = {}
+        for root in roots:
+            held.update(self.held(list(self.constraints[root]), self.solvers[root]))
+            self.discard(root)
+        return dict((n, held.get(cn)) for n, cn in zip(numbers, constraints))
+
+    def discard(self, root):
+        "Forget a component and its solver."
+        constraints = self.constraints.pop(root)
+        for cn in list(constraints):
+            self.forget(cn, constraints)
+        for node in self.members.pop(root):
+            del self.parent[node]
+        solver = self.solvers.pop(root)
+        self.suggested.discard(solver)
+        self.unsettled.discard(solver)
+
+
+def serve(conn, backend, pricing):
+    "Run a worker, answering the messages sent on conn until it is sent None."
+    worker = Worker(backend=backend, pricing=pricing)
+    while True:
+        message = conn.recv()
+        if message is None:
+            break
+        conn.send(worker.run(*message))
+    conn.close()
+
+
+class Component(object):
+    "The variables and constraints the caller's process knows are in one worker's component."
+    __slots__ = ('members', 'constraints', 'worker')
+
+    def __init__(self, members, worker=None):
+        self.members = members
+        self.constraints = {}
+        self.worker = worker
+
+
+class ParallelSolver(object):
+    """A solver that solves the independent parts of a system in worker processes.
+
+    Components are given to the least loaded worker when they are first
+    sent, and stay with their worker. A constraint that joins components
+    held by different workers moves the smaller ones to the worker of
+    the largest.
+
+    Changes are sent to the workers when the system is solved, so
+    adding constraints in a batch() lets every worker solve at once.
+    Call close(), or use the solver as a context manager, to stop the
+    workers.
+    """
+    def __init__(self, processes=None, backend=None, pricing=None):
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+        self.connections = []
+        self.processes = []
+        for i in range(processes):
+            conn, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=serve, args=(child, backend, pricing))
+            process.daemon = True
+            process.start()
+            child.close()
+            self.connections.append(conn)
+            self.processes.append(process)
+
+        # Numbers for variables and constraints, and the variables each
+        # worker has been sent.
+        self.variable_ids = {}
+        self.variables = []
+        self.constraint_ids = {}
+        self.constraints = {}
+        self.constraint_counter = 0
+        self.known = [set() for conn in self.connections]
+
+        # The union-find structure over variables, with the Component of
+        # each root. Components are merged, but never split. Components
+        # that haven't been sent to a worker are kept in order.
+        self.parent = {}
+        self.components = {}
+        self.unplaced = OrderedDict()
+
+        # The number of constraints each worker holds, the operations
+        # waiting to be sent to each worker, and the workers that have
+        # unsolved changes or suggested values.
+        self.loads = [0] * processes
+        self.pending = [[] for conn in self.connections]
+        self.unsolved = set()
+        self.suggested = set()
+
+        # Stays and edit constraints, by variable, and the edit
+        # variables that are persistent.
+        self.stay_constraints = {}
+        self.edit_var_map = {}
+        self.persistent = set()
+        self.edit_vars = []
+        self.edit_variable_stack = [0]
+
+        self.auto_solve = True
+
+    def __repr__(self):
+        return '<ParallelSolver: %s workers>' % len(self.connections)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, tb):
+        self.close()
+
+    def close(self):
+        "Stop the worker processes."
+        for conn in self.connections:
+            conn.send(None)
+            conn.close()
+        for process in self.processes:
+            process.join()
+        self.connections = []
+        self.processes = []
+
+    #######################################################################
+    # Components
+    #######################################################################
+
+    def find(self, node):
+        "The root of the component of node; a new node is a component of its own."
+        parent = self.parent
+        if node not in parent:
+            parent[node] = node
+            self.components[node] = Component([node])
+            return node
+        while parent[node] is not node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def worker_for(self, v):
+        "The number of the worker holding v, or None if v hasn't been sent to a worker."
+        if v not in self.parent:
+            return None
+        return self.components[self.find(v)].worker
+
+    def union(self, roots):
+        """Merge the components of roots; returns the root of the merged component.
+
+        If any of the components is held by a worker, the others are
+        moved to it.
+        """
+        components = self.components
+        held = [r for r in roots if components[r].worker is not None]
+        if held:
+            target = components[max(held, key=lambda r: len(components[r].constraints))].worker
+            for r in held:
+                if components[r].worker != target:
+                    self.migrate(components[r], target)
+            for r in roots:
+                if components[r].worker is None:
+                    self.unplaced.pop(components[r], None)
+                    for cn in components[r].constraints:
+                        self.send_add(target, cn)
+                    self.loads[target] += len(components[r].constraints)
+                    components[r].worker = target
+
+        root = max(roots, key=lambda r: len(components[r].members))
+        component = components[root]
+        for r in roots:
+            if r is not root:
+                self.parent[r] = root
+                other = components.pop(r)
+                self.unplaced.pop(other, None)
+                component.members.extend(other.members)
+                component.constraints.update(other.constraints)
+        if held:
+            component.worker = target
+        else:
+            self.unplaced[component] = True
+        return root
+
+    def place(self, component):
+        "Give a component that hasn't been sent to the least loaded worker."
+        del self.unplaced[component]
+        target = self.loads.index(min(self.loads))
+        for cn in component.constraints:
+            self.send_add(target, cn)
+        self.loads[target] += len(component.constraints)
+        component.worker = target
+
+    def migrate(self, component, target):
+        "Move the constraints of a component to the worker target."
+        source = component.worker
+        constraints = list(component.constraints)
+        self.pending[source].append(('export', [self.constraint_ids[cn] for cn in constraints]))
+        # Only the source is sent a message: placing the components that
+        # haven't been sent yet would give the ones being merged a worker
+        # other than target.
+        held = self.exchange([source])[source][0]
+        for cn in constraints:
+            value = held[self.constraint_ids[cn]]
+            if value is not None:
+                # The value a stay or edit holds its variable to.
+                cn.expression.constant = value[0]
+            self.send_add(target, cn)
+        self.loads[source] -= len(constraints)
+        self.loads[target] += len(constraints)
+        component.worker = target
+
+    #######################################################################
+    # Sending operations
+    #######################################################################
+
+    def send_add(self, worker, cn):
+        "Queue cn to be added to worker."
+        ops = self.pending[worker]
+        if not ops or ops[-1][0] != 'add':
+            ops.append(('add', []))
+        ops[-1][1].append(cn)
+
+    def send(self, worker, op, numbers, values=()):
+        "Queue an operation on numbered variables or constraints, merged with the last operation if it is the same."
+        ops = self.pending[worker]
+        if not ops or ops[-1][0] != op:
+            ops.append((op, [], []))
+        ops[-1][1].extend(numbers)
+        ops[-1][2].extend(values)
+
+    def encode_add(self, worker, constraints):
+        "The operation that adds constraints to worker."
+        known = self.known[worker]
+        variable_ids = self.variable_ids
+        table = []
+        new = []
+        seen = set()
+        for cn in constraints:
+            for v in cn.expression.terms:
+                if v not in seen:
+                    seen.add(v)
+                    if variable_ids[v] in known:
+                        table.append(v)
+                    else:
+                        new.append(v)
+        n_known = len(table)
+        table.extend(new)
+        ids = array('i', [variable_ids[v] for v in table])
+        known.update(ids)
+        constraint_ids = self.constraint_ids
+        return (
+            'add',
+            array('i', [constraint_ids[cn] for cn in constraints]),
+            ids,
+            n_known,
+            # The worker's copies of the variables it knows may be out
+            # of date.
+            array('d', [v.value for v in table[:n_known]]),
+            wire.encode(constraints, table),
+            [
+                constraint_ids[cn] for cn in constraints
+                if cn.is_edit_constraint and cn.variable in self.persistent
+            ],
+        )
+
+    def flush(self, workers=()):
+        """Send the waiting operations to the workers, and copy the values they reply with to the variables.
+
+        The workers are told to solve after the operations, unless
+        auto_solve is off. Workers in ``workers`` are sent a message even
+        if there are no operations for them.
+
+        Returns the results of any exports, by worker. Once every reply
+        has been read, raises the first failure any worker reported.
+        """
+        for component in list(self.unplaced):
+            self.place(component)
+        return self.exchange(range(len(self.connections)), workers)
+
+    def exchange(self, candidates, workers=()):
+        """Send the waiting operations to the workers in candidates, and copy the values they reply with to the variables.
+
+        Workers in ``workers`` are sent a message even if there are no
+        operations for them. Components that haven't been sent to a
+        worker are left alone. Returns, and raises, as flush() does.
+        """
+        sent = []
+        for worker in candidates:
+            ops = self.pending[worker]
+            # A reset of stays alone can wait for the next message.
+            if worker in workers or any(op[0] != 'settle' for op in ops):
+                message = [self.encode_add(worker, op[1]) if op[0] == 'add' else op for op in ops]
+                self.connections[worker].send((self.auto_solve, message))
+                sent.append(worker)
+                self.pending[worker] = []
+                if not self.auto_solve:
+                    self.unsolved.add(worker)
+
+        exported = {}
+        failures = []
+        variables = self.variables
+        for worker in sent:
+            ids, values, exports, errors = self.connections[worker].recv()
+            for n, x in zip(ids, values):
+                variables[n].value = x
+            exported[worker] = exports
+            failures.extend(errors)
+
+        # Constraints that couldn't be added are forgotten.
+        for n, e in failures:
+            if n in self.constraints:
+                self.forget(self.constraints[n])
+        if failures:
+            raise failures[0][1]
+        return exported
+
+    #######################################################################
+    # Constraints
+    #######################################################################
+
+    def add_constraint(self, cn, strength=None, weight=None):
+        cn = with_strength(cn, strength, weight)
+
+        for v in cn.expression.terms:
+            if v not in self.variable_ids:
+                self.variable_ids[v] = len(self.variables)
+                self.variables.append(v)
+
+        roots = []
+        for node in constraint_nodes(cn):
+            root = self.find(node)
+            if not any(r is root for r in roots):
+                roots.append(root)
+        root = self.union(roots)
+        component = self.components[root]
+        component.constraints[cn] = True
+
+        self.constraint_counter += 1
+        self.constraint_ids[cn] = self.constraint_counter
+        self.constraints[self.constraint_counter] = cn
+        if cn.is_stay_constraint:
+            self.stay_constraints.setdefault(cn.variable, []).append(cn)
+        elif cn.is_edit_constraint:
+            self.edit_var_map[cn.variable] = cn
+            self.edit_vars.append(cn.variable)
+
+        if component.worker is not None:
+            self.send_add(component.worker, cn)
+            self.loads[component.worker] += 1
+        if self.auto_solve:
+            self.flush()
+        return cn
+
+    def remove_constraint(self, cn):
+        if cn not in self.constraint_ids:
+            raise ConstraintNotFound()
+        self.settle()
+        n = self.constraint_ids[cn]
+        worker = self.forget(cn)
+        # A constraint that hasn't been sent is just dropped.
+        if worker is not None:
+            self.send(worker, 'remove', [n])
+        if self.auto_solve:
+            self.flush()
+
+    def forget(self, cn):
+        "Remove every record of cn. Returns the worker that holds it, or None."
+        del self.constraints[self.constraint_ids.pop(cn)]
+        root = self.find(constraint_nodes(cn)[0])
+        component = self.components[root]
+        del component.constraints[cn]
+        if component.worker is not None:
+            self.loads[component.worker] -= 1
+        if not component.constraints:
+            for node in component.members:
+                del self.parent[node]
+            del self.components[root]
+            self.unplaced.pop(component, None)
+
+        if cn.is_stay_constraint:
+            stays = self.stay_constraints[cn.variable]
+            stays.remove(cn)
+            if not stays:
+                del self.stay_constraints[cn.variable]
+        elif cn.is_edit_constraint:
+            del self.edit_var_map[cn.variable]
+            self.persistent.discard(cn.variable)
+            index = index_of(self.edit_vars, cn.variable)
+            del self.edit_vars[index]
+            self.edit_variable_stack = renumber(self.edit_variable_stack, [index])
+        return component.worker
+
+    def add_stay(self, v, strength=WEAK, weight=1.0):
+        return self.add_constraint(StayConstraint(v, strength, weight))
+
+    def remove_stays(self, variables):
+        "Remove every stay on each of the variables. Returns the list of stays that were removed."
+        removed = []
+        self.settle()
+        for v in variables:
+            stays = list(self.stay_constraints.get(v, ()))
+            if not stays:
+                continue
+            # Stays that haven't been sent are just dropped.
+            worker = self.worker_for(v)
+            for cn in stays:
+                self.forget(cn)
+            if worker is not None:
+                self.send(worker, 'remove_stays', [self.variable_ids[v]])
+            removed.extend(stays)
+        if self.auto_solve:
+            self.flush()
+        return removed
+
+    def batch(self):
+        return SolverBatchContext(self)
+
+    def solve(self):
+        unsolved = self.unsolved
+        self.unsolved = set()
+        self.flush(unsolved)
+
+    #######################################################################
+    # Editing
+    #######################################################################
+
+    def add_edit_var(self, v, strength=STRONG, persistent=False):
+        "Add an edit constraint on v. See SimplexSolver.add_edit_var()."
+        cn = self.edit_var_map.get(v)
+        if cn is None:
+            # An edit constraint is sent with its persistent flag.
+            if persistent:
+                self.persistent.add(v)
+            return self.add_constraint(EditConstraint(v, strength))
+        if persistent and v not in self.persistent:
+            self.persistent.add(v)
+            worker = self.worker_for(v)
+            if worker is not None:
+                self.send(worker, 'persist', [self.variable_ids[v]])
+            if self.auto_solve:
+                self.flush()
+        return cn
+
+    def remove_edit_var(self, v):
+        self.remove_constraint(self.edit_var_map[v])
+
+    def edit(self):
+        return SolverEditContext(self)
+
+    def begin_edit(self):
+        assert len(self.edit_vars) > 0
+        self.settle()
+        self.edit_variable_stack.append(len(self.edit_vars))
+
+    def end_edit(self):
+        assert len(self.edit_vars) > 0
+        self.resolve()
+        self.edit_variable_stack.pop()
+        for v in self.edit_vars[self.edit_variable_stack[-1]:]:
+            if v not in self.persistent:
+                self.remove_edit_var(v)
+
+    def suggest_value(self, v, x):
+        if v not in self.edit_var_map:
+            raise InternalError("suggestValue for variable %s, but var is not an edit variable" % v)
+        component = self.components[self.find(v)]
+        if component.worker is None:
+            self.place(component)
+        worker = component.worker
+        self.send(worker, 'suggest', [self.variable_ids[v]], [x])
+        self.suggested.add(worker)
+
+    def suggest_values(self, variables, values=None):
+        "Suggest new values for several edit variables, and resolve. See SimplexSolver.suggest_values()."
+        for v, x in suggestions(variables, values, self.edit_var_map.__contains__):
+            self.suggest_value(v, x)
+        self.resolve()
+
+    def resolve(self):
+        "Resolve the components that have been given new values, in their workers."
+        for worker in self.suggested:
+            self.pending[worker].append(('resolve',))
+        self.suggested = set()
+        self.settle()
+        self.flush()
+
+    def settle(self):
+        """Have every worker reset its stays, as SimplexSolver resets every stay when removing a constraint or resolving.
+
+        Nothing changes in a worker until it is sent its next message,
+        so the reset is sent with that message.
+        """
+        for ops in self.pending:
+            if not ops or ops[-1][0] != 'settle':
+                ops.append(('settle',))
@@ -0,0 +1,418 @@
+from __future__ import print_function, unicode_literals, absolute_import, division
+
+from .error import ConstraintNotFound, InternalError, RequiredFailure
+from .expression import EditConstraint, StayConstraint
+from .simplex_solver import SimplexSolver, SolverBatchContext, SolverEditContext
+from .utils import index_of, renumber, suggestions, with_strength, STRONG, WEAK
+
+
+def constraint_nodes(cn):
+    "The nodes a constraint connects: its variables, or the constraint itself if it has none."
+    return list(cn.expression.terms) or [cn]
+
+
+class PartitionedSolver(object):
+    """A solver that keeps each independent part of a system in its own SimplexSolver.
+
+    The variables are partitioned into the connected components of the
+    graph in which constraints join the variables they mention, with a
+    union-find structure. Each component has its own SimplexSolver, and
+    so its own tableau and objective. Adding a constraint that joins
+    components merges them; removing one that disconnects a component
+    splits it. Operations only touch the components involved.
+
+    Supports add_constraint(), remove_constraint(), add_stay(),
+    remove_stays(), add_edit_var(), remove_edit_var(), edit(), batch(),
+    solve(), suggest_value(), suggest_values() and resolve(), with the
+    same results as SimplexSolver. The other SimplexSolver methods are
+    available on the solver of each component, from solver_for().
+    """
+    def __init__(self, backend=None, pricing=None):
+        # Settings for the solver of each component.
+        self.backend = backend
+        self.pricing = pricing
+
+        # The union-find structure: the parent of each node (a variable,
+        # or a constraint with no variables), and the members of each
+        # component, by root.
+        self.parent = {}
+        self.members = {}
+
+        # The constraints on each node, in the order they were added.
+        self.adjacent = {}
+
+        # The solver of each component, by root, and the constraints in
+        # it, in the order they were added.
+        self.solvers = {}
+        self.constraints = {}
+
+        # The edit variables, in the order they were added, and the
+        # number of edit variables when each edit session began.
+        self.edit_vars = []
+        self.edit_variable_stack = [0]
+
+        # Solvers that have been given values to resolve, and solvers
+        # that have changed since their stays were last reset.
+        self.suggested = set()
+        self.unsettled = set()
+
+        self._auto_solve = True
+
+    def __repr__(self):
+        return '<PartitionedSolver: %s components>' % len(self.solvers)
+
+    @property
+    def auto_solve(self):
+        return self._auto_solve
+
+    @auto_solve.setter
+    def auto_solve(self, auto_solve):
+        self._auto_solve = auto_solve
+        for solver in self.solvers.values():
+            solver.auto_solve = auto_solve
+
+    #######################################################################
+    # Components
+    #######################################################################
+
+    def find(self, node):
+        "The root of the component of node; a new node is a component of its own."
+        parent = self.parent
+        if node not in parent:
+            parent[node] = node
+            self.members[node] = [node]
+            return node
+        while parent[node] is not node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def solver_for(self, v):
+        "The solver of the component containing v, or None."
+        if v not in self.parent:
+            return None
+        return self.solvers.get(self.find(v))
+
+    def components(self):
+        "The solvers of the components."
+        return list(self.solvers.values())
+
+    def new_solver(self):
+        solver = SimplexSolver(backend=self.backend, pricing=self.pricing)
+        solver.auto_solve = self._auto_solve
+        return solver
+
+    def union(self, roots):
+        """Merge the components of roots; returns the root of the merged component.
+
+        The solvers of the smaller components are merged into the
+        solver of the component with the most constraints.
+        """
+        if len(roots) == 1:
+            root = roots[0]
+            if root not in self.solvers:
+                self.solvers[root] = self.new_solver()
+                self.constraints[root] = {}
+            return root
+
+        members = self.members
+        root = max(roots, key=lambda r: len(members[r]))
+        target = max(roots, key=lambda r: len(self.constraints.get(r, ())))
+        solver = self.solvers.pop(target, None) or self.new_solver()
+        constraints = self.constraints.pop(target, {})
+        for r in roots:
+            if r is not root:
+                self.parent[r] = root
+                members[root].extend(members.pop(r))
+            if r is not target:
+                source = self.solvers.pop(r, None)
+                moved = self.constraints.pop(r, None)
+                if moved:
+                    solver.merge(source)
+                    constraints.update(moved)
+                for solvers in (self.suggested, self.unsettled):
+                    if source in solvers:
+                        solvers.remove(source)
+                        solvers.add(solver)
+        self.solvers[root] = solver
+        self.constraints[root] = constraints
+        return root
+
+    def split(self, root):
+        """Split a component into its connected parts.
+
+        A solver can't forget a variable once it has been in its tableau,
+        so each part is given a new solver, and the component's solver is
+        discarded. Variables that are no longer in any constraint leave
+        the partition. A component that is still connected is left as it
+        is.
+        """
+        constraints = self.constraints[root]
+        adjacent = self.adjacent
+        parts = []
+        part_of = {}
+        seen = set()
+        for start in self.members[root]:
+            if start in seen or start not in adjacent:
+                continue
+            seen.add(start)
+            nodes = [start]
+            stack = [start]
+            while stack:
+                for cn in adjacent[stack.pop()]:
+                    if cn not in part_of:
+                        part_of[cn] = len(parts)
+                        for node in constraint_nodes(cn):
+                            if node not in seen:
+                                seen.add(node)
+                                nodes.append(node)
+                                stack.append(node)
+            parts.append(nodes)
+
+        if len(parts) == 1:
+            return
+
+        for node in self.members.pop(root):
+            del self.parent[node]
+        solver = self.solvers.pop(root)
+        del self.constraints[root]
+        self.suggested.discard(solver)
+        self.unsettled.discard(solver)
+
+        # Constraints are kept in the order they were added.
+        ordered = [[] for nodes in parts]
+        for cn in constraints:
+            ordered[part_of[cn]].append(cn)
+
+        held = self.held(constraints, solver)
+        for nodes, part in zip(parts, ordered):
+            new_root = nodes[0]
+            for node in nodes:
+                self.parent[node] = new_root
+            self.members[new_root] = nodes
+            self.solvers[new_root] = self.new_solver()
+            self.constraints[new_root] = dict((cn, True) for cn in part)
+            self.add_held(part, held, self.solvers[new_root])
+            self.unsettled.add(self.solvers[new_root])
+
+    def connected(self, nodes):
+        "Whether nodes are still connected to each other by constraints."
+        adjacent = self.adjacent
+        if nodes[0] not in adjacent:
+            return False
+        targets = set(nodes[1:])
+        seen = set(nodes[:1])
+        stack = nodes[:1]
+        while stack:
+            for cn in adjacent[stack.pop()]:
+                for node in constraint_nodes(cn):
+                    if node not in seen:
+                        seen.add(node)
+                        stack.append(node)
+                        targets.discard(node)
+                        if not targets:
+                            return True
+        return not targets
+
+    def held(self, constraints, source):
+        """The values the stays and edits among constraints hold their variables to in source.
+
+        Returns a dictionary of ``(value, persistent)`` pairs, by constraint.
+        """
+        rows = source.rows
+
+        def value(v):
+            expr = rows.get(v)
+            return 0.0 if expr is None else expr.constant
+
+        held = {}
+        for cn in constraints:
+            if cn.is_stay_constraint and cn in source.stay_error_vars:
+                eplus, eminus = source.stay_error_vars[cn]
+                held[cn] = (value(cn.variable) + value(eplus) - value(eminus), False)
+            elif cn.is_edit_constraint:
+                cei = source.edit_var_map[cn.variable]
+                held[cn] = (cei.prev_edit_constant, cei.persistent)
+        return held
+
+    def add_held(self, constraints, held, target):
+        "Add constraints to the solver target, with the values from held()."
+        with target.batch():
+            for cn in constraints:
+                if cn in held:
+                    cn.expression.constant, persistent = held[cn]
+                target.add_constraint(cn)
+                if cn.is_edit_constraint and persistent:
+                    target.edit_var_map[cn.variable].persistent = True
+
+    #######################################################################
+    # Constraints
+    #######################################################################
+
+    def add_constraint(self, cn, strength=None, weight=None):
+        cn = with_strength(cn, strength, weight)
+
+        roots = []
+        for node in constraint_nodes(cn):
+            root = self.find(node)
+            if not any(r is root for r in roots):
+                roots.append(root)
+        root = self.union(roots)
+        try:
+            self.solvers[root].add_constraint(cn)
+        except RequiredFailure:
+            # Undo the union: the components cn would have joined are
+            # still separate, and a new component is dropped.
+            if len(roots) > 1 or not self.constraints[root]:
+                self.split(root)
+            raise
+        self.unsettled.add(self.solvers[root])
+        self.constraints[root][cn] = True
+        for node in constraint_nodes(cn):
+            self.adjacent.setdefault(node, {})[cn] = True
+        if cn.is_edit_constraint:
+            self.edit_vars.append(cn.variable)
+        return cn
+
+    def remove_constraint(self, cn):
+        nodes = constraint_nodes(cn)
+        if nodes[0] not in self.parent:
+            raise ConstraintNotFound()
+        root = self.find(nodes[0])
+        constraints = self.constraints.get(root)
+        if not constraints or cn not in constraints:
+            raise ConstraintNotFound()
+
+        # SimplexSolver.remove_constraint() resets every stay first.
+        self.settle()
+        self.solvers[root].remove_constraint(cn)
+        self.unsettled.add(self.solvers[root])
+        self.forget(cn, constraints)
+
+        # Only a constraint joining several variables can disconnect the
+        # component; otherwise it is dropped once it is empty.
+        if not constraints or (len(nodes) > 1 and not self.connected(nodes)):
+            self.split(root)
+
+    def forget(self, cn, constraints):
+        "Remove cn from constraints, those of its component, from the adjacency of its nodes, and from the edit variables."
+        del constraints[cn]
+        for node in constraint_nodes(cn):
+            on_node = self.adjacent[node]
+            del on_node[cn]
+            if not on_node:
+                del self.adjacent[node]
+        if cn.is_edit_constraint:
+            index = index_of(self.edit_vars, cn.variable)
+            del self.edit_vars[index]
+            self.edit_variable_stack = renumber(self.edit_variable_stack, [index])
+
+    def add_stay(self, v, strength=WEAK, weight=1.0):
+        return self.add_constraint(StayConstraint(v, strength, weight))
+
+    def remove_stays(self, variables):
+        "Remove every stay on each of the variables. Returns the list of stays that were removed."
+        # The stays of every component are reset, as for
+        # remove_constraint(); each solver then removes all of its stays
+        # at once.
+        self.settle()
+        by_root = {}
+        roots = []
+        for v in variables:
+            if v in self.parent:
+                root = self.find(v)
+                if root not in by_root:
+                    by_root[root] = []
+                    roots.append(root)
+                by_root[root].append(v)
+
+        removed = []
+        for root in roots:
+            solver = self.solvers[root]
+            self.unsettled.add(solver)
+            for cn in solver.remove_stays(by_root[root]):
+                self.forget(cn, self.constraints[root])
+                removed.append(cn)
+            if not self.constraints[root]:
+                self.split(root)
+        return removed
+
+    def batch(self):
+        return SolverBatchContext(self)
+
+    def solve(self):
+        for solver in self.components():
+            solver.solve()
+
+    #######################################################################
+    # Editing
+    #######################################################################
+
+    def add_edit_var(self, v, strength=STRONG, persistent=False):
+        "Add an edit constraint on v. See SimplexSolver.add_edit_var()."
+        solver = self.solver_for(v)
+        if solver is not None and v in solver.edit_var_map:
+            return solver.add_edit_var(v, strength, persistent)
+        cn = self.add_constraint(EditConstraint(v, strength))
+        if persistent:
+            self.solver_for(v).edit_var_map[v].persistent = True
+        return cn
+
+    def remove_edit_var(self, v):
+        self.remove_constraint(self.solver_for(v).edit_var_map[v].constraint)
+
+    def edit(self):
+        return SolverEditContext(self)
+
+    def edit_solvers(self):
+        "The solvers of the components with edit variables."
+        return set(self.solver_for(v) for v in self.edit_vars)
+
+    def begin_edit(self):
+        assert len(self.edit_vars) > 0
+        for solver in self.edit_solvers():
+            solver.infeasible_rows.clear()
+        self.settle()
+        self.edit_variable_stack.append(len(self.edit_vars))
+
+    def end_edit(self):
+        assert len(self.edit_vars) > 0
+        self.suggested.update(self.edit_solvers())
+        self.resolve()
+        self.edit_variable_stack.pop()
+        for v in self.edit_vars[self.edit_variable_stack[-1]:]:
+            if not self.solver_for(v).edit_var_map[v].persistent:
+                self.remove_edit_var(v)
+
+    def is_edit_var(self, v):
+        "Whether v is an edit variable of its component."
+        solver = self.solver_for(v)
+        return solver is not None and v in solver.edit_var_map
+
+    def suggest_value(self, v, x):
+        if not self.is_edit_var(v):
+            raise InternalError("suggestValue for variable %s, but var is not an edit variable" % v)
+        solver = self.solver_for(v)
+        solver.suggest_value(v, x)
+        self.suggested.add(solver)
+
+    def suggest_values(self, variables, values=None):
+        "Suggest new values for several edit variables, and resolve. See SimplexSolver.suggest_values()."
+        for v, x in suggestions(variables, values, self.is_edit_var):
+            self.suggest_value(v, x)
+        self.resolve()
+
+    def resolve(self):
+        "Resolve the components that have been given new values."
+        suggested = self.suggested
+        self.suggested = set()
+        for solver in suggested:
+            solver.resolve()
+        self.settle()
+
+    def settle(self):
+        "Reset the stays of the components that have changed, as SimplexSolver.resolve() resets every stay."
+        unsettled = self.unsettled
+        self.unsettled = set()
+        for solver in unsettled:
+            solver.reset_stay_constants()
@@ -0,0 +1,219 @@
+from __future__ import print_function, unicode_literals, absolute_import, division
+
+import copy
+from heapq import heappop, heappush
+
+from .utils import approx_equal, EPSILON
+
+###########################################################################
+# Pricing strategies
+#
+# A pricing strategy chooses the entering variable for each pivot of the
+# primal simplex (SimplexSolver.optimize). A strategy holds state for a
+# single solver, so each solver needs its own instance.
+###########################################################################
+
+
+def lowest_ordinal(z_row):
+    "The first candidate entering variable of a row, in creation order."
+    entry_var = None
+    for v, c in z_row.terms.items():
+        if v.is_pivotable and c < -EPSILON and (entry_var is None or v.ordinal < entry_var.ordinal):
+            entry_var = v
+    return entry_var
+
+
+class PricingStrategy(object):
+    """The base class for pricing strategies.
+
+    ``pivots`` counts the primal pivots made under the strategy. Strategies
+    other than Bland's rule can cycle on a degenerate system, so after
+    ``degenerate_limit`` consecutive degenerate pivots they fall back to
+    Bland's rule until the objective improves again.
+    """
+    degenerate_limit = 50
+
+    def __init__(self):
+        self.pivots = 0
+        self.degenerate_pivots = 0
+
+    def __repr__(self):
+        return '<%s pivots=%s>' % (self.__class__.__name__, self.pivots)
+
+    def copy(self):
+        "A copy of the strategy, for a fork of the solver."
+        return copy.copy(self)
+
+    def start(self, solver, z_var):
+        "Called when optimization of the row ``z_var`` begins."
+        self.degenerate_pivots = 0
+
+    def note_objective_terms(self, solver, variables):
+        "Called when the objective coefficients of some variables may have changed."
+        pass
+
+    def entering_variable(self, solver, z_var):
+        "The variable to enter the basis, or None if the row ``z_var`` is optimal."
+        if self.degenerate_pivots >= self.degenerate_limit:
+            return lowest_ordinal(solver.rows[z_var])
+        return self.choose(solver, z_var)
+
+    def choose(self, solver, z_var):
+        raise NotImplementedError()
+
+    def note_pivot(self, solver, z_var, entry_var, exit_var, ratio):
+        "Called before ``entry_var`` replaces ``exit_var`` in the basis."
+        self.pivots = self.pivots + 1
+        if approx_equal(ratio, 0.0):
+            self.degenerate_pivots = self.degenerate_pivots + 1
+        else:
+            self.degenerate_pivots = 0
+
+
+class BlandPricing(PricingStrategy):
+    """Bland's rule: the candidate that was created first.
+
+    Never cycles. Candidates for the main objective are kept in a heap
+    ordered by ordinal, which the solver updates whenever the objective row
+    changes; entries are checked lazily, when they reach the top of the heap.
+    Other objectives (used while adding artificial variables) are
+    short-lived, and are scanned.
+    """
+    def __init__(self):
+        super(BlandPricing, self).__init__()
+        self.heap = []
+        self.candidates = set()
+
+    def copy(self):
+        strategy = super(BlandPricing, self).copy()
+        strategy.heap = list(self.heap)
+        strategy.candidates = set(self.candidates)
+        return strategy
+
+    def note_objective_terms(self, solver, variables):
+        z_row = solver.rows[solver.objective]
+        for v in variables:
+            if v.is_pivotable and v not in self.candidates and z_row.coefficient_for(v) < -EPSILON:
+                self.candidates.add(v)
+                heappush(self.heap, (v.ordinal, v))
+
+    def entering_variable(self, solver, z_var):
+        if z_var is not solver.objective:
+            return lowest_ordinal(solver.rows[z_var])
+
+        z_row = solver.rows[z_var]
+        heap = self.heap
+        while heap:
+            v = heap[0][1]
+            if z_row.coefficient_for(v) < -EPSILON:
+                return v
+            heappop(heap)
+            self.candidates.discard(v)
+
+        # The system is optimal. Release the memory used by the index,
+        # which doesn't shrink as entries are removed.
+        self.heap = []
+        self.candidates = set()
+        return None
+
+
+class DantzigPricing(PricingStrategy):
+    "Dantzig's rule: the candidate with the most negative objective coefficient."
+    def choose(self, solver, z_var):
+        entry_var = None
+        best = -EPSILON
+        for v, c in solver.rows[z_var].terms.items():
+            if v.is_pivotable and (c < best or (c == best and entry_var is not None and v.ordinal < entry_var.ordinal)):
+                entry_var = v
+                best = c
+        return entry_var
+
+
+class PartialPricing(PricingStrategy):
+    """Dantzig's rule, applied to the first ``size`` candidates found.
+
+    Avoids scanning the whole objective row when it is long.
+    """
+    def __init__(self, size=8):
+        super(PartialPricing, self).__init__()
+        self.size = size
+
+    def choose(self, solver, z_var):
+        entry_var = None
+        best = -EPSILON
+        found = 0
+        for v, c in solver.rows[z_var].terms.items():
+            if v.is_pivotable and c < -EPSILON:
+                if c < best:
+                    entry_var = v
+                    best = c
+                found = found + 1
+                if found == self.size:
+                    break
+        return entry_var
+
+
+class DevexPricing(PricingStrategy):
+    """An approximate steepest-edge rule (devex).
+
+    Chooses the candidate that maximizes ``c ** 2 / w``, where ``c`` is the
+    objective coefficient and ``w`` a reference weight approximating the
+    squared length of the variable's edge. The weights are updated from the
+    pivot row, and reset each time optimization begins.
+    """
+    def __init__(self):
+        super(DevexPricing, self).__init__()
+        self.weights = {}
+
+    def copy(self):
+        strategy = super(DevexPricing, self).copy()
+        strategy.weights = dict(self.weights)
+        return strategy
+
+    def start(self, solver, z_var):
+        super(DevexPricing, self).start(solver, z_var)
+        self.weights = {}
+
+    def choose(self, solver, z_var):
+        weights = self.weights
+        entry_var = None
+        best = 0.0
+        for v, c in solver.rows[z_var].terms.items():
+            if v.is_pivotable and c < -EPSILON:
+                score = c * c / weights.get(v, 1.0)
+                if entry_var is None or score > best or (score == best and v.ordinal < entry_var.ordinal):
+                    entry_var = v
+                    best = score
+        return entry_var
+
+    def note_pivot(self, solver, z_var, entry_var, exit_var, ratio):
+        super(DevexPricing, self).note_pivot(solver, z_var, entry_var, exit_var, ratio)
+        weights = self.weights
+        row = solver.rows[exit_var]
+        alpha = row.coefficient_for(entry_var)
+        w = weights.pop(entry_var, 1.0)
+        for v, c in row.terms.items():
+            if v is not entry_var:
+                r = c / alpha
+                weights[v] = max(weights.get(v, 1.0), r * r * w)
+        weights[exit_var] = max(w / (alpha * alpha), 1.0)
+
+
+PRICING = {
+    'bland': BlandPricing,
+    'dantzig': DantzigPricing,
+    'partial': PartialPricing,
+    'devex': DevexPricing,
+}
+
+
+def pricing_strategy(pricing):
+    "Return a pricing strategy, given a strategy, a name from PRICING, or None."
+    if pricing is None:
+        return BlandPricing()
+    if isinstance(pricing, PricingStrategy):
+        return pricing
+    try:
+        return PRICING[pricing]()
+    except (KeyError, TypeError):
+        raise ValueError('Unknown pricing strategy %r' % (pricing,))
@@ -1,10 +1,14 @@
 from __future__ import print_function, unicode_literals, absolute_import, division
 
+import itertools
+
 from .edit_info import EditInfo
 from .error import RequiredFailure, ConstraintNotFound, InternalError
-from .expression import Expression, StayConstraint, EditConstraint, ObjectiveVariable, SlackVariable, DummyVariable
+from .expression import Expression, Constraint, StayConstraint, EditConstraint, ObjectiveVariable, SlackVariable, DummyVariable
+from .dense_tableau import DenseTableau
+from .pricing import pricing_strategy
 from .tableau import Tableau
-from .utils import approx_equal, EPSILON, STRONG, WEAK
+from .utils import approx_equal, as_list, renumber, suggestions, with_strength, EPSILON, REQUIRED, STRONG, WEAK
 
 
 class SolverEditContext(object):
@@ -18,17 +22,60 @@ class SolverEditContext(object):
         self.solver.end_edit()
 
 
+class SolverBatchContext(object):
+    def __init__(self, solver):
+        self.solver = solver
+        self.auto_solve = None
+
+    def __enter__(self):
+        self.auto_solve = self.solver.auto_solve
+        self.solver.auto_solve = False
+        return self.solver
+
+    def __exit__(self, type, value, tb):
+        # Nested batches restore False, so only the outermost batch solves.
+        # If an exception escaped, the flag is restored but the system is
+        # left unsolved; solve() can be used to recover.
+        self.solver.auto_solve = self.auto_solve
+        if type is None and self.solver.auto_solve:
+            self.solver.solve()
+
+
 class SimplexSolver(Tableau):
-    def __init__(self):
+    def __new__(cls, backend=None, pricing=None):
+        # The tableau storage is provided by a mixin; SimplexSolver(backend=...)
+        # constructs the solver class for the requested storage.
+        if backend is not None and cls is SimplexSolver:
+            try:
+                cls = BACKENDS[backend]
+            except KeyError:
+                raise ValueError('Unknown tableau backend %r' % backend)
+        return super(SimplexSolver, cls).__new__(cls)
+
+    def __init__(self, backend=None, pricing=None):
         super(SimplexSolver, self).__init__()
 
-        self.stay_error_vars = []
+        # The (plus, minus) error variables of each non-required stay, and
+        # the stays on each variable, indexed so stays can be removed in
+        # constant time.
+        self.stay_error_vars = {}
+        self.stay_constraints = {}
 
         self.error_vars = {}
         self.marker_vars = {}
 
+        # The constraints on each variable, as the keys of a dictionary,
+        # so that they can be found, and removed, without scanning every
+        # constraint; and the variables of each constraint when it was
+        # added, since its expression can be changed afterwards.
+        self.variable_constraints = {}
+        self.constraint_variables = {}
+
         self.objective = ObjectiveVariable('Z')
         self.edit_var_map = {}
+        # The indices of the edit variables removed during a bulk
+        # removal; they are renumbered once it is done. None otherwise.
+        self.removed_edit_indices = None
 
         self.slack_counter = 0
         self.artificial_counter = 0
@@ -37,10 +84,31 @@ class SimplexSolver(Tableau):
         self.needs_solving = False
 
         self.optimize_count = 0
+        self.dual_pivot_count = 0
+
+        # Chooses the entering variable for each pivot of optimize().
+        self.pricing = pricing_strategy(pricing)
+
+        # Callbacks for changes in the values of variables. Changes
+        # smaller than change_tolerance are not reported.
+        self.observers = {}
+        self.change_listeners = []
+        self.change_tolerance = EPSILON
 
-        self.rows[self.objective] = Expression()
+        # The values of external variables, in a fork of another solver;
+        # None if the solver writes Variable.value.
+        self.values = None
+
+        self.add_row(self.objective, Expression())
         self.edit_variable_stack = [0]
 
+    def __getattr__(self, name):
+        # Only called for attributes that aren't found. A solver that has
+        # been merged into another has none left.
+        if self.__dict__.get('merged'):
+            raise ValueError('Cannot use a solver that has been merged into another')
+        raise AttributeError(name)
+
     def __repr__(self):
         parts = []
         parts.append('stay_error_vars: %s' % self.stay_error_vars)
@@ -49,12 +117,14 @@ class SimplexSolver(Tableau):
 
 
     def add_constraint(self, cn, strength=None, weight=None):
-        if strength or weight:
+        cn = with_strength(cn, strength, weight)
+
+        if self.values is not None and (cn.is_stay_constraint or cn.is_edit_constraint):
+            # Stay and edit constraints hold the value of their variable
+            # when they were created; a fork uses its own value, in a copy
+            # of the constraint, so the caller's is left as it is.
             cn = cn.clone()
-            if strength:
-                cn.strength = strength
-            if weight:
-                cn.weight = weight
+            cn.expression.constant = self.value_for(cn.variable)
 
         # print('add_constraint', cn)
         expr, eplus, eminus, prev_edit_constant = self.new_expression(cn)
@@ -68,6 +138,14 @@ class SimplexSolver(Tableau):
             i = len(self.edit_var_map)
 
             self.edit_var_map[cn.variable] = EditInfo(cn, eplus, eminus, prev_edit_constant, i)
+        elif cn.is_stay_constraint:
+            self.stay_constraints.setdefault(cn.variable, []).append(cn)
+
+        variables = tuple(cn.expression.terms)
+        self.constraint_variables[cn] = variables
+        variable_constraints = self.variable_constraints
+        for v in variables:
+            variable_constraints.setdefault(v, {})[cn] = True
 
         if self.auto_solve:
             self.optimize(self.objective)
@@ -75,9 +153,64 @@ class SimplexSolver(Tableau):
 
         return cn
 
-    def add_edit_var(self, v, strength=STRONG):
+    def add_constraints_from_matrix(self, variables, indptr, indices, data, operators, rhs, strengths=None, weights=None):
+        """Add a system of linear constraints described by a sparse matrix.
+
+        The left hand sides are given in compressed sparse row (CSR) form:
+        row ``i`` is the sum of ``data[k] * variables[indices[k]]`` for ``k``
+        in ``range(indptr[i], indptr[i + 1])``. Row ``i`` is then constrained
+        by ``operators[i]`` (Constraint.LEQ, EQ or GEQ) against ``rhs[i]``,
+        with strength ``strengths[i]`` and weight ``weights[i]`` (REQUIRED
+        and 1.0 if omitted).
+
+        Any of the arguments may be sequences or NumPy arrays. The system is
+        optimized once, after every row has been added. Returns the list of
+        constraints that were added, in row order.
+        """
+        variables = as_list(variables)
+        indptr = as_list(indptr)
+        indices = as_list(indices)
+        data = as_list(data)
+        operators = as_list(operators)
+        rhs = as_list(rhs)
+        n_rows = len(indptr) - 1
+        strengths = [REQUIRED] * n_rows if strengths is None else as_list(strengths)
+        weights = [1.0] * n_rows if weights is None else as_list(weights)
+        if not (len(operators) == len(rhs) == len(strengths) == len(weights) == n_rows):
+            raise ValueError('add_constraints_from_matrix() requires one operator, rhs, strength and weight per row')
+
+        constraints = []
+        with self.batch():
+            for i in range(n_rows):
+                start = indptr[i]
+                end = indptr[i + 1]
+                cn = Constraint.from_arrays(
+                    [variables[j] for j in indices[start:end]], data[start:end],
+                    operators[i], rhs[i], strengths[i], weights[i]
+                )
+                constraints.append(self.add_constraint(cn))
+
+        return constraints
+
+    def add_edit_var(self, v, strength=STRONG, persistent=False):
+        """Add an edit constraint on v.
+
+        A persistent edit variable is not removed when an edit session
+        ends; it stays registered, and can be given new values with
+        suggest_value() and resolve() at any time, until it is removed
+        with remove_edit_var().
+
+        If v is already an edit variable, its existing edit constraint
+        is returned, and made persistent if persistent is true.
+        """
         # print("add_edit_var", v, strength)
-        return self.add_constraint(EditConstraint(v, strength))
+        cei = self.edit_var_map.get(v)
+        if cei is None:
+            cn = self.add_constraint(EditConstraint(v, strength))
+            cei = self.edit_var_map[v]
+        if persistent:
+            cei.persistent = True
+        return cei.constraint
 
     def remove_edit_var(self, v):
         self.remove_constraint(self.edit_var_map[v].constraint)
@@ -85,6 +218,183 @@ class SimplexSolver(Tableau):
     def edit(self):
         return SolverEditContext(self)
 
+    def batch(self):
+        return SolverBatchContext(self)
+
+    def fork(self):
+        """Return an independent copy of the solver.
+
+        The fork shares the rows of the tableau with this solver until
+        either of them changes a row. It keeps its own values for the
+        variables, so constraints can be added to it, and values
+        suggested and resolved, without changing this solver or the
+        value of any Variable; use value_for() to read them. Observers
+        are not copied.
+        """
+        solver = super(SimplexSolver, self).fork()
+        solver.stay_error_vars = dict(self.stay_error_vars)
+        solver.stay_constraints = dict((v, list(stays)) for v, stays in self.stay_constraints.items())
+        solver.error_vars = dict((key, set(e_vars)) for key, e_vars in self.error_vars.items())
+        solver.marker_vars = dict(self.marker_vars)
+        solver.variable_constraints = dict((v, dict(cns)) for v, cns in self.variable_constraints.items())
+        solver.constraint_variables = dict(self.constraint_variables)
+        solver.edit_var_map = dict((v, cei.copy()) for v, cei in self.edit_var_map.items())
+        solver.edit_variable_stack = list(self.edit_variable_stack)
+        solver.pricing = self.pricing.copy()
+        solver.observers = {}
+        solver.change_listeners = []
+
+        values = {} if self.values is None else dict(self.values)
+        for v in itertools.chain(self.rows, self.columns):
+            if v.is_external and v not in values:
+                values[v] = v.value
+        solver.values = values
+
+        # optimize() holds on to the objective row across pivots, so it
+        # is never shared; it changes with almost every operation anyway.
+        self.writable_row(self.objective)
+        solver.writable_row(solver.objective)
+        return solver
+
+    def merge(self, other):
+        """Add the system of another solver to this one, without re-adding its constraints.
+
+        The two systems must not share any variables or constraints, so
+        the merged tableau is the block-diagonal union of the two: the
+        rows of ``other`` are added as they are, and its objective is
+        added to this solver's. The slack and dummy variables of
+        ``other`` are renumbered to follow this solver's, and its edit
+        variables are added after this solver's. No pivoting is needed,
+        unless ``other`` had unsolved changes.
+
+        The rows and variables of ``other`` are taken over, so ``other``
+        can't be used afterwards; using it raises ValueError. Its
+        observers are not kept. ``other`` must not be in an edit
+        session.
+        """
+        if other is self:
+            raise ValueError('Cannot merge a solver with itself')
+        if len(other.edit_variable_stack) > 1:
+            raise ValueError('Cannot merge a solver during an edit session')
+        for v in itertools.chain(other.rows, other.columns):
+            if v.is_external and (v in self.rows or v in self.columns):
+                raise ValueError('Cannot merge solvers that share the variable %s' % v)
+        for cn in other.marker_vars:
+            if cn in self.marker_vars:
+                raise ValueError('Cannot merge solvers that share the constraint %s' % cn)
+
+        # Renumber the internal variables of other.
+        internal = set(v for v in itertools.chain(other.rows, other.columns) if not v.is_external)
+        internal.update(other.marker_vars.values())
+        for e_vars in other.error_vars.values():
+            internal.update(e_vars)
+        for v in internal:
+            if isinstance(v, SlackVariable):
+                v.number = v.number + self.slack_counter
+            elif v.is_dummy:
+                v.number = v.number + self.dummy_counter
+        self.slack_counter = self.slack_counter + other.slack_counter
+        self.dummy_counter = self.dummy_counter + other.dummy_counter
+        self.artificial_counter = self.artificial_counter + other.artificial_counter
+
+        # The stay error variables must be known before the rows are
+        # added, so that the backends can mark stay rows.
+        self.stay_error_vars.update(other.stay_error_vars)
+        self.stay_vars.update(other.stay_vars)
+        for v, stays in other.stay_constraints.items():
+            self.stay_constraints[v] = list(stays)
+
+        for v, expr in other.rows.items():
+            if v is other.objective:
+                continue
+            if not isinstance(expr, Expression) or v in other.shared_rows:
+                # A row of another backend, or one shared with a fork.
+                row = Expression(constant=expr.constant)
+                row.terms = dict(expr.terms.items())
+                expr = row
+            self.add_row(v, expr)
+        for v in other.columns:
+            if v not in self.columns:
+                # A column that no row refers to any more.
+                self.note_added_variable(v, self.objective)
+                self.note_removed_variable(v, self.objective)
+
+        z_row = self.writable_row(self.objective)
+        other_z_row = other.rows[other.objective]
+        z_row.constant = z_row.constant + other_z_row.constant
+        for v, c in other_z_row.terms.items():
+            z_row.set_variable(v, c)
+            self.note_added_variable(v, self.objective)
+        self.note_objective_terms(other_z_row.terms)
+
+        self.marker_vars.update(other.marker_vars)
+        self.error_vars.update(other.error_vars)
+        self.variable_constraints.update(other.variable_constraints)
+        self.constraint_variables.update(other.constraint_variables)
+        n_edits = len(self.edit_var_map)
+        for v, cei in other.edit_var_map.items():
+            cei.index = cei.index + n_edits
+            self.edit_var_map[v] = cei
+
+        self.external_rows.update(other.external_rows)
+        self.external_parametric_vars.update(other.external_parametric_vars)
+        self.changed_external_vars.update(other.changed_external_vars)
+        self.changed_stay_vars.update(other.changed_stay_vars)
+        for v in other.infeasible_rows:
+            self.infeasible_rows.add(v)
+
+        if other.values is not None or self.values is not None:
+            for v in itertools.chain(other.rows, other.columns):
+                if v.is_external:
+                    if self.values is None:
+                        v.value = other.value_for(v)
+                    else:
+                        self.values[v] = other.value_for(v)
+
+        needs_solving = other.needs_solving
+        # The rows and variables of other now belong to this solver.
+        other.__dict__.clear()
+        other.merged = True
+
+        if needs_solving:
+            self.needs_solving = True
+            if self.auto_solve:
+                self.solve()
+
+    def constraints_for(self, v):
+        "The constraints in the solver that refer to the variable v."
+        return list(self.variable_constraints.get(v, ()))
+
+    def variables_for(self, cn):
+        "The variables the constraint cn referred to when it was added."
+        try:
+            return list(self.constraint_variables[cn])
+        except KeyError:
+            raise ConstraintNotFound()
+
+    def value_for(self, v):
+        "The value of v in this solver: v.value, or a fork's own value."
+        if self.values is None:
+            return v.value
+        return self.values.get(v, v.value)
+
+    def add_observer(self, v, callback):
+        "Call callback(v, old, new) whenever solving changes the value of v."
+        self.observers.setdefault(v, []).append(callback)
+
+    def remove_observer(self, v, callback):
+        callbacks = self.observers[v]
+        callbacks.remove(callback)
+        if not callbacks:
+            del self.observers[v]
+
+    def add_change_listener(self, callback):
+        "Call callback(changes) after each solve, with a list of (variable, old, new)."
+        self.change_listeners.append(callback)
+
+    def remove_change_listener(self, callback):
+        self.change_listeners.remove(callback)
+
     def resolve(self):
         self.dual_optimize()
         self.set_external_variables()
@@ -125,6 +435,7 @@ class SimplexSolver(Tableau):
                 z_row.set_variable(eminus, cn.strength * cn.weight)
                 self.insert_error_var(cn, eminus)
                 self.note_added_variable(eminus, self.objective)
+                self.note_objective_terms([eminus])
         else:
             if cn.is_required:
                 # print("Equality, required")
@@ -155,12 +466,15 @@ class SimplexSolver(Tableau):
                 self.note_added_variable(eplus, self.objective)
                 z_row.set_variable(eminus, sw_coeff)
                 self.note_added_variable(eminus, self.objective)
+                self.note_objective_terms([eplus, eminus])
 
                 self.insert_error_var(cn, eminus)
                 self.insert_error_var(cn, eplus)
 
                 if cn.is_stay_constraint:
-                    self.stay_error_vars.append((eplus, eminus))
+                    self.stay_error_vars[cn] = (eplus, eminus)
+                    self.stay_vars.add(eplus)
+                    self.stay_vars.add(eminus)
                 elif cn.is_edit_constraint:
                     prev_edit_constant = cn.expression.constant
 
@@ -182,26 +496,65 @@ class SimplexSolver(Tableau):
         self.remove_edit_vars_to(self.edit_variable_stack[-1])
 
     def remove_all_edit_vars(self):
-        self.remove_edit_vars_to(0)
+        "Remove every edit variable, including persistent ones."
+        self.remove_edit_vars(list(self.edit_var_map))
 
     def remove_edit_vars_to(self, n):
-        try:
-            removals = []
-            for v, cei in self.edit_var_map.items():
-                if cei.index >= n:
-                    removals.append(v)
-
-            for v in removals:
-                self.remove_edit_var(v)
+        "Remove the edit variables with an index of n or more, except persistent ones."
+        removals = []
+        for v, cei in self.edit_var_map.items():
+            if cei.index >= n and not cei.persistent:
+                removals.append(v)
 
-            assert len(self.edit_var_map) == n
+        self.remove_edit_vars(removals)
 
+    def remove_edit_vars(self, variables):
+        "Remove several edit variables, renumbering the rest once at the end."
+        self.removed_edit_indices = []
+        try:
+            for v in variables:
+                self.remove_edit_var(v)
         except ConstraintNotFound:
             raise InternalError('Constraint not found during internal removal')
+        finally:
+            removed = self.removed_edit_indices
+            self.removed_edit_indices = None
+            self.renumber_edit_vars(removed)
+
+    def renumber_edit_vars(self, removed):
+        """Close the gaps left by removed edit variables.
+
+        The indices of the remaining edit variables, and the session
+        boundaries in the edit variable stack, are shifted down by the
+        number of removed indices below them.
+        """
+        if not removed:
+            return
+        removed = sorted(removed)
+        edits = list(self.edit_var_map.values())
+        for cei, index in zip(edits, renumber([cei.index for cei in edits], removed)):
+            cei.index = index
+        self.edit_variable_stack = renumber(self.edit_variable_stack, removed)
 
     def add_stay(self, v, strength=WEAK, weight=1.0):
         return self.add_constraint(StayConstraint(v, strength, weight))
 
+    def remove_stays(self, variables):
+        """Remove every stay on each of the variables.
+
+        The system is optimized once, after all the stays have been
+        removed. Returns the list of stays that were removed.
+        """
+        # remove_constraint() resets the stay constants before each
+        # removal; only the rows written since the last reset are visited.
+        removed = []
+        with self.batch():
+            for v in variables:
+                for cn in list(self.stay_constraints.get(v, ())):
+                    self.remove_constraint(cn)
+                    removed.append(cn)
+        return removed
+
     def remove_constraint(self, cn):
         # print("removeConstraint", cn)
         # print(self)
@@ -215,9 +568,11 @@ class SimplexSolver(Tableau):
             for cv in e_vars:
                 try:
                     z_row.add_expression(self.rows[cv], -cn.weight * cn.strength, self.objective, self)
+                    self.note_objective_terms(self.rows[cv].terms)
                     # print('add expression', self.rows[cv])
                 except KeyError:
                     z_row.add_variable(cv, -cn.weight * cn.strength, self.objective, self)
+                    self.note_objective_terms([cv])
                     # print('add variable', cv)
 
         try:
@@ -225,6 +580,13 @@ class SimplexSolver(Tableau):
         except KeyError:
             raise ConstraintNotFound()
 
+        variable_constraints = self.variable_constraints
+        for v in self.constraint_variables.pop(cn):
+            on_variable = variable_constraints[v]
+            del on_variable[cn]
+            if not on_variable:
+                del variable_constraints[v]
+
         # print("Looking to remove var", marker)
         if not self.rows.get(marker):
             col = self.columns[marker]
@@ -285,33 +647,26 @@ class SimplexSolver(Tableau):
                     self.remove_column(v)
 
         if cn.is_stay_constraint:
-            if e_vars:
-                # for p_evar, m_evar in self.stay_error_vars:
-                remaining = []
-                while self.stay_error_vars:
-                    p_evar, m_evar = self.stay_error_vars.pop()
-                    found = False
-                    try:
-                        # print('stay constraint - remove plus evar', p_evar)
-                        e_vars.remove(p_evar)
-                        found = True
-                    except KeyError:
-                        pass
-                    try:
-                        # print('stay constraint - remove minus evar', m_evar)
-                        e_vars.remove(m_evar)
-                        found = True
-                    except KeyError:
-                        pass
-                    if not found:
-                        remaining.append((p_evar, m_evar))
-                self.stay_error_vars = remaining
+            for v in self.stay_error_vars.pop(cn, ()):
+                self.stay_vars.discard(v)
+                self.changed_stay_vars.discard(v)
+            stays = self.stay_constraints[cn.variable]
+            stays.remove(cn)
+            if not stays:
+                del self.stay_constraints[cn.variable]
 
         elif cn.is_edit_constraint:
             assert e_vars is not None
             # print('edit constraint - remove column', self.edit_var_map[cn.variable].edit_minus)
             self.remove_column(self.edit_var_map[cn.variable].edit_minus)
-            del self.edit_var_map[cn.variable]
+            index = self.edit_var_map.pop(cn.variable).index
+
+            # Keep the indices of the remaining edit variables (and the
+            # session boundaries) contiguous.
+            if self.removed_edit_indices is None:
+                self.renumber_edit_vars([index])
+            else:
+                self.removed_edit_indices.append(index)
 
         if e_vars:
             for e_var in e_vars:
@@ -338,21 +693,60 @@ class SimplexSolver(Tableau):
         cei.prev_edit_constant = x
         self.delta_edit_constant(delta, cei.edit_plus, cei.edit_minus)
 
+    def suggest_values(self, variables, values=None):
+        """Suggest new values for several edit variables, and resolve.
+
+        Either pass a dictionary mapping edit variables to values, or
+        parallel sequences (or NumPy arrays) of edit variables and values.
+        """
+        edit_var_map = self.edit_var_map
+        for v, x in suggestions(variables, values, edit_var_map.__contains__):
+            cei = edit_var_map[v]
+            delta = x - cei.prev_edit_constant
+            cei.prev_edit_constant = x
+            self.delta_edit_constant(delta, cei.edit_plus, cei.edit_minus)
+
+        self.resolve()
+
     def solve(self):
         if self.needs_solving:
             self.optimize(self.objective)
             self.set_external_variables()
 
     def set_edited_value(self, v, n):
-        if v not in self.columns or v not in self.rows:
-            v.value = n
+        self.set_edited_values({v: n})
+
+    def set_edited_values(self, mapping):
+        """Set the values of several variables with a single edit session.
+
+        The variables that aren't already edit variables are added
+        together, every value is suggested, and the system is resolved
+        once; then the edit variables that were added are removed.
+        Variables that aren't in the tableau are set directly.
+        """
+        edits = []
+        for v, n in mapping.items():
+            if v not in self.columns and v not in self.rows:
+                if self.values is None:
+                    v.value = n
+                else:
+                    self.values[v] = n
+            elif not approx_equal(n, self.value_for(v)):
+                edits.append((v, n))
 
-        if not approx_equal(n, v.value):
-            self.add_edit_var(v)
-            self.begin_edit()
+        if not edits:
+            return
 
-            self.suggest_value(v, n)
+        with self.batch():
+            for v, n in edits:
+                if v not in self.edit_var_map:
+                    self.add_edit_var(v)
 
+        self.begin_edit()
+        for v, n in edits:
+            self.suggest_value(v, n)
+        # The edit variables are removed with a single optimization pass.
+        with self.batch():
             self.end_edit()
 
     def add_var(self, v):
@@ -405,7 +799,10 @@ class SimplexSolver(Tableau):
 
         expr.new_subject(subject)
         if subject in self.columns:
+            objective_changed = self.objective in self.columns[subject]
             self.substitute_out(subject, expr)
+            if objective_changed:
+                self.note_objective_terms(expr.terms)
 
         self.add_row(subject, expr)
         # print("try_adding_directly returning: True")
@@ -465,14 +862,14 @@ class SimplexSolver(Tableau):
         return subject
 
     def delta_edit_constant(self, delta, plus_error_var, minus_error_var):
-        expr_plus = self.rows.get(plus_error_var)
+        expr_plus = self.writable_row(plus_error_var)
         if expr_plus is not None:
             expr_plus.constant = expr_plus.constant + delta
             if expr_plus.constant < 0.0:
                 self.infeasible_rows.add(plus_error_var)
             return
 
-        expr_minus = self.rows.get(minus_error_var)
+        expr_minus = self.writable_row(minus_error_var)
         if expr_minus is not None:
             expr_minus.constant = expr_minus.constant - delta
             if expr_minus.constant < 0:
@@ -481,11 +878,15 @@ class SimplexSolver(Tableau):
 
         try:
             for basic_var in self.columns[minus_error_var]:
-                expr = self.rows[basic_var]
+                expr = self.writable_row(basic_var)
                 c = expr.coefficient_for(minus_error_var)
                 expr.constant = expr.constant + (c * delta)
                 if basic_var.is_restricted and expr.constant < 0:
                     self.infeasible_rows.add(basic_var)
+                if basic_var in self.stay_vars:
+                    self.changed_stay_vars.add(basic_var)
+                if basic_var.is_external:
+                    self.changed_external_vars.add(basic_var)
         except KeyError:
             pass
 
@@ -497,16 +898,10 @@ class SimplexSolver(Tableau):
             expr = self.rows.get(exit_var)
             if expr:
                 if expr.constant < 0:
-                    ratio = float('inf')
-                    for v, cd in expr.terms.items():
-                        if cd > 0 and v.is_pivotable:
-                            zc = z_row.coefficient_for(v)
-                            r = zc / cd
-                            if r < ratio: # JS difference?
-                                entry_var = v
-                                ratio = r
-                    if ratio == float('inf'):
+                    entry_var = self.dual_entering_variable(z_row, expr)
+                    if entry_var is None:
                         raise InternalError("ratio == nil (MAX_VALUE) in dual_optimize")
+                    self.dual_pivot_count = self.dual_pivot_count + 1
                     self.pivot(entry_var, exit_var)
 
     def optimize(self, z_var):
@@ -517,6 +912,8 @@ class SimplexSolver(Tableau):
         z_row = self.rows[z_var]
         entry_var = None
         exit_var = None
+        pricing = self.pricing
+        pricing.start(self, z_var)
 
         # print(self.objective)
         # print(z_var)
@@ -524,46 +921,56 @@ class SimplexSolver(Tableau):
         # print(self.rows[z_var])
 
         while True:
-            objective_coeff = 0.0
-
-            # Not convinced the sort is correct here; but test suite
-            # doesn't pass reliably without it.
-            for v, c in sorted(z_row.terms.items(), key=lambda x: x[0].name):
-                # print('term check', v, v.is_pivotable, c)
-                if v.is_pivotable and c < objective_coeff:
-                    # print('candidate found')
-                    objective_coeff = c
-                    entry_var = v
-                    break;
+            entry_var = pricing.entering_variable(self, z_var)
 
-            if objective_coeff >= -EPSILON or entry_var is None:
+            if entry_var is None:
                 return
 
             # print('entry_var:', entry_var)
             # print("objective_coeff:", objective_coeff)
 
-            min_ratio = float('inf')
-            r = 0
-
-            for v in self.columns[entry_var]:
-                # print("checking", v)
-                if v.is_pivotable:
-                    expr = self.rows[v]
-                    coeff = expr.coefficient_for(entry_var)
-                    # print('pivotable, coeff =', coeff)
-                    if coeff < 0:
-                        r = -expr.constant / coeff
-                        if r < min_ratio:
-                            min_ratio = r
-                            exit_var = v
+            exit_var, min_ratio = self.exit_variable(entry_var)
 
             if min_ratio == float('inf'):
                 raise RequiredFailure('Objective function is unbounded')
 
+            pricing.note_pivot(self, z_var, entry_var, exit_var, min_ratio)
             self.pivot(entry_var, exit_var)
 
             # print(self)
 
+    def exit_variable(self, entry_var):
+        "The ratio test: the row that leaves the basis when entry_var enters, and its ratio."
+        exit_var = None
+        min_ratio = float('inf')
+        r = 0
+
+        for v in self.columns[entry_var]:
+            # print("checking", v)
+            if v.is_pivotable:
+                expr = self.rows[v]
+                coeff = expr.coefficient_for(entry_var)
+                # print('pivotable, coeff =', coeff)
+                if coeff < 0:
+                    r = -expr.constant / coeff
+                    if r < min_ratio:
+                        min_ratio = r
+                        exit_var = v
+        return exit_var, min_ratio
+
+    def dual_entering_variable(self, z_row, expr):
+        "The dual ratio test: the variable that enters the basis when the row expr leaves."
+        entry_var = None
+        ratio = float('inf')
+        for v, cd in expr.terms.items():
+            if cd > 0 and v.is_pivotable:
+                zc = z_row.coefficient_for(v)
+                r = zc / cd
+                if r < ratio: # JS difference?
+                    entry_var = v
+                    ratio = r
+        return entry_var
+
     def pivot(self, entry_var, exit_var):
         # print('pivot:',entry_var, exit_var)
         if entry_var is None:
@@ -573,33 +980,75 @@ class SimplexSolver(Tableau):
 
         p_expr = self.remove_row(exit_var)
         p_expr.change_subject(exit_var, entry_var)
+        objective_changed = self.objective in self.columns[entry_var]
         self.substitute_out(entry_var, p_expr)
+        if objective_changed:
+            self.note_objective_terms(p_expr.terms)
         self.add_row(entry_var, p_expr)
 
+    def note_objective_terms(self, variables):
+        """Record that the objective coefficients of some variables may have changed.
+
+        Every change to the objective row must be reported here, so that
+        the pricing strategy can keep track of entering variables without
+        scanning the row.
+        """
+        self.pricing.note_objective_terms(self, variables)
+
     def reset_stay_constants(self):
         # print("reset_stay_constants")
-        for p_var, m_var in self.stay_error_vars:
-            expr = self.rows.get(p_var)
-            if expr is None:
-                expr = self.rows.get(m_var)
-            if expr:
-                expr.constant = 0.0
+        # Only the rows written since the last reset can have a nonzero
+        # constant. The plus and minus error variables of a stay are
+        # never both basic, so each stay has at most one row to reset.
+        stay_vars = self.stay_vars
+        for v in self.changed_stay_vars:
+            if v in stay_vars:
+                expr = self.writable_row(v)
+                if expr is not None:
+                    expr.constant = 0.0
+        self.changed_stay_vars = set()
 
     def set_external_variables(self):
         # print("set_external_variables")
         # print(self)
-        for v in self.external_parametric_vars:
-            if self.rows.get(v):
-                # print("Variable %s in external_parametric_vars is basic" % v)
+        # Only variables whose row constant changed, or that entered or
+        # left the basis, since the last call need updating.
+        observed = self.observers or self.change_listeners
+        tolerance = self.change_tolerance
+        values = self.values
+        changes = []
+        for v in self.changed_external_vars:
+            expr = self.rows.get(v)
+            if expr is not None:
+                if v not in self.external_rows:
+                    continue
+                value = expr.constant
+            elif v in self.external_parametric_vars:
+                value = 0.0
+            else:
                 continue
-            v.value = 0.0
-
-        for v in self.external_rows:
-            expr = self.rows[v]
-            v.value = expr.constant
+            if values is None:
+                old = v.value
+                v.value = value
+            else:
+                old = values.get(v, v.value)
+                values[v] = value
+            if observed and abs(value - old) > tolerance:
+                changes.append((v, old, value))
+        self.changed_external_vars = set()
 
         self.needs_solving = False
 
+        if changes:
+            self.notify_changes(changes)
+
+    def notify_changes(self, changes):
+        for v, old, new in changes:
+            for callback in list(self.observers.get(v, ())):
+                callback(v, old, new)
+        for callback in list(self.change_listeners):
+            callback(changes)
+
     def insert_error_var(self, cn, var):
         # print('insert_error_var', cn, var)
         constraint_set = self.error_vars.get(var)
@@ -610,3 +1059,13 @@ class SimplexSolver(Tableau):
         constraint_set.add(var)
 
         self.error_vars.setdefault(var, set()).add(var)
+
+
+class DenseSimplexSolver(DenseTableau, SimplexSolver):
+    "A SimplexSolver that stores its tableau in a dense NumPy array."
+
+
+BACKENDS = {
+    'dict': SimplexSolver,
+    'dense': DenseSimplexSolver,
+}
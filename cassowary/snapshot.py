@@ -0,0 +1,427 @@
+from __future__ import print_function, unicode_literals, absolute_import, division
+
+from array import array
+import itertools
+
+from .dense_tableau import DenseTableau
+from .edit_info import EditInfo
+from .packing import as_strength, pack, unpack
+from .expression import (
+    AbstractConstraint, Constraint, DummyVariable, EditConstraint, Expression,
+    ObjectiveVariable, SlackVariable, StayConstraint, Variable
+)
+from .pricing import PRICING
+from .simplex_solver import BACKENDS, SimplexSolver
+from .tableau import INFEASIBILITY_RULES
+
+###########################################################################
+# Solver snapshots
+#
+# A snapshot records the tableau of a solver, and all its bookkeeping,
+# so that the solver can be rebuilt in another process without pivoting.
+#
+# The file is laid out by packing.pack(): a JSON header, holding the
+# names of the variables and the solver's counters, and flat arrays of
+# ids and coefficients. Variables and constraints are referred to by
+# their position in the snapshot's variable and constraint tables.
+# Columns aren't stored; they are rebuilt from rows.
+###########################################################################
+
+MAGIC = b'CASSOWARY-SNAPSHOT\n'
+VERSION = 1
+
+# Kinds of variable
+EXTERNAL, SLACK, DUMMY, OBJECTIVE = range(4)
+
+# Kinds of constraint
+EQUATION, INEQUALITY, STAY, EDIT = range(4)
+
+
+def dump(solver, f):
+    """Write a snapshot of ``solver`` to ``f``, a filename or binary file.
+
+    The external variables in the solver must have distinct names.
+    """
+    writer = SnapshotWriter(solver)
+    data = writer.write()
+    if hasattr(f, 'write'):
+        f.write(data)
+    else:
+        with open(f, 'wb') as out:
+            out.write(data)
+
+
+def load(f, variables=None):
+    """Rebuild a solver from a snapshot written by dump().
+
+    ``f`` is a filename or binary file. ``variables`` optionally maps names to the Variables to
+    use for the external variables of those names; any others are
+    created. The value of each variable is set from the snapshot.
+
+    Returns ``(solver, variables, constraints)``: the solver, a
+    dictionary mapping names to external variables, and the list of
+    constraints in the solver.
+    """
+    if hasattr(f, 'read'):
+        return SnapshotReader(f, variables).read()
+    with open(f, 'rb') as source:
+        return SnapshotReader(source, variables).read()
+
+
+def _key_for(table, value, default=None):
+    "The key of ``value`` in ``table``, compared by identity."
+    for key, candidate in table.items():
+        if candidate is value:
+            return key
+    return default
+
+
+class SnapshotWriter(object):
+    def __init__(self, solver):
+        self.solver = solver
+        self.arrays = []
+
+    def add_array(self, name, typecode, values):
+        self.arrays.append((name, array(typecode, values)))
+
+    def add_sets(self, name, mapping, key_ids):
+        "Add a mapping of keys to collections of variables."
+        var_ids = self.var_ids
+        keys = []
+        offsets = [0]
+        members = []
+        for key, values in mapping.items():
+            keys.append(key_ids[key])
+            members.extend(var_ids[v] for v in values)
+            offsets.append(len(members))
+        self.add_array(name + '_keys', 'i', keys)
+        self.add_array(name + '_offsets', 'i', offsets)
+        self.add_array(name + '_members', 'i', members)
+
+    def slots(self):
+        "The variables in the storage slots of the solver's backend."
+        solver = self.solver
+        if isinstance(solver, DenseTableau):
+            return [solver.row_vars, solver.col_vars]
+        return []
+
+    def write(self):
+        solver = self.solver
+
+        # The constraint table: the constraints in the solver, then any
+        # that are only referred to by the error variable map.
+        constraints = list(solver.marker_vars)
+        cn_ids = dict((cn, i) for i, cn in enumerate(constraints))
+        for key in itertools.chain(solver.error_vars, solver.stay_error_vars):
+            if isinstance(key, AbstractConstraint) and key not in cn_ids:
+                cn_ids[key] = len(constraints)
+                constraints.append(key)
+
+        # The variable table, in creation order.
+        variables = set(solver.rows)
+        variables.update(solver.columns)
+        variables.update(solver.marker_vars.values())
+        for e_vars in solver.error_vars.values():
+            variables.update(e_vars)
+        for key in solver.error_vars:
+            if not isinstance(key, AbstractConstraint):
+                variables.add(key)
+        for cn in constraints:
+            variables.update(cn.expression.terms)
+        for cn_variables in solver.constraint_variables.values():
+            variables.update(cn_variables)
+        for cei in solver.edit_var_map.values():
+            variables.update((cei.edit_plus, cei.edit_minus))
+        for slots in self.slots():
+            variables.update(v for v in slots if v is not None)
+        variables = sorted(variables, key=lambda v: v.ordinal)
+        self.var_ids = var_ids = dict((v, i) for i, v in enumerate(variables))
+
+        names = []
+        prefixes = []
+        kinds = []
+        numbers = []
+        var_prefixes = []
+        values = []
+        seen = set()
+        for v in variables:
+            prefix = 0
+            value = 0.0
+            if v.is_external:
+                if v.name in seen:
+                    raise ValueError('Cannot snapshot a solver with two variables named %r' % (v.name,))
+                seen.add(v.name)
+                kinds.append(EXTERNAL)
+                number = len(names)
+                names.append(v.name)
+                value = solver.value_for(v)
+            elif isinstance(v, SlackVariable):
+                kinds.append(SLACK)
+                number = v.number
+                if v.prefix not in prefixes:
+                    prefixes.append(v.prefix)
+                prefix = prefixes.index(v.prefix)
+            elif v.is_dummy:
+                kinds.append(DUMMY)
+                number = v.number
+            else:
+                kinds.append(OBJECTIVE)
+                number = len(names)
+                names.append(v.name)
+            numbers.append(number)
+            var_prefixes.append(prefix)
+            values.append(value)
+        self.add_array('var_kinds', 'B', kinds)
+        self.add_array('var_numbers', 'i', numbers)
+        self.add_array('var_prefixes', 'B', var_prefixes)
+        self.add_array('var_values', 'd', values)
+
+        cn_kinds = []
+        offsets = [0]
+        term_ids = []
+        coeffs = []
+        for cn in constraints:
+            if cn.is_stay_constraint:
+                cn_kinds.append(STAY)
+            elif cn.is_edit_constraint:
+                cn_kinds.append(EDIT)
+            elif cn.is_inequality:
+                cn_kinds.append(INEQUALITY)
+            else:
+                cn_kinds.append(EQUATION)
+            for v, c in cn.expression.terms.items():
+                term_ids.append(var_ids[v])
+                coeffs.append(c)
+            offsets.append(len(term_ids))
+        self.add_array('cn_kinds', 'B', cn_kinds)
+        self.add_array('cn_strengths', 'd', [cn.strength for cn in constraints])
+        self.add_array('cn_weights', 'd', [cn.weight for cn in constraints])
+        self.add_array('cn_constants', 'd', [cn.expression.constant for cn in constraints])
+        self.add_array('cn_offsets', 'i', offsets)
+        self.add_array('cn_terms', 'i', term_ids)
+        self.add_array('cn_coeffs', 'd', coeffs)
+
+        row_vars = []
+        constants = []
+        offsets = [0]
+        term_ids = []
+        coeffs = []
+        for v, expr in solver.rows.items():
+            row_vars.append(var_ids[v])
+            constants.append(expr.constant)
+            for clv, c in expr.terms.items():
+                term_ids.append(var_ids[clv])
+                coeffs.append(c)
+            offsets.append(len(term_ids))
+        self.add_array('row_vars', 'i', row_vars)
+        self.add_array('row_constants', 'd', constants)
+        self.add_array('row_offsets', 'i', offsets)
+        self.add_array('row_terms', 'i', term_ids)
+        self.add_array('row_coeffs', 'd', coeffs)
+        self.add_array('columns', 'i', [var_ids[v] for v in solver.columns])
+
+        # The dense backend visits rows and columns in the order of its
+        # storage slots, so the slots are recorded too; the rebuilt solver
+        # then pivots exactly as the original would.
+        for name, slots in zip(('slots', 'column_slots'), self.slots()):
+            self.add_array(name, 'i', [-1 if v is None else var_ids[v] for v in slots])
+        if isinstance(solver, DenseTableau):
+            self.add_array('free', 'i', solver.free_rows)
+            self.add_array('free_columns', 'i', solver.free_cols)
+
+        self.add_array('markers', 'i', [var_ids[solver.marker_vars[cn]] for cn in constraints[:len(solver.marker_vars)]])
+        self.add_sets('error_cns', dict(
+            (key, e_vars) for key, e_vars in solver.error_vars.items()
+            if isinstance(key, AbstractConstraint)
+        ), cn_ids)
+        self.add_sets('error_vars', dict(
+            (key, e_vars) for key, e_vars in solver.error_vars.items()
+            if not isinstance(key, AbstractConstraint)
+        ), var_ids)
+        self.add_sets('stays', solver.stay_error_vars, cn_ids)
+        # The variables of each constraint when it was added; its
+        # expression may have been changed since.
+        self.add_sets('cn_variables', solver.constraint_variables, cn_ids)
+
+        edits = sorted(solver.edit_var_map.items(), key=lambda item: item[1].index)
+        self.add_array('edit_vars', 'i', [var_ids[v] for v, cei in edits])
+        self.add_array('edit_cns', 'i', [cn_ids[cei.constraint] for v, cei in edits])
+        self.add_array('edit_plus', 'i', [var_ids[cei.edit_plus] for v, cei in edits])
+        self.add_array('edit_minus', 'i', [var_ids[cei.edit_minus] for v, cei in edits])
+        self.add_array('edit_constants', 'd', [cei.prev_edit_constant for v, cei in edits])
+        self.add_array('edit_persistent', 'B', [cei.persistent for v, cei in edits])
+
+        for name in ('external_rows', 'external_parametric_vars', 'changed_external_vars', 'changed_stay_vars'):
+            self.add_array(name, 'i', sorted(var_ids[v] for v in getattr(solver, name)))
+        self.add_array('infeasible_rows', 'i', [var_ids[v] for v in solver.infeasible_rows])
+
+        pricing = solver.pricing
+        header = {
+            'version': VERSION,
+            'backend': _key_for(BACKENDS, type(solver)),
+            'pricing': _key_for(PRICING, type(pricing)),
+            'pricing_settings': dict(
+                (key, value) for key, value in vars(pricing).items()
+                if isinstance(value, (int, float))
+            ),
+            'infeasibility_rule': _key_for(INFEASIBILITY_RULES, solver.infeasible_rows.rule),
+            'names': names,
+            'prefixes': prefixes,
+            'objective': var_ids[solver.objective],
+            'edit_variable_stack': solver.edit_variable_stack,
+            'counters': dict(
+                (name, getattr(solver, name))
+                for name in ('slack_counter', 'artificial_counter', 'dummy_counter',
+                             'optimize_count', 'dual_pivot_count', 'auto_solve',
+                             'needs_solving', 'change_tolerance')
+            ),
+        }
+        if header['backend'] is None:
+            raise ValueError('Cannot snapshot a solver of type %s' % type(solver).__name__)
+        return pack(MAGIC, header, self.arrays)
+
+
+class SnapshotReader(object):
+    def __init__(self, f, variables=None):
+        self.f = f
+        self.variables = variables or {}
+
+    def read(self):
+        return self.load(self.f.read())
+
+    def load(self, buf):
+        header, arrays = unpack(MAGIC, buf)
+        if header['version'] != VERSION:
+            raise ValueError('Unsupported snapshot version %r' % header['version'])
+
+        solver = SimplexSolver(backend=header['backend'], pricing=header['pricing'])
+        if header['pricing'] is not None:
+            for key, value in header['pricing_settings'].items():
+                setattr(solver.pricing, key, value)
+        if header['infeasibility_rule'] is not None:
+            solver.infeasible_rows.rule = header['infeasibility_rule']
+        for name, value in header['counters'].items():
+            setattr(solver, name, value)
+
+        # Variables are created in the order of the originals, so the
+        # pricing strategies see the same ordering.
+        names = header['names']
+        prefixes = header['prefixes']
+        given = self.variables
+        named = {}
+        variables = []
+        for kind, number, prefix, value in zip(arrays['var_kinds'], arrays['var_numbers'], arrays['var_prefixes'], arrays['var_values']):
+            if kind == EXTERNAL:
+                name = names[number]
+                v = given.get(name)
+                if v is None:
+                    v = Variable(name, value)
+                else:
+                    v.value = value
+                named[name] = v
+            elif kind == SLACK:
+                v = SlackVariable(prefix=prefixes[prefix], number=number)
+            elif kind == DUMMY:
+                v = DummyVariable(number=number)
+            elif len(variables) == header['objective']:
+                v = solver.objective
+            else:
+                v = ObjectiveVariable(names[number])
+            variables.append(v)
+
+        constraints = []
+        offsets = arrays['cn_offsets']
+        terms = arrays['cn_terms']
+        coeffs = arrays['cn_coeffs']
+        for i, (kind, strength, weight, constant) in enumerate(zip(arrays['cn_kinds'], arrays['cn_strengths'], arrays['cn_weights'], arrays['cn_constants'])):
+            start, end = offsets[i], offsets[i + 1]
+            expr = Expression(constant=constant)
+            expr.terms = dict(zip([variables[j] for j in terms[start:end]], coeffs[start:end]))
+            if kind == STAY or kind == EDIT:
+                cls = StayConstraint if kind == STAY else EditConstraint
+                cn = cls.__new__(cls)
+                cn.variable = variables[terms[start]]
+            else:
+                cn = Constraint.__new__(Constraint)
+                cn.is_inequality = kind == INEQUALITY
+            AbstractConstraint.__init__(cn, as_strength(strength), weight)
+            cn.expression = expr
+            constraints.append(cn)
+
+        # The stay error variables must be known before the rows are
+        # added, so that the backends can mark stay rows.
+        stay_keys, stay_offsets, stay_members = arrays['stays_keys'], arrays['stays_offsets'], arrays['stays_members']
+        for n, i in enumerate(stay_keys):
+            cn = constraints[i]
+            plus, minus = [variables[j] for j in stay_members[stay_offsets[n]:stay_offsets[n + 1]]]
+            solver.stay_error_vars[cn] = (plus, minus)
+            solver.stay_vars.add(plus)
+            solver.stay_vars.add(minus)
+
+        solver.remove_row(solver.objective)
+        if isinstance(solver, DenseTableau):
+            slots = arrays['slots']
+            column_slots = arrays['column_slots']
+            solver._grow(len(slots), len(column_slots))
+            solver.col_vars = [None if j < 0 else variables[j] for j in column_slots]
+            solver.col_ids = dict((v, i) for i, v in enumerate(solver.col_vars) if v is not None)
+            for i, v in enumerate(solver.col_vars):
+                solver.col_pivotable[i] = v is not None and v.is_pivotable
+            solver.free_cols = arrays['free_columns']
+            # add_row() takes rows from the end of the free list.
+            solver.row_vars = [None] * len(slots)
+            row_slots = dict((j, i) for i, j in enumerate(slots) if j >= 0)
+            solver.free_rows = [row_slots[j] for j in reversed(arrays['row_vars'])]
+
+        offsets = arrays['row_offsets']
+        terms = arrays['row_terms']
+        coeffs = arrays['row_coeffs']
+        for i, (j, constant) in enumerate(zip(arrays['row_vars'], arrays['row_constants'])):
+            start, end = offsets[i], offsets[i + 1]
+            expr = Expression(constant=constant)
+            expr.terms = dict(zip([variables[k] for k in terms[start:end]], coeffs[start:end]))
+            solver.add_row(variables[j], expr)
+        if isinstance(solver, DenseTableau):
+            solver.free_rows = arrays['free']
+        for j in arrays['columns']:
+            v = variables[j]
+            if v not in solver.columns:
+                # A column that no row refers to any more.
+                solver.note_added_variable(v, solver.objective)
+                solver.note_removed_variable(v, solver.objective)
+
+        for cn, j in zip(constraints, arrays['markers']):
+            solver.marker_vars[cn] = variables[j]
+            if cn.is_stay_constraint:
+                solver.stay_constraints.setdefault(cn.variable, []).append(cn)
+        offsets = arrays['cn_variables_offsets']
+        members = arrays['cn_variables_members']
+        for n, i in enumerate(arrays['cn_variables_keys']):
+            cn = constraints[i]
+            cn_variables = tuple(variables[j] for j in members[offsets[n]:offsets[n + 1]])
+            solver.constraint_variables[cn] = cn_variables
+            for v in cn_variables:
+                solver.variable_constraints.setdefault(v, {})[cn] = True
+        for name, keys in (('error_cns', constraints), ('error_vars', variables)):
+            offsets = arrays[name + '_offsets']
+            members = arrays[name + '_members']
+            for n, i in enumerate(arrays[name + '_keys']):
+                solver.error_vars[keys[i]] = set(variables[j] for j in members[offsets[n]:offsets[n + 1]])
+
+        for index, (j, i, plus, minus, constant, persistent) in enumerate(zip(
+                arrays['edit_vars'], arrays['edit_cns'], arrays['edit_plus'],
+                arrays['edit_minus'], arrays['edit_constants'], arrays['edit_persistent'])):
+            solver.edit_var_map[variables[j]] = EditInfo(
+                constraints[i], variables[plus], variables[minus], constant, index, bool(persistent)
+            )
+        solver.edit_variable_stack = header['edit_variable_stack']
+
+        for name in ('external_rows', 'external_parametric_vars', 'changed_external_vars', 'changed_stay_vars'):
+            setattr(solver, name, set(variables[j] for j in arrays[name]))
+        solver.infeasible_rows.clear()
+        for j in arrays['infeasible_rows']:
+            solver.infeasible_rows.add(variables[j])
+        solver.note_objective_terms(solver.rows[solver.objective].terms)
+
+        return solver, named, constraints[:len(arrays['markers'])]
+
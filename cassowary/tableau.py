@@ -1,5 +1,135 @@
 from __future__ import print_function, unicode_literals, absolute_import, division
 
+import copy
+from heapq import heappop, heappush, heapreplace
+import itertools
+
+from .utils import EPSILON
+
+
+def most_infeasible(tableau, var):
+    "Repair the row with the most negative constant first."
+    expr = tableau.rows.get(var)
+    return expr.constant if expr is not None else 0.0
+
+
+def first_infeasible(tableau, var):
+    "Repair rows in the order they became infeasible."
+    return 0
+
+
+def oldest_variable(tableau, var):
+    "Repair the row whose basic variable was created first."
+    return var.ordinal
+
+
+INFEASIBILITY_RULES = {
+    'magnitude': most_infeasible,
+    'fifo': first_infeasible,
+    'ordinal': oldest_variable,
+}
+
+
+class InfeasibleRows(object):
+    """The rows awaiting repair by the dual simplex, as a priority queue.
+
+    Provides the set operations the solver uses, but pop() returns the row
+    with the lowest key under ``rule``: a name from INFEASIBILITY_RULES, or
+    a function of the tableau and the basic variable. Ties are broken in
+    the order rows were added.
+
+    A row's key is computed when it is added; adding a row that is already
+    queued updates its key. The tableau adds every row whose constant it
+    changes while the row is infeasible, so keys stay current. Keys are also
+    checked when a row reaches the front of the queue.
+    """
+    __slots__ = ('tableau', 'key', 'heap', 'members', 'counter')
+
+    def __init__(self, tableau, rule='magnitude'):
+        self.tableau = tableau
+        self.rule = rule
+        self.heap = []
+        # Map of queued variable to its current key
+        self.members = {}
+        self.counter = itertools.count()
+
+    @property
+    def rule(self):
+        return self.key
+
+    @rule.setter
+    def rule(self, rule):
+        if not callable(rule):
+            try:
+                rule = INFEASIBILITY_RULES[rule]
+            except KeyError:
+                raise ValueError('Unknown infeasibility rule %r' % (rule,))
+        self.key = rule
+        if getattr(self, 'heap', None):
+            # Requeue the waiting rows under the new rule.
+            waiting = sorted(entry[1:] for entry in self.heap if entry[2] in self.members)
+            self.clear()
+            for n, var in waiting:
+                self.add(var)
+
+    def __repr__(self):
+        return repr(set(self.members))
+
+    def __len__(self):
+        return len(self.members)
+
+    def __iter__(self):
+        return iter(self.members)
+
+    def __contains__(self, var):
+        return var in self.members
+
+    def add(self, var):
+        key = self.key(self.tableau, var)
+        if self.members.get(var, self) != key:
+            self.members[var] = key
+            heappush(self.heap, (key, next(self.counter), var))
+
+    def remove(self, var):
+        # Heap entries that are no longer current are discarded when
+        # they reach the front.
+        del self.members[var]
+
+    def discard(self, var):
+        self.members.pop(var, None)
+
+    def pop(self):
+        heap = self.heap
+        members = self.members
+        while heap:
+            key, n, var = heap[0]
+            if members.get(var, heap) != key:
+                heappop(heap)
+                continue
+            current = self.key(self.tableau, var)
+            if current != key:
+                members[var] = current
+                heapreplace(heap, (current, n, var))
+                continue
+            heappop(heap)
+            del members[var]
+            if not members:
+                self.heap = []
+            return var
+        raise KeyError('pop from an empty queue')
+
+    def clear(self):
+        self.heap = []
+        self.members = {}
+
+    def copy(self, tableau):
+        "A copy of the queue, for a fork of the tableau."
+        rows = InfeasibleRows(tableau, self.key)
+        rows.heap = list(self.heap)
+        rows.members = dict(self.members)
+        rows.counter = itertools.count(next(self.counter))
+        return rows
+
 
 class Tableau(object):
     def __init__(self):
@@ -9,8 +139,8 @@ class Tableau(object):
         # Map of variable to LinearExpression
         self.rows = {}
 
-        # Set of Variables
-        self.infeasible_rows = set()
+        # Queue of Variables
+        self.infeasible_rows = InfeasibleRows(self)
 
         # Set of Variables
         self.external_rows = set()
@@ -18,6 +148,21 @@ class Tableau(object):
         # Set of Variables.
         self.external_parametric_vars = set()
 
+        # Set of external Variables whose value may have changed since
+        # the solver last updated them.
+        self.changed_external_vars = set()
+
+        # Set of error variables of stay constraints, and the subset of
+        # them whose row constant may have changed since the stay
+        # constants were last reset.
+        self.stay_vars = set()
+        self.changed_stay_vars = set()
+
+        # Set of row variables whose rows are shared with a fork of the
+        # tableau (or the tableau it was forked from). A shared row is
+        # copied before it is changed.
+        self.shared_rows = set()
+
     def __repr__(self):
         parts = []
         parts.append('Tableau info:')
@@ -28,6 +173,35 @@ class Tableau(object):
         parts.append('External parametric variables: %s' % len(self.external_parametric_vars))
         return '\n'.join(parts)
 
+    def fork(self):
+        "Return a copy of the tableau that shares its rows copy-on-write."
+        tableau = copy.copy(self)
+        tableau.shared_rows = set()
+        self.fork_rows(tableau)
+        tableau.infeasible_rows = self.infeasible_rows.copy(tableau)
+        tableau.external_rows = set(self.external_rows)
+        tableau.external_parametric_vars = set(self.external_parametric_vars)
+        tableau.changed_external_vars = set(self.changed_external_vars)
+        tableau.stay_vars = set(self.stay_vars)
+        tableau.changed_stay_vars = set(self.changed_stay_vars)
+        return tableau
+
+    def fork_rows(self, tableau):
+        "Give the fork ``tableau`` its rows and columns."
+        self.shared_rows.update(self.rows)
+        tableau.shared_rows = set(self.shared_rows)
+        tableau.rows = dict(self.rows)
+        tableau.columns = dict((v, set(rows)) for v, rows in self.columns.items())
+
+    def writable_row(self, var):
+        "The row of var, or None; a row shared with a fork is copied first."
+        expr = self.rows.get(var)
+        if expr is not None and var in self.shared_rows:
+            self.shared_rows.remove(var)
+            expr = expr.clone()
+            self.rows[var] = expr
+        return expr
+
     def note_removed_variable(self, var, subject):
         if subject:
             self.columns[var].remove(subject)
@@ -44,9 +218,13 @@ class Tableau(object):
             self.columns.setdefault(clv, set()).add(var)
             if clv.is_external:
                 self.external_parametric_vars.add(clv)
+                self.changed_external_vars.add(clv)
 
         if var.is_external:
             self.external_rows.add(var)
+            self.changed_external_vars.add(var)
+        if var in self.stay_vars:
+            self.changed_stay_vars.add(var)
 
         # print(self)
 
@@ -55,7 +233,7 @@ class Tableau(object):
 
         if rows:
             for clv in rows:
-                expr = self.rows[clv]
+                expr = self.writable_row(clv)
                 expr.remove_variable(var)
 
         if var.is_external:
@@ -72,6 +250,10 @@ class Tableau(object):
     def remove_row(self, var):
         # print("remove_row", var)
         expr = self.rows.pop(var)
+        if var in self.shared_rows:
+            # The caller may change the row it is given.
+            self.shared_rows.remove(var)
+            expr = expr.clone()
 
         for clv in expr.terms.keys():
             varset = self.columns[clv]
@@ -84,6 +266,7 @@ class Tableau(object):
         except KeyError:
             pass
         if var.is_external:
+            self.changed_external_vars.add(var)
             try:
                 self.external_rows.remove(var)
             except KeyError:
@@ -92,14 +275,51 @@ class Tableau(object):
         return expr
 
     def substitute_out(self, oldVar, expr):
-        varset = self.columns[oldVar]
+        # Equivalent to calling Expression.substitute_out on every row in
+        # the column, with the column bookkeeping and infeasibility
+        # marking done in the same loop.
+        columns = self.columns
+        rows = self.rows
+        infeasible_rows = self.infeasible_rows
+        changed_external_vars = self.changed_external_vars
+        stay_vars = self.stay_vars
+        changed_stay_vars = self.changed_stay_vars
+        shared_rows = self.shared_rows
+        constant = expr.constant
+        varset = columns[oldVar]
+        if varset:
+            terms = [(clv, coeff, columns.setdefault(clv, set())) for clv, coeff in expr.terms.items()]
+
         for v in varset:
-            row = self.rows[v]
-            row.substitute_out(oldVar, expr, v, self)
-            if v.is_restricted and row.constant < 0.0:
-                self.infeasible_rows.add(v)
+            if v in shared_rows:
+                row = self.writable_row(v)
+            else:
+                row = rows[v]
+            row_terms = row.terms
+            multiplier = row_terms.pop(oldVar)
+            row.constant = row.constant + multiplier * constant
+            for clv, coeff, column in terms:
+                old_coefficient = row_terms.get(clv)
+                if old_coefficient:
+                    new_coefficient = old_coefficient + multiplier * coeff
+                    if -EPSILON < new_coefficient < EPSILON:
+                        del row_terms[clv]
+                        column.remove(v)
+                    else:
+                        row_terms[clv] = new_coefficient
+                else:
+                    row_terms[clv] = multiplier * coeff
+                    column.add(v)
+            if v.is_restricted:
+                if row.constant < 0.0:
+                    infeasible_rows.add(v)
+                if v in stay_vars:
+                    changed_stay_vars.add(v)
+            elif v.is_external:
+                changed_external_vars.add(v)
 
         if oldVar.is_external:
+            self.changed_external_vars.add(oldVar)
             self.external_rows.add(oldVar)
             try:
                 self.external_parametric_vars.remove(oldVar)
@@ -1,5 +1,9 @@
 from __future__ import print_function, unicode_literals, absolute_import, division
 
+import bisect
+
+from .error import InternalError
+
 
 EPSILON = 1e-8
 
@@ -14,6 +18,62 @@ def approx_equal(a, b, epsilon=EPSILON):
     return abs(a - b) < epsilon
 
 
+def as_list(values):
+    "Convert a sequence, NumPy array or buffer into a list of Python objects."
+    if hasattr(values, 'tolist'):
+        return values.tolist()
+    return list(values)
+
+
+def index_of(items, item):
+    "The index of item in items, comparing with ``is``; ``==`` on a Variable makes a constraint."
+    for i, x in enumerate(items):
+        if x is item:
+            return i
+    raise ValueError('%s is not in the list' % item)
+
+
+def with_strength(cn, strength=None, weight=None):
+    "cn, or a copy of cn with the given strength and weight, as add_constraint() takes them."
+    if strength or weight:
+        cn = cn.clone()
+        if strength:
+            cn.strength = strength
+        if weight:
+            cn.weight = weight
+    return cn
+
+
+def suggestions(variables, values, is_edit_var):
+    """The (variable, value) pairs given to suggest_values(), checked against is_edit_var.
+
+    Either variables is a dictionary mapping edit variables to values and
+    values is None, or they are parallel sequences (or NumPy arrays).
+    """
+    if values is None:
+        pairs = list(variables.items())
+    else:
+        variables = as_list(variables)
+        values = as_list(values)
+        if len(variables) != len(values):
+            raise ValueError('suggest_values() requires one value per variable')
+        pairs = list(zip(variables, values))
+
+    for v, x in pairs:
+        if not is_edit_var(v):
+            raise InternalError("suggestValue for variable %s, but var is not an edit variable" % v)
+    return pairs
+
+
+def renumber(indices, removed):
+    """Shift indices down past the indices in the sorted list removed.
+
+    Keeps the indices of edit variables, and the edit session boundaries,
+    contiguous when edit variables are removed.
+    """
+    return [k - bisect.bisect_left(removed, k) for k in indices]
+
+
 def repr_strength(strength):
     """Convert a numerical strength constant into a human-readable value.
 
@@ -0,0 +1,137 @@
+from __future__ import print_function, unicode_literals, absolute_import, division
+
+from array import array
+
+from .expression import AbstractConstraint, Constraint, EditConstraint, Expression, StayConstraint, Variable
+from .packing import as_strength, pack, unpack
+
+###########################################################################
+# Encoded models
+#
+# A compact encoding of a list of constraints, for sending a model to
+# another process or caching it. Variables are numbered in a table, so a
+# variable shared between constraints is decoded as a single Variable.
+# The constraints are held as flat arrays: the left hand sides in
+# compressed sparse row form, with an operator, right hand side,
+# strength and weight for each. The data is laid out by packing.pack().
+###########################################################################
+
+MAGIC = b'CASSOWARY-MODEL\n'
+VERSION = 1
+
+# Kinds of constraint
+EQ, GEQ, STAY, EDIT = range(4)
+
+
+def encode(constraints, variables=None):
+    """Encode a sequence of constraints as bytes.
+
+    The variables are numbered in order of first appearance; pass
+    ``variables`` to number those variables first, in the given order.
+    """
+    var_ids = {}
+    table = []
+    for v in variables or ():
+        if v not in var_ids:
+            var_ids[v] = len(table)
+            table.append(v)
+
+    kinds = array('B')
+    strengths = array('d')
+    weights = array('d')
+    rhs = array('d')
+    indptr = array('i', [0])
+    indices = array('i')
+    data = array('d')
+    for cn in constraints:
+        if cn.is_stay_constraint:
+            kinds.append(STAY)
+        elif cn.is_edit_constraint:
+            kinds.append(EDIT)
+        elif cn.is_inequality:
+            kinds.append(GEQ)
+        else:
+            kinds.append(EQ)
+        strengths.append(cn.strength)
+        weights.append(cn.weight)
+        # The expression of a constraint is ``expression (op) 0``.
+        rhs.append(-cn.expression.constant)
+        for v, c in cn.expression.terms.items():
+            i = var_ids.get(v)
+            if i is None:
+                i = var_ids[v] = len(table)
+                table.append(v)
+            indices.append(i)
+            data.append(c)
+        indptr.append(len(indices))
+
+    header = {
+        'version': VERSION,
+        'names': [v.name for v in table],
+    }
+    return pack(MAGIC, header, [
+        ('values', array('d', [v.value for v in table])),
+        ('kinds', kinds),
+        ('strengths', strengths),
+        ('weights', weights),
+        ('rhs', rhs),
+        ('indptr', indptr),
+        ('indices', indices),
+        ('data', data),
+    ])
+
+
+def decode(data, variables=None, solver=None):
+    """Decode constraints encoded by encode().
+
+    ``variables`` optionally gives the Variables to use for the first
+    entries of the variable table, in order; the others are created,
+    with the names and values they were encoded with. If a ``solver``
+    is given, the constraints are added to it with a single
+    optimization pass.
+
+    Returns ``(variables, constraints)``: the variable table, and the
+    constraints in the order they were encoded.
+    """
+    header, arrays = unpack(MAGIC, data)
+    if header['version'] != VERSION:
+        raise ValueError('Unsupported model version %r' % header['version'])
+
+    table = list(variables or ())[:len(header['names'])]
+    for name, value in zip(header['names'][len(table):], arrays['values'][len(table):]):
+        table.append(Variable(name, value))
+
+    kinds = arrays['kinds']
+    strengths = arrays['strengths']
+    weights = arrays['weights']
+    rhs = arrays['rhs']
+    indptr = arrays['indptr']
+    indices = arrays['indices']
+    coefficients = arrays['data']
+
+    constraints = []
+    for i, kind in enumerate(kinds):
+        start, end = indptr[i], indptr[i + 1]
+        if kind == STAY or kind == EDIT:
+            cls = StayConstraint if kind == STAY else EditConstraint
+            cn = cls.__new__(cls)
+            cn.variable = table[indices[start]]
+        else:
+            cn = Constraint.__new__(Constraint)
+            cn.is_inequality = kind == GEQ
+        AbstractConstraint.__init__(cn, as_strength(strengths[i]), weights[i])
+        # The encoded terms are those of a valid expression, so they can
+        # be used as they are.
+        expr = Expression(constant=-rhs[i])
+        expr.terms = dict(zip([table[j] for j in indices[start:end]], coefficients[start:end]))
+        cn.expression = expr
+        constraints.append(cn)
+
+    if solver is not None:
+        # As for add_constraints_from_matrix(), the system is optimized
+        # once, after every constraint has been added.
+        with solver.batch():
+            for cn in constraints:
+                solver.add_constraint(cn)
+    return table, constraints
+
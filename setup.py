@@ -24,7 +24,7 @@ setup(
     author='Brodderick Rodriguez',
     author_email='bcr@brodderick.com',
     url='http://brodderick.com/projects/cassowary',
-    packages=find_packages(exclude=['docs', 'tests']),
+    packages=find_packages(exclude=['docs', 'tests', 'benchmarks', 'benchmarks.*']),
     install_requires=[],
     license='Apache-2.0',
     classifiers=[
@@ -5,10 +5,10 @@ if not hasattr(TestCase, 'assertIsNotNone'):
     # For Python2.6 compatibility
     from unittest2 import TestCase
 
-from cassowary import Variable, SimplexSolver, STRONG, WEAK
+from cassowary import InternalError, Variable, SimplexSolver, STRONG, WEAK
 
 # Internals
-from cassowary.expression import Expression, Constraint
+from cassowary.expression import Expression, Constraint, EditConstraint, StayConstraint
 from cassowary.utils import approx_equal
 
 
@@ -164,3 +164,74 @@ class ConstraintTestCase(TestCase):
 
         ieq = Constraint(e, Constraint.LEQ, v)
         self.assertExpressionEqual(ieq.expression, v - e)
+
+    def test_expression_not_shared(self):
+        "Changing an expression in place doesn't change constraints built from it"
+        x = Variable('x', 10)
+        y = Variable('y', 20)
+        z = Variable('z', 30)
+        e = x + y
+        c1 = Constraint(e)
+        c2 = c1.clone()
+        e += z
+        e *= 2
+        self.assertIsNot(c1.expression, e)
+        self.assertIsNot(c2.expression, c1.expression)
+        for cn in (c1, c2):
+            self.assertEqual(cn.expression.terms, {x: 1.0, y: 1.0})
+
+        # So a constraint can be removed from a solver after its
+        # expression has been added to.
+        solver = SimplexSolver()
+        e = x - 50
+        cn = solver.add_constraint(Constraint(e))
+        e += z
+        solver.remove_constraint(cn)
+        self.assertEqual(solver.constraints_for(x), [])
+
+    def test_slotted_constraints(self):
+        "Constraints and their expressions don't carry an instance dictionary."
+        v = Variable(name='v', value=10)
+        for cn in [Constraint(v, Constraint.GEQ, 10), EditConstraint(v), StayConstraint(v)]:
+            self.assertFalse(hasattr(cn, '__dict__'))
+            self.assertFalse(hasattr(cn.expression, '__dict__'))
+
+        self.assertTrue(Constraint(v, Constraint.GEQ, 10).is_inequality)
+        self.assertFalse(Constraint(v, Constraint.EQ, 10).is_inequality)
+        self.assertTrue(EditConstraint(v).is_edit_constraint)
+        self.assertFalse(EditConstraint(v).is_stay_constraint)
+        self.assertTrue(StayConstraint(v).is_stay_constraint)
+
+    def test_from_arrays(self):
+        "Constraint can be constructed from parallel arrays"
+        x = Variable(name='x', value=5)
+        y = Variable(name='y', value=10)
+
+        cn = Constraint.from_arrays([x, y], [2, 3], Constraint.GEQ, 4, STRONG, 2)
+        self.assertTrue(cn.is_inequality)
+        self.assertEqual(cn.strength, STRONG)
+        self.assertEqual(cn.weight, 2)
+        self.assertEqual(repr(cn.expression), repr(Constraint(2 * x + 3 * y, Constraint.GEQ, 4).expression))
+
+        cn = Constraint.from_arrays([x, y], [2, 3], Constraint.LEQ, 4)
+        self.assertTrue(cn.is_inequality)
+        self.assertTrue(cn.is_required)
+        self.assertEqual(repr(cn.expression), repr(Constraint(2 * x + 3 * y, Constraint.LEQ, 4).expression))
+
+        cn = Constraint.from_arrays([x, y], [2, 3], Constraint.EQ, 4)
+        self.assertFalse(cn.is_inequality)
+        self.assertEqual(repr(cn.expression), repr(Constraint(2 * x + 3 * y, Constraint.EQ, 4).expression))
+
+        with self.assertRaises(InternalError):
+            Constraint.from_arrays([x, y], [2, 3], 42, 4)
+
+    def test_from_arrays_solves(self):
+        "Constraints built from arrays can be added to a solver"
+        x = Variable(name='x', value=5)
+        y = Variable(name='y', value=10)
+
+        solver = SimplexSolver()
+        solver.add_stay(y)
+        solver.add_constraint(Constraint.from_arrays([x, y], [1, -1], Constraint.GEQ, 15))
+        self.assertAlmostEqual(y.value, 10)
+        self.assertAlmostEqual(x.value, 25)
@@ -0,0 +1,101 @@
+from __future__ import print_function, unicode_literals, absolute_import, division
+
+from unittest import TestCase
+if not hasattr(TestCase, 'assertIsNotNone'):
+    # For Python2.6 compatibility
+    from unittest2 import TestCase, skipIf
+else:
+    from unittest import skipIf
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from cassowary import SimplexSolver, Variable
+
+# Internals
+from cassowary.dense_tableau import DenseTableau
+from cassowary.expression import Expression, SlackVariable
+
+
+@skipIf(numpy is None, 'NumPy is not installed')
+class DenseTableauTestCase(TestCase):
+    def test_tableau(self):
+        "A DenseTableau can be constructed"
+        tableau = DenseTableau()
+
+        self.assertEqual(len(tableau.columns), 0)
+        self.assertEqual(len(tableau.rows), 0)
+        self.assertEqual(len(tableau.infeasible_rows), 0)
+        self.assertEqual(len(tableau.external_rows), 0)
+        self.assertEqual(len(tableau.external_parametric_vars), 0)
+
+    def test_solver_backend(self):
+        "A solver can be constructed with dense storage"
+        solver = SimplexSolver(backend='dense')
+        self.assertIsInstance(solver, SimplexSolver)
+        self.assertIsInstance(solver, DenseTableau)
+        self.assertEqual(len(solver.rows), 1)
+
+    def test_rows(self):
+        "Rows are stored in the matrix, and read back as expressions"
+        tableau = DenseTableau()
+        x = Variable('x', 167)
+        y = Variable('y', 2)
+        s = SlackVariable('s', 1)
+        tableau.add_row(s, Expression(y, 3, 5) + Expression(x, 2))
+
+        expr = tableau.rows[s]
+        self.assertAlmostEqual(expr.constant, 5.0)
+        self.assertAlmostEqual(expr.coefficient_for(x), 2.0)
+        self.assertAlmostEqual(expr.terms[y], 3.0)
+        self.assertEqual(set(expr.terms), set([x, y]))
+        self.assertEqual(set(tableau.columns), set([x, y]))
+        self.assertEqual(list(tableau.columns[x]), [s])
+
+        removed = tableau.remove_row(s)
+        self.assertIsInstance(removed, Expression)
+        self.assertAlmostEqual(removed.coefficient_for(y), 3.0)
+        self.assertEqual(len(tableau.columns[x]), 0)
+
+        # The storage of a removed row is reused.
+        tableau.add_row(s, Expression(x, 1))
+        self.assertEqual(tableau.row_ids[s], 0)
+
+    def test_substitute_out(self):
+        "Substituting a variable updates every row that contains it"
+        tableau = DenseTableau()
+        x = Variable('x')
+        y = Variable('y')
+        s1 = SlackVariable('s', 1)
+        s2 = SlackVariable('s', 2)
+        s3 = SlackVariable('s', 3)
+
+        # s1 = x + 2y + 1; s2 = -x - 1
+        tableau.add_row(s1, Expression(x, 1, 1) + Expression(y, 2))
+        tableau.add_row(s2, Expression(x, -1, -1))
+
+        # x = 3s3 - 2y + 4
+        tableau.substitute_out(x, Expression(s3, 3, 4) - 2 * y)
+
+        self.assertNotIn(x, tableau.columns)
+        self.assertEqual(set(tableau.rows[s1].terms), set([s3]))
+        self.assertAlmostEqual(tableau.rows[s1].constant, 5.0)
+        self.assertAlmostEqual(tableau.rows[s1].coefficient_for(s3), 3.0)
+        self.assertAlmostEqual(tableau.rows[s2].constant, -5.0)
+        self.assertAlmostEqual(tableau.rows[s2].coefficient_for(y), 2.0)
+        self.assertEqual(set(tableau.columns[s3]), set([s1, s2]))
+        self.assertEqual(set(tableau.infeasible_rows), set([s2]))
+
+    def test_growth(self):
+        "The matrix grows as rows and columns are added"
+        solver = SimplexSolver(backend='dense')
+        variables = [Variable('x%s' % i, i) for i in range(40)]
+        for v in variables:
+            solver.add_stay(v)
+        for a, b in zip(variables, variables[1:]):
+            solver.add_constraint(a + 1 <= b)
+
+        for a, b in zip(variables, variables[1:]):
+            self.assertLessEqual(a.value + 1, b.value + 1e-8)
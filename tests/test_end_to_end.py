@@ -4,9 +4,16 @@ import random
 from unittest import TestCase
 if not hasattr(TestCase, 'assertIsNotNone'):
     # For Python2.6 compatibility
-    from unittest2 import TestCase
+    from unittest2 import TestCase, skipIf
+else:
+    from unittest import skipIf
 
-from cassowary import RequiredFailure, SimplexSolver, STRONG, WEAK, MEDIUM, REQUIRED, Variable
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from cassowary import InternalError, RequiredFailure, SimplexSolver, STRONG, WEAK, MEDIUM, REQUIRED, Variable
 
 # Internals
 from cassowary.expression import Constraint
@@ -14,8 +21,14 @@ from cassowary.utils import approx_equal
 
 
 class EndToEndTestCase(TestCase):
+    backend = None
+    pricing = None
+
+    def new_solver(self):
+        return SimplexSolver(backend=self.backend, pricing=self.pricing)
+
     def test_simple(self):
-        solver = SimplexSolver()
+        solver = self.new_solver()
 
         x = Variable('x', 167)
         y = Variable('y', 2)
@@ -30,7 +43,7 @@ class EndToEndTestCase(TestCase):
         x = Variable('x', 5)
         y = Variable('y', 10)
 
-        solver = SimplexSolver()
+        solver = self.new_solver()
         solver.add_stay(x)
         solver.add_stay(y)
 
@@ -38,7 +51,7 @@ class EndToEndTestCase(TestCase):
         self.assertAlmostEqual(y.value, 10)
 
     def test_variable_geq_constant(self):
-        solver = SimplexSolver()
+        solver = self.new_solver()
 
         x = Variable('x', 10)
         ieq = Constraint(x, Constraint.GEQ, 100)
@@ -47,7 +60,7 @@ class EndToEndTestCase(TestCase):
         self.assertAlmostEqual(x.value, 100)
 
     def test_variable_leq_constant(self):
-        solver = SimplexSolver()
+        solver = self.new_solver()
 
         x = Variable('x', 100)
         ieq = Constraint(x, Constraint.LEQ, 10)
@@ -56,7 +69,7 @@ class EndToEndTestCase(TestCase):
         self.assertAlmostEqual(x.value, 10)
 
     def test_variable_equal_constant(self):
-        solver = SimplexSolver()
+        solver = self.new_solver()
 
         x = Variable('x', 10)
         eq = Constraint(100, Constraint.EQ, x)
@@ -66,7 +79,7 @@ class EndToEndTestCase(TestCase):
 
     def test_constant_geq_variable(self):
         # 10 >= x
-        solver = SimplexSolver()
+        solver = self.new_solver()
 
         x = Variable('x', 100)
         ieq = Constraint(10, Constraint.GEQ, x)
@@ -76,7 +89,7 @@ class EndToEndTestCase(TestCase):
 
     def test_constant_leq_variable(self):
         # 100 <= x
-        solver = SimplexSolver()
+        solver = self.new_solver()
 
         x = Variable('x', 10)
         ieq = Constraint(100, Constraint.LEQ, x)
@@ -87,7 +100,7 @@ class EndToEndTestCase(TestCase):
     def test_geq_with_stay(self):
         # stay width
         # right >= 100
-        solver = SimplexSolver()
+        solver = self.new_solver()
 
         # x = 10
         x = Variable('x', 10)
@@ -106,7 +119,7 @@ class EndToEndTestCase(TestCase):
     def test_leq_with_stay(self):
         # stay width
         # 100 <= right
-        solver = SimplexSolver()
+        solver = self.new_solver()
 
         x = Variable('x', 10)
         width = Variable('width', 10)
@@ -122,7 +135,7 @@ class EndToEndTestCase(TestCase):
     def test_equality_with_stay(self):
         # stay width, rightMin
         # right >= rightMin
-        solver = SimplexSolver()
+        solver = self.new_solver()
 
         x = Variable('x', 10)
         width = Variable('width', 10)
@@ -142,7 +155,7 @@ class EndToEndTestCase(TestCase):
     def test_geq_with_variable(self):
         # stay width, rightMin
         # right >= rightMin
-        solver = SimplexSolver()
+        solver = self.new_solver()
 
         x = Variable('x', 10)
         width = Variable('width', 10)
@@ -162,7 +175,7 @@ class EndToEndTestCase(TestCase):
     def test_leq_with_variable(self):
         # stay width
         # right >= rightMin
-        solver = SimplexSolver()
+        solver = self.new_solver()
 
         x = Variable('x', 10)
         width = Variable('width', 10)
@@ -182,7 +195,7 @@ class EndToEndTestCase(TestCase):
     def test_equality_with_expression(self):
         # stay width, rightMin
         # right >= rightMin
-        solver = SimplexSolver()
+        solver = self.new_solver()
 
         x1 = Variable('x1', 10)
         width1 = Variable('width1', 10)
@@ -207,7 +220,7 @@ class EndToEndTestCase(TestCase):
     def test_geq_with_expression(self):
         # stay width, rightMin
         # right >= rightMin
-        solver = SimplexSolver()
+        solver = self.new_solver()
 
         x1 = Variable('x1', 10)
         width1 = Variable('width1', 10)
@@ -229,7 +242,7 @@ class EndToEndTestCase(TestCase):
     def test_leq_with_expression(self):
         # stay width, rightMin
         # right >= rightMin
-        solver = SimplexSolver()
+        solver = self.new_solver()
 
         x1 = Variable('x1', 10)
         width1 = Variable('width1', 10)
@@ -249,7 +262,7 @@ class EndToEndTestCase(TestCase):
         self.assertAlmostEqual(x1.value, 100)
 
     def test_delete1(self):
-        solver = SimplexSolver()
+        solver = self.new_solver()
         x = Variable('x')
         cbl = Constraint(x, Constraint.EQ, 100, WEAK)
         solver.add_constraint(cbl)
@@ -278,7 +291,7 @@ class EndToEndTestCase(TestCase):
         self.assertAlmostEqual(x.value, 100)
 
     def test_delete2(self):
-        solver = SimplexSolver()
+        solver = self.new_solver()
         x = Variable('x')
         y = Variable('y')
 
@@ -309,7 +322,7 @@ class EndToEndTestCase(TestCase):
         self.assertAlmostEqual(y.value, 120)
 
     def test_casso1(self):
-        solver = SimplexSolver()
+        solver = self.new_solver()
         x = Variable('x')
         y = Variable('y')
 
@@ -324,7 +337,7 @@ class EndToEndTestCase(TestCase):
         )
 
     def test_inconsistent1(self):
-        solver = SimplexSolver()
+        solver = self.new_solver()
         x = Variable('x')
         # x = 10
         solver.add_constraint(Constraint(x, Constraint.EQ, 10))
@@ -333,7 +346,7 @@ class EndToEndTestCase(TestCase):
             solver.add_constraint(Constraint(x, Constraint.EQ, 5))
 
     def test_inconsistent2(self):
-        solver = SimplexSolver()
+        solver = self.new_solver()
         x = Variable('x')
         solver.add_constraint(Constraint(x, Constraint.GEQ, 10))
 
@@ -341,7 +354,7 @@ class EndToEndTestCase(TestCase):
             solver.add_constraint(Constraint(x, Constraint.LEQ, 5))
 
     def test_inconsistent3(self):
-        solver = SimplexSolver()
+        solver = self.new_solver()
         w = Variable('w')
         x = Variable('x')
         y = Variable('y')
@@ -356,7 +369,7 @@ class EndToEndTestCase(TestCase):
             solver.add_constraint(Constraint(z, Constraint.LEQ, 4))
 
     def test_inconsistent4(self):
-        solver = SimplexSolver()
+        solver = self.new_solver()
         x = Variable('x')
         y = Variable('y')
         # x = 10
@@ -375,7 +388,7 @@ class EndToEndTestCase(TestCase):
         y = Variable('y')
         w = Variable('w')
         h = Variable('h')
-        solver = SimplexSolver()
+        solver = self.new_solver()
 
         # Add some stays
         solver.add_stay(x)
@@ -422,6 +435,210 @@ class EndToEndTestCase(TestCase):
         self.assertAlmostEqual(w.value, 30)
         self.assertAlmostEqual(h.value, 40)
 
+    def test_suggest_values(self):
+        "Several edit variables can be suggested at once"
+        x = Variable('x')
+        y = Variable('y')
+        w = Variable('w')
+        solver = self.new_solver()
+
+        solver.add_stay(x)
+        solver.add_stay(y)
+        solver.add_stay(w)
+        solver.add_constraint(w >= x + y)
+
+        solver.add_edit_var(x)
+        solver.add_edit_var(y)
+
+        with solver.edit():
+            solver.suggest_values({x: 10, y: 20})
+            self.assertAlmostEqual(x.value, 10)
+            self.assertAlmostEqual(y.value, 20)
+            self.assertAlmostEqual(w.value, 30)
+
+            solver.suggest_values([x, y], [50, 60])
+            self.assertAlmostEqual(x.value, 50)
+            self.assertAlmostEqual(y.value, 60)
+            self.assertAlmostEqual(w.value, 110)
+
+            with self.assertRaises(ValueError):
+                solver.suggest_values([x, y], [1])
+
+            # Nothing is changed if any variable isn't being edited.
+            with self.assertRaises(InternalError):
+                solver.suggest_values({x: 1, w: 2})
+            solver.resolve()
+            self.assertAlmostEqual(x.value, 50)
+
+        self.assertAlmostEqual(x.value, 50)
+        self.assertAlmostEqual(y.value, 60)
+        self.assertAlmostEqual(w.value, 110)
+
+    @skipIf(numpy is None, 'NumPy is not installed')
+    def test_suggest_values_numpy(self):
+        "Edit values can be suggested as NumPy arrays"
+        x = Variable('x')
+        y = Variable('y')
+        solver = self.new_solver()
+        solver.add_stay(x)
+        solver.add_stay(y)
+        solver.add_edit_var(x)
+        solver.add_edit_var(y)
+
+        with solver.edit():
+            solver.suggest_values(numpy.array([x, y], dtype=object), numpy.array([1.5, 2.5]))
+            self.assertAlmostEqual(x.value, 1.5)
+            self.assertAlmostEqual(y.value, 2.5)
+
+    def test_fork(self):
+        "A fork can be changed without changing its parent"
+        x = Variable('x', 10)
+        y = Variable('y', 20)
+        w = Variable('w')
+        solver = self.new_solver()
+        solver.add_stay(x)
+        solver.add_stay(y)
+        solver.add_constraint(w == x + y)
+        self.assertAlmostEqual(w.value, 30)
+
+        changes = []
+        solver.add_observer(w, lambda v, old, new: changes.append(new))
+
+        fork = solver.fork()
+        self.assertAlmostEqual(fork.value_for(w), 30)
+
+        fork.add_constraint(x == 50)
+        fork.add_edit_var(y)
+        with fork.edit():
+            fork.suggest_value(y, 5)
+            fork.resolve()
+        self.assertAlmostEqual(fork.value_for(x), 50)
+        self.assertAlmostEqual(fork.value_for(y), 5)
+        self.assertAlmostEqual(fork.value_for(w), 55)
+
+        # The parent, and the variables, are unchanged.
+        self.assertAlmostEqual(x.value, 10)
+        self.assertAlmostEqual(y.value, 20)
+        self.assertAlmostEqual(w.value, 30)
+        self.assertEqual(changes, [])
+        self.assertEqual(solver.value_for(w), w.value)
+
+        # The parent can still be changed, without changing the fork.
+        solver.add_edit_var(x)
+        with solver.edit():
+            solver.suggest_value(x, 0)
+            solver.resolve()
+        self.assertAlmostEqual(x.value, 0)
+        self.assertAlmostEqual(w.value, 20)
+        self.assertEqual(changes, [20])
+        self.assertAlmostEqual(fork.value_for(x), 50)
+        self.assertAlmostEqual(fork.value_for(w), 55)
+
+        # Stays added to a fork hold the fork's values.
+        fork.add_stay(w)
+        grandchild = fork.fork()
+        grandchild.remove_stays([x, y])
+        self.assertAlmostEqual(grandchild.value_for(w), 55)
+
+    def test_merge(self):
+        "Solvers of independent systems can be merged without re-solving"
+        x = Variable('x', 10)
+        y = Variable('y', 20)
+        solver = self.new_solver()
+        solver.add_stay(x)
+        solver.add_stay(y, STRONG, 3.0)
+        solver.add_constraint(x + 10 <= y)
+
+        a = Variable('a', 100)
+        b = Variable('b', 0)
+        other = self.new_solver()
+        other.add_stay(a, MEDIUM)
+        other.add_stay(b)
+        join = other.add_constraint(a == b + 30, STRONG, 2.0)
+        other.add_edit_var(a, persistent=True)
+        solver.add_edit_var(x, persistent=True)
+        self.assertAlmostEqual(b.value, 70)
+
+        # A solver can't be merged during an edit session.
+        other.begin_edit()
+        with self.assertRaises(ValueError):
+            solver.merge(other)
+        other.end_edit()
+
+        optimize_count = solver.optimize_count
+        solver.merge(other)
+        self.assertEqual(solver.optimize_count, optimize_count)
+        self.assertAlmostEqual(x.value, 10)
+        self.assertAlmostEqual(b.value, 70)
+        self.assertEqual(solver.edit_var_map[a].index, 1)
+        self.assertIn(join, solver.constraints_for(b))
+
+        # The internal variables of both solvers have distinct names.
+        names = [v.name for v in list(solver.rows) + list(solver.columns) if not v.is_external]
+        self.assertEqual(len(names), len(set(names)))
+
+        # Both systems can be changed, and coupled.
+        solver.add_constraint(Constraint(b, Constraint.GEQ, y + 100))
+        self.assertAlmostEqual(b.value, 120)
+        self.assertAlmostEqual(a.value, 150)
+        solver.suggest_values({x: 0, a: 200})
+        self.assertAlmostEqual(y.value, 20)
+        self.assertAlmostEqual(b.value, 170)
+        solver.remove_constraint(join)
+        solver.suggest_values({a: 0})
+        self.assertAlmostEqual(a.value, 0)
+        self.assertAlmostEqual(b.value, 170)
+
+        shared = self.new_solver()
+        shared.add_stay(x)
+        with self.assertRaises(ValueError):
+            solver.merge(shared)
+
+        # The merged solver can't be used again.
+        with self.assertRaises(ValueError):
+            other.add_stay(Variable('c'))
+        with self.assertRaises(ValueError):
+            other.resolve()
+        with self.assertRaises(ValueError):
+            solver.merge(other)
+
+    def test_remove_stays(self):
+        "Removing stays at once gives the same values as removing them one at a time"
+        rnd = random.Random(0)
+        for trial in range(20):
+            solver = self.new_solver()
+            v = [Variable('v%s' % i, rnd.uniform(0, 100)) for i in range(30)]
+            for x in v:
+                solver.add_stay(x, rnd.choice([WEAK, MEDIUM]), rnd.uniform(0.5, 2))
+            for i in range(30):
+                a, b = rnd.sample(v, 2)
+                op = rnd.choice([Constraint.GEQ, Constraint.LEQ, Constraint.EQ])
+                solver.add_constraint(
+                    Constraint(a + rnd.uniform(0, 20), op, b),
+                    rnd.choice([STRONG, MEDIUM, WEAK]),
+                    rnd.uniform(0.5, 2),
+                )
+            edited = rnd.sample(v, 2)
+            for x in edited:
+                solver.add_edit_var(x)
+            with solver.edit():
+                for x in edited:
+                    solver.suggest_value(x, rnd.uniform(0, 200))
+
+            # Removing a stay can leave a nonzero constant in the row of
+            # another stay's error variable.
+            removed = rnd.sample(v, 10)
+            at_once = solver.fork()
+            at_once.remove_stays(removed)
+            one_at_a_time = solver.fork()
+            with one_at_a_time.batch():
+                for x in removed:
+                    for cn in list(one_at_a_time.stay_constraints[x]):
+                        one_at_a_time.remove_constraint(cn)
+
+            for x in v:
+                self.assertAlmostEqual(at_once.value_for(x), one_at_a_time.value_for(x))
+
     def test_multiedit2(self):
 
         x = Variable('x')
@@ -429,7 +646,7 @@ class EndToEndTestCase(TestCase):
         w = Variable('w')
         h = Variable('h')
 
-        solver = SimplexSolver()
+        solver = self.new_solver()
         solver.add_stay(x)
         solver.add_stay(y)
         solver.add_stay(w)
@@ -485,7 +702,7 @@ class EndToEndTestCase(TestCase):
         left = Variable('left')
         right = Variable('right')
 
-        solver = SimplexSolver()
+        solver = self.new_solver()
 
         iw = Variable('window_innerWidth', random.randrange(MIN, MAX))
         ih = Variable('window_innerHeight', random.randrange(MIN, MAX))
@@ -523,7 +740,7 @@ class EndToEndTestCase(TestCase):
             self.assertGreaterEqual(right.value, MIN)
 
     def test_error_weights(self):
-        solver = SimplexSolver()
+        solver = self.new_solver()
 
         x = Variable('x', 100)
         y = Variable('y', 200)
@@ -550,7 +767,7 @@ class EndToEndTestCase(TestCase):
     def test_quadrilateral(self):
         "A simple version of the quadrilateral test"
 
-        solver = SimplexSolver()
+        solver = self.new_solver()
 
         class Point(object):
             def __init__(self, identifier, x, y):
@@ -661,7 +878,7 @@ class EndToEndTestCase(TestCase):
             def __repr__(self):
                 return u'(%s:%s)' % (self.left.value, self.width.value)
 
-        solver = SimplexSolver()
+        solver = self.new_solver()
 
         b1 = Button('b1')
         b2 = Button('b2')
@@ -735,7 +952,7 @@ class EndToEndTestCase(TestCase):
 
     def test_paper_example(self):
 
-        solver = SimplexSolver()
+        solver = self.new_solver()
 
         left = Variable('left')
         middle = Variable('middle')
@@ -768,3 +985,24 @@ class EndToEndTestCase(TestCase):
         self.assertAlmostEqual(left.value, 40)
         self.assertAlmostEqual(middle.value, 45)
         self.assertAlmostEqual(right.value, 50)
+
+
+@skipIf(numpy is None, 'NumPy is not installed')
+class DenseEndToEndTestCase(EndToEndTestCase):
+    "Run the end-to-end tests against the dense NumPy tableau."
+    backend = 'dense'
+
+
+class DantzigEndToEndTestCase(EndToEndTestCase):
+    "Run the end-to-end tests using Dantzig's pricing rule."
+    pricing = 'dantzig'
+
+
+class PartialEndToEndTestCase(EndToEndTestCase):
+    "Run the end-to-end tests using partial pricing."
+    pricing = 'partial'
+
+
+class DevexEndToEndTestCase(EndToEndTestCase):
+    "Run the end-to-end tests using devex pricing."
+    pricing = 'devex'
@@ -1,10 +1,19 @@
 from __future__ import print_function, unicode_literals, absolute_import, division
 
+from array import array
 from unittest import TestCase
 if not hasattr(TestCase, 'assertIsNotNone'):
     # For Python2.6 compatibility
-    from unittest2 import TestCase
+    from unittest2 import TestCase, skipIf
+else:
+    from unittest import skipIf
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import cassowary
 from cassowary import InternalError, Variable
 
 # Internals
@@ -110,6 +119,114 @@ class ExpressionTestCase(TestCase):
         self.assertExpressionEqual(Expression(constant=2) * Expression(y, 10, 5), '10.0 + 20.0*y[42.0]')
         self.assertExpressionEqual(Expression(constant=2) * Expression(y, 10), '20.0*y[42.0]')
 
+    def test_inplace_add(self):
+        x = Variable('x', 167)
+        y = Variable('y', 42)
+
+        expr = Expression(x)
+        original = expr
+        expr += 2
+        expr += y
+        expr += Expression(x, 2, 3)
+        self.assertIs(expr, original)
+        self.assertExpressionEqual(expr, '5.0 + 3.0*x[167.0] + y[42.0]')
+
+        # Adding an expression to itself doubles it
+        expr += expr
+        self.assertExpressionEqual(expr, '10.0 + 6.0*x[167.0] + 2.0*y[42.0]')
+
+        with self.assertRaises(TypeError):
+            expr += object()
+
+    def test_inplace_sub(self):
+        x = Variable('x', 167)
+        y = Variable('y', 42)
+
+        expr = Expression(x, 3, 5)
+        original = expr
+        expr -= 2
+        expr -= y
+        expr -= Expression(x, 1, 1)
+        self.assertIs(expr, original)
+        self.assertExpressionEqual(expr, '2.0 + 2.0*x[167.0] + -1.0*y[42.0]')
+
+        # Subtracting an expression from itself cancels every term
+        expr -= expr
+        self.assertExpressionEqual(expr, '0.0')
+
+    def test_inplace_mul(self):
+        x = Variable('x', 167)
+        y = Variable('y', 42)
+
+        expr = Expression(x, 3, 5)
+        original = expr
+        expr *= 2
+        expr *= Expression(constant=0.5)
+        self.assertIs(expr, original)
+        self.assertExpressionEqual(expr, '5.0 + 3.0*x[167.0]')
+
+        # Multiplication that needs a new expression falls back to __mul__
+        expr = Expression(constant=2)
+        expr *= y
+        self.assertExpressionEqual(expr, '2.0*y[42.0]')
+        with self.assertRaises(TypeError):
+            expr *= Expression(x)
+
+    def test_sum(self):
+        x = Variable('x', 167)
+        y = Variable('y', 42)
+
+        self.assertExpressionEqual(cassowary.sum_terms([]), '0.0')
+        self.assertExpressionEqual(cassowary.sum_terms([x, y, x, 3]), '3.0 + 2.0*x[167.0] + y[42.0]')
+        self.assertExpressionEqual(cassowary.sum_terms(v for v in [x, Expression(y, 2, 1)]), '1.0 + x[167.0] + 2.0*y[42.0]')
+
+        # Terms can be scaled by coefficients
+        self.assertExpressionEqual(cassowary.sum_terms([x, y, 2], [3, -1, 0.5]), '1.0 + 3.0*x[167.0] + -1.0*y[42.0]')
+
+        # Terms that cancel are dropped
+        self.assertExpressionEqual(cassowary.sum_terms([x, y, x], [1, 1, -1]), 'y[42.0]')
+
+        with self.assertRaises(ValueError):
+            cassowary.sum_terms([x, y], [1])
+        with self.assertRaises(TypeError):
+            cassowary.sum_terms([x, object()])
+
+        # cassowary.sum() is the same function, but isn't star-imported.
+        self.assertIs(cassowary.sum, cassowary.sum_terms)
+        self.assertNotIn('sum', cassowary.__all__)
+
+    def test_from_arrays(self):
+        x = Variable('x', 167)
+        y = Variable('y', 42)
+        z = Variable('z', 2)
+
+        expr = Expression.from_arrays([x, y], [2, 3], 4)
+        self.assertExpressionEqual(expr, '4.0 + 2.0*x[167.0] + 3.0*y[42.0]')
+        self.assertIsInstance(expr.terms[x], float)
+
+        # Buffers are accepted; zero terms are dropped
+        expr = Expression.from_arrays((x, y, z), array('d', [1.0, 0.0, -1.0]))
+        self.assertExpressionEqual(expr, 'x[167.0] + -1.0*z[2.0]')
+        expr = Expression.from_arrays((x, y, z), [1.0, 1e-12, -1e-10])
+        self.assertExpressionEqual(expr, 'x[167.0]')
+
+        # Repeated variables are combined
+        expr = Expression.from_arrays([x, y, x], [1, 1, -1])
+        self.assertExpressionEqual(expr, 'y[42.0]')
+
+        with self.assertRaises(ValueError):
+            Expression.from_arrays([x, y], [1])
+
+    @skipIf(numpy is None, 'NumPy is not installed')
+    def test_from_numpy_arrays(self):
+        x = Variable('x', 167)
+        y = Variable('y', 42)
+
+        variables = numpy.array([x, y], dtype=object)
+        expr = Expression.from_arrays(variables, numpy.array([2, 3]), numpy.float64(4))
+        self.assertExpressionEqual(expr, '4.0 + 2.0*x[167.0] + 3.0*y[42.0]')
+        self.assertIsInstance(expr.terms[y], float)
+
     def test_complex_math(self):
         x = Variable('x', 167)
         y = Variable('y', 2)
@@ -0,0 +1,190 @@
+from __future__ import print_function, unicode_literals, absolute_import, division
+
+from unittest import TestCase
+if not hasattr(TestCase, 'assertIsNotNone'):
+    # For Python2.6 compatibility
+    from unittest2 import TestCase
+
+from cassowary import ParallelSolver, SimplexSolver, Variable, ConstraintNotFound, InternalError, RequiredFailure, STRONG, WEAK
+
+# Internals
+from cassowary.expression import Constraint
+
+
+class ParallelSolverTestCase(TestCase):
+    def setUp(self):
+        self.solver = ParallelSolver(2)
+
+    def tearDown(self):
+        self.solver.close()
+
+    def build(self, solver):
+        "Two independent rows of two boxes."
+        rows = []
+        for row in range(2):
+            a = Variable('a%s' % row, 0)
+            b = Variable('b%s' % row, 100)
+            solver.add_stay(a)
+            solver.add_stay(b)
+            solver.add_constraint(Constraint(a + 50, Constraint.LEQ, b))
+            rows.append((a, b))
+        return rows
+
+    def test_workers(self):
+        "Independent components are given to different workers"
+        solver = self.solver
+        (a0, b0), (a1, b1) = self.build(solver)
+
+        self.assertEqual(solver.worker_for(a0), solver.worker_for(b0))
+        self.assertNotEqual(solver.worker_for(a0), solver.worker_for(a1))
+        self.assertIsNone(solver.worker_for(Variable('c')))
+
+        solver.add_constraint(Constraint(a1, Constraint.EQ, 30))
+        self.assertAlmostEqual(a1.value, 30)
+        self.assertAlmostEqual(b1.value, 100)
+
+    def test_migrate(self):
+        "A constraint joining components in different workers moves one of them"
+        solver = self.solver
+        (a0, b0), (a1, b1) = self.build(solver)
+        solver.add_constraint(Constraint(a1, Constraint.EQ, 130, STRONG))
+
+        solver.add_constraint(Constraint(b0, Constraint.GEQ, a1))
+        self.assertEqual(solver.worker_for(a0), solver.worker_for(b1))
+        self.assertAlmostEqual(a1.value, 130)
+        self.assertAlmostEqual(b0.value, 130)
+        # The stays hold their variables where they were.
+        self.assertAlmostEqual(a0.value, 0)
+        self.assertAlmostEqual(b1.value, 180)
+
+    def test_migrate_unplaced(self):
+        "A component that hasn't been sent joins the worker the others are moved to"
+        results = []
+        for solver in (SimplexSolver(), ParallelSolver(3)):
+            a = [Variable('a%s' % i) for i in range(3)]
+            b = [Variable('b%s' % i) for i in range(2)]
+            c = [Variable('c%s' % i) for i in range(10)]
+            solver.add_constraint(Constraint(a[0], Constraint.EQ, 5))
+            solver.add_constraint(Constraint(a[1], Constraint.EQ, a[0] + 1))
+            solver.add_constraint(Constraint(a[2], Constraint.EQ, a[1] + 1))
+            solver.add_constraint(Constraint(b[0], Constraint.EQ, 3))
+            solver.add_constraint(Constraint(b[1], Constraint.EQ, b[0] * 3))
+            with solver.batch():
+                for x, y in zip(c, c[1:]):
+                    solver.add_constraint(Constraint(y, Constraint.EQ, x + 1))
+                solver.add_constraint(Constraint(c[0] + b[1] + a[2], Constraint.EQ, 100))
+            results.append([v.value for v in a + b + c])
+            if isinstance(solver, ParallelSolver):
+                self.assertEqual(len(set(solver.worker_for(v) for v in a + b + c)), 1)
+                self.assertEqual(sorted(solver.loads), [0, 0, 15])
+                solver.close()
+
+        self.assertAlmostEqual(results[0][2], 7)
+        self.assertAlmostEqual(results[0][5], 84)
+        for expected, value in zip(*results):
+            self.assertAlmostEqual(value, expected)
+
+    def test_remove_constraint(self):
+        solver = self.solver
+        (a0, b0), (a1, b1) = self.build(solver)
+        cn = solver.add_constraint(Constraint(b0, Constraint.EQ, 20, STRONG))
+        self.assertAlmostEqual(a0.value, -30)
+
+        solver.remove_constraint(cn)
+        solver.add_constraint(Constraint(a0, Constraint.EQ, 10))
+        self.assertAlmostEqual(a0.value, 10)
+        self.assertAlmostEqual(b0.value, 60)
+
+        with self.assertRaises(ConstraintNotFound):
+            solver.remove_constraint(cn)
+
+        self.assertEqual(len(solver.remove_stays([a1, b1])), 2)
+        self.assertEqual(len(solver.remove_stays([a1])), 0)
+
+    def test_edit(self):
+        "An edit session spans workers, and keeps persistent edit variables"
+        solver = self.solver
+        (a0, b0), (a1, b1) = self.build(solver)
+        solver.add_edit_var(a0, persistent=True)
+
+        solver.add_edit_var(a1)
+        with solver.edit():
+            solver.suggest_values([a0, a1], [10, 80])
+        self.assertAlmostEqual(a0.value, 10)
+        self.assertAlmostEqual(a1.value, 80)
+        self.assertAlmostEqual(b1.value, 130)
+        self.assertEqual(solver.edit_vars, [a0])
+
+        solver.suggest_value(a0, 25)
+        solver.resolve()
+        self.assertAlmostEqual(a0.value, 25)
+
+        with self.assertRaises(InternalError):
+            solver.suggest_value(b1, 20)
+
+    def test_add_edit_var_twice(self):
+        "Adding an existing edit variable returns its edit constraint"
+        solver = self.solver
+        (a0, b0), (a1, b1) = self.build(solver)
+        cn = solver.add_edit_var(b0, persistent=True)
+        self.assertIs(solver.add_edit_var(b0), cn)
+        self.assertEqual(solver.edit_vars, [b0])
+
+        with solver.edit():
+            solver.suggest_value(b0, 70)
+        self.assertAlmostEqual(b0.value, 70)
+        self.assertEqual(solver.edit_vars, [b0])
+
+    def test_remove_unsent_stays(self):
+        "Stays removed before they are sent to a worker are returned"
+        solver = self.solver
+        x = Variable('x', 10)
+        with solver.batch():
+            stay = solver.add_stay(x)
+            self.assertIsNone(solver.worker_for(x))
+            self.assertEqual(solver.remove_stays([x]), [stay])
+        self.assertIsNone(solver.worker_for(x))
+
+    def test_batch(self):
+        "Changes in a batch are sent when the batch ends"
+        solver = self.solver
+        with solver.batch():
+            (a0, b0), (a1, b1) = self.build(solver)
+            solver.add_constraint(Constraint(b0, Constraint.EQ, a1))
+            solver.add_constraint(Constraint(b0, Constraint.EQ, 70))
+            self.assertEqual(b0.value, 100)
+        self.assertTrue(solver.auto_solve)
+        self.assertAlmostEqual(b0.value, 70)
+        self.assertAlmostEqual(a1.value, 70)
+
+    def test_required_failure(self):
+        "A required constraint that can't be satisfied is forgotten"
+        solver = self.solver
+        a = Variable('a')
+        solver.add_constraint(Constraint(a, Constraint.EQ, 10))
+        with self.assertRaises(RequiredFailure):
+            solver.add_constraint(Constraint(a, Constraint.EQ, 20))
+        self.assertAlmostEqual(a.value, 10)
+
+        # The solver can still be used.
+        b = Variable('b')
+        solver.add_constraint(Constraint(b, Constraint.EQ, a + 5))
+        self.assertAlmostEqual(b.value, 15)
+
+    def test_same_values(self):
+        "A parallel solver finds the same values as a SimplexSolver"
+        results = []
+        for solver in (SimplexSolver(), self.solver):
+            (a0, b0), (a1, b1) = self.build(solver)
+            join = solver.add_constraint(Constraint(b0 + 20, Constraint.LEQ, a1, STRONG))
+            solver.add_constraint(Constraint(b1, Constraint.LEQ, 120, WEAK))
+            solver.add_edit_var(b0)
+            with solver.edit():
+                solver.suggest_value(b0, 90)
+                solver.resolve()
+            solver.remove_constraint(join)
+            solver.add_constraint(Constraint(a0, Constraint.GEQ, 5))
+            results.append([v.value for v in (a0, b0, a1, b1)])
+
+        for expected, value in zip(*results):
+            self.assertAlmostEqual(value, expected)
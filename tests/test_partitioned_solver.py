@@ -0,0 +1,173 @@
+from __future__ import print_function, unicode_literals, absolute_import, division
+
+from unittest import TestCase
+if not hasattr(TestCase, 'assertIsNotNone'):
+    # For Python2.6 compatibility
+    from unittest2 import TestCase
+
+from cassowary import PartitionedSolver, SimplexSolver, Variable, ConstraintNotFound, InternalError, RequiredFailure, STRONG, WEAK
+
+# Internals
+from cassowary.expression import Constraint
+
+
+class PartitionedSolverTestCase(TestCase):
+    def build(self, solver):
+        "Two independent rows of two boxes."
+        rows = []
+        for row in range(2):
+            a = Variable('a%s' % row, 0)
+            b = Variable('b%s' % row, 100)
+            solver.add_stay(a)
+            solver.add_stay(b)
+            solver.add_constraint(Constraint(a + 50, Constraint.LEQ, b))
+            rows.append((a, b))
+        return rows
+
+    def test_components(self):
+        "Independent constraints are kept in separate solvers"
+        solver = PartitionedSolver()
+        (a0, b0), (a1, b1) = self.build(solver)
+
+        self.assertEqual(len(solver.components()), 2)
+        self.assertIs(solver.solver_for(a0), solver.solver_for(b0))
+        self.assertIsNot(solver.solver_for(a0), solver.solver_for(a1))
+        self.assertIsNone(solver.solver_for(Variable('c')))
+
+    def test_merge(self):
+        "A constraint joining two components merges them"
+        solver = PartitionedSolver()
+        (a0, b0), (a1, b1) = self.build(solver)
+
+        solver.add_constraint(Constraint(b0, Constraint.LEQ, a1))
+        self.assertEqual(len(solver.components()), 1)
+        self.assertIs(solver.solver_for(a0), solver.solver_for(b1))
+        self.assertLessEqual(b0.value, a1.value)
+
+    def test_split(self):
+        "Removing the only constraint joining two parts splits the component"
+        solver = PartitionedSolver()
+        (a0, b0), (a1, b1) = self.build(solver)
+        cn = solver.add_constraint(Constraint(b0, Constraint.GEQ, a1 + 200, STRONG))
+
+        solver.remove_constraint(cn)
+        self.assertEqual(len(solver.components()), 2)
+        self.assertIsNot(solver.solver_for(a0), solver.solver_for(a1))
+
+        # Both parts can still be changed.
+        solver.add_constraint(Constraint(a1, Constraint.EQ, 30))
+        solver.add_constraint(Constraint(b0, Constraint.EQ, 70))
+        self.assertAlmostEqual(a1.value, 30)
+        self.assertAlmostEqual(b1.value, 100)
+        self.assertAlmostEqual(b0.value, 70)
+
+        with self.assertRaises(ConstraintNotFound):
+            solver.remove_constraint(cn)
+
+    def test_merge_failure(self):
+        "Components stay separate when the constraint joining them fails"
+        solver = PartitionedSolver()
+        a = Variable('a')
+        b = Variable('b')
+        solver.add_constraint(Constraint(a, Constraint.EQ, 1))
+        solver.add_constraint(Constraint(b, Constraint.EQ, 2))
+
+        with self.assertRaises(RequiredFailure):
+            solver.add_constraint(Constraint(a + b, Constraint.EQ, 10))
+        self.assertEqual(len(solver.components()), 2)
+        self.assertIsNot(solver.solver_for(a), solver.solver_for(b))
+
+        solver.add_constraint(Constraint(b, Constraint.LEQ, 5))
+        self.assertAlmostEqual(a.value, 1)
+        self.assertAlmostEqual(b.value, 2)
+
+        # A failed constraint with no variables leaves no component.
+        c = Variable('c')
+        with self.assertRaises(RequiredFailure):
+            solver.add_constraint(Constraint(c + 1, Constraint.EQ, c))
+        self.assertEqual(len(solver.components()), 2)
+        self.assertEqual(len(solver.parent), 2)
+
+    def test_add_edit_var_twice(self):
+        "Adding an existing edit variable returns its edit constraint"
+        solver = PartitionedSolver()
+        (a0, b0), (a1, b1) = self.build(solver)
+        cn = solver.add_edit_var(b0, persistent=True)
+        self.assertIs(solver.add_edit_var(b0), cn)
+        self.assertEqual(solver.edit_vars, [b0])
+
+        with solver.edit():
+            solver.suggest_value(b0, 70)
+        self.assertAlmostEqual(b0.value, 70)
+        self.assertEqual(solver.edit_vars, [b0])
+
+    def test_remove_stays(self):
+        "A component is dropped when its last constraint is removed"
+        solver = PartitionedSolver()
+        a = Variable('a', 10)
+        solver.add_stay(a)
+        self.assertEqual(len(solver.remove_stays([a])), 1)
+        self.assertEqual(solver.components(), [])
+        self.assertIsNone(solver.solver_for(a))
+
+    def test_suggest_value(self):
+        "Resolving only changes the component with new values"
+        solver = PartitionedSolver()
+        (a0, b0), (a1, b1) = self.build(solver)
+        other = solver.solver_for(a1)
+        optimize_count = other.optimize_count
+
+        solver.add_edit_var(b0, persistent=True)
+        solver.suggest_value(b0, 20)
+        solver.resolve()
+        self.assertAlmostEqual(b0.value, 20)
+        self.assertAlmostEqual(a0.value, -30)
+        self.assertEqual(other.optimize_count, optimize_count)
+
+        with self.assertRaises(InternalError):
+            solver.suggest_value(b1, 20)
+
+    def test_edit(self):
+        "An edit session spans components, and keeps persistent edit variables"
+        solver = PartitionedSolver()
+        (a0, b0), (a1, b1) = self.build(solver)
+        solver.add_edit_var(a0, persistent=True)
+
+        solver.add_edit_var(a1)
+        with solver.edit():
+            solver.suggest_values([a0, a1], [10, 80])
+        self.assertAlmostEqual(a0.value, 10)
+        self.assertAlmostEqual(a1.value, 80)
+        self.assertAlmostEqual(b1.value, 130)
+        self.assertEqual(solver.edit_vars, [a0])
+
+        solver.suggest_values({a0: 25})
+        self.assertAlmostEqual(a0.value, 25)
+
+    def test_batch(self):
+        "Changes in a batch are solved together"
+        solver = PartitionedSolver()
+        with solver.batch():
+            (a0, b0), (a1, b1) = self.build(solver)
+            solver.add_constraint(Constraint(b0, Constraint.EQ, a1))
+            self.assertFalse(solver.solvers[solver.find(a0)].auto_solve)
+        self.assertTrue(solver.auto_solve)
+        self.assertAlmostEqual(b0.value, a1.value)
+
+    def test_same_values(self):
+        "A partitioned solver finds the same values as a SimplexSolver"
+        results = []
+        for solver in (SimplexSolver(), PartitionedSolver()):
+            (a0, b0), (a1, b1) = self.build(solver)
+            join = solver.add_constraint(Constraint(b0 + 20, Constraint.LEQ, a1, STRONG))
+            solver.add_constraint(Constraint(b1, Constraint.LEQ, 120, WEAK))
+            solver.add_edit_var(b0)
+            with solver.edit():
+                solver.suggest_value(b0, 90)
+                solver.resolve()
+            solver.remove_constraint(join)
+            solver.add_constraint(Constraint(a0, Constraint.GEQ, 5))
+            results.append([v.value for v in (a0, b0, a1, b1)])
+
+        for expected, value in zip(*results):
+            self.assertAlmostEqual(value, expected)
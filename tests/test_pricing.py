@@ -0,0 +1,73 @@
+from __future__ import print_function, unicode_literals, absolute_import, division
+
+from unittest import TestCase
+if not hasattr(TestCase, 'assertIsNotNone'):
+    # For Python2.6 compatibility
+    from unittest2 import TestCase
+
+from cassowary import SimplexSolver, Variable, STRONG
+
+# Internals
+from cassowary.expression import Constraint, Expression, SlackVariable
+from cassowary.pricing import BlandPricing, DantzigPricing, DevexPricing, PartialPricing, PRICING
+
+
+class PricingTestCase(TestCase):
+    def build(self, pricing):
+        solver = SimplexSolver(pricing=pricing)
+        x = Variable('x', 5)
+        y = Variable('y', 10)
+        solver.add_stay(x)
+        solver.add_stay(y)
+        solver.add_constraint(Constraint(x + y, Constraint.EQ, 40))
+        solver.add_constraint(Constraint(x, Constraint.GEQ, 30, strength=STRONG))
+        return solver, x, y
+
+    def test_default(self):
+        "Bland's rule is used by default"
+        solver = SimplexSolver()
+        self.assertIsInstance(solver.pricing, BlandPricing)
+
+    def test_by_name(self):
+        "Pricing strategies can be selected by name"
+        for name, cls in PRICING.items():
+            self.assertIsInstance(SimplexSolver(pricing=name).pricing, cls)
+
+    def test_instance(self):
+        "A pricing strategy can be provided as an instance"
+        pricing = PartialPricing(size=2)
+        solver = SimplexSolver(pricing=pricing)
+        self.assertIs(solver.pricing, pricing)
+
+    def test_unknown(self):
+        "An unknown pricing strategy is an error"
+        with self.assertRaises(ValueError):
+            SimplexSolver(pricing='fastest')
+
+    def test_strategies(self):
+        "Every strategy finds the same solution, and counts its pivots"
+        for pricing in (BlandPricing(), DantzigPricing(), PartialPricing(size=1), DevexPricing()):
+            solver, x, y = self.build(pricing)
+            self.assertAlmostEqual(x.value, 30)
+            self.assertAlmostEqual(y.value, 10)
+            self.assertGreater(pricing.pivots, 0)
+
+    def test_degenerate_fallback(self):
+        "After too many degenerate pivots, Bland's rule is used"
+        pricing = DantzigPricing()
+        pricing.degenerate_limit = 0
+        solver, x, y = self.build(pricing)
+        self.assertAlmostEqual(x.value, 30)
+        self.assertAlmostEqual(y.value, 10)
+
+    def test_devex_zero_score(self):
+        "Devex chooses a candidate even when its score is zero"
+        pricing = DevexPricing()
+        solver = SimplexSolver(pricing=pricing)
+        s1 = SlackVariable(prefix='s', number=1)
+        s2 = SlackVariable(prefix='s', number=2)
+        solver.rows[solver.objective] = Expression(s2, -1.0)
+        solver.rows[solver.objective].set_variable(s1, -1.0)
+        pricing.weights[s1] = float('inf')
+        pricing.weights[s2] = float('inf')
+        self.assertIs(pricing.choose(solver, solver.objective), s1)
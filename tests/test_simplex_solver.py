@@ -5,10 +5,11 @@ if not hasattr(TestCase, 'assertIsNotNone'):
     # For Python2.6 compatibility
     from unittest2 import TestCase
 
-from cassowary import Variable, SimplexSolver, STRONG, REQUIRED
+from cassowary import ConstraintNotFound, RequiredFailure, Variable, SimplexSolver, STRONG, REQUIRED, WEAK
 
 # internals
-from cassowary.expression import Constraint
+from cassowary.expression import Constraint, StayConstraint
+from cassowary.utils import EPSILON
 
 
 class SimplexSolverTestCase(TestCase):
@@ -67,3 +68,493 @@ class SimplexSolverTestCase(TestCase):
         self.assertEqual(a.value, 10)
         self.assertEqual(b.value, 10)
 
+
+    def test_add_constraints_from_matrix(self):
+        "A sparse system of constraints can be added in one call"
+        solver = SimplexSolver()
+        x = Variable(name='x', value=5)
+        y = Variable(name='y', value=10)
+
+        # x + y == 30; x - y >= 4; y == 20 (weak)
+        constraints = solver.add_constraints_from_matrix(
+            [x, y],
+            [0, 2, 4, 5],
+            [0, 1, 0, 1, 1],
+            [1.0, 1.0, 1.0, -1.0, 1.0],
+            [Constraint.EQ, Constraint.GEQ, Constraint.EQ],
+            [30, 4, 20],
+            strengths=[REQUIRED, REQUIRED, WEAK],
+        )
+
+        self.assertEqual(len(constraints), 3)
+        self.assertFalse(constraints[0].is_inequality)
+        self.assertTrue(constraints[1].is_inequality)
+        self.assertEqual(constraints[2].strength, WEAK)
+        self.assertAlmostEqual(x.value, 17)
+        self.assertAlmostEqual(y.value, 13)
+        self.assertTrue(solver.auto_solve)
+
+        # Constraints can be removed individually afterwards
+        solver.remove_constraint(constraints[1])
+        self.assertAlmostEqual(x.value, 10)
+        self.assertAlmostEqual(y.value, 20)
+
+    def test_add_constraints_from_matrix_mismatched(self):
+        "Every row of a sparse system needs an operator and a right hand side"
+        solver = SimplexSolver()
+        x = Variable(name='x', value=5)
+
+        with self.assertRaises(ValueError):
+            solver.add_constraints_from_matrix([x], [0, 1], [0], [1.0], [Constraint.EQ], [1, 2])
+
+    def test_batch(self):
+        "Optimization is deferred until the end of a batch"
+        solver = SimplexSolver()
+        x = Variable(name='x', value=5)
+        y = Variable(name='y', value=10)
+
+        with solver.batch():
+            self.assertFalse(solver.auto_solve)
+            solver.add_stay(y)
+            solver.add_constraint(Constraint(x, Constraint.GEQ, y + 5))
+            with solver.batch():
+                solver.add_constraint(Constraint(x, Constraint.LEQ, 100))
+            # An inner batch doesn't solve the system
+            self.assertTrue(solver.needs_solving)
+            self.assertAlmostEqual(x.value, 5)
+
+        self.assertTrue(solver.auto_solve)
+        self.assertFalse(solver.needs_solving)
+        self.assertAlmostEqual(x.value, 15)
+        self.assertAlmostEqual(y.value, 10)
+
+    def test_batch_without_auto_solve(self):
+        "A batch doesn't solve a system that isn't automatically solved"
+        solver = SimplexSolver()
+        solver.auto_solve = False
+        x = Variable(name='x', value=5)
+
+        with solver.batch():
+            solver.add_constraint(Constraint(x, Constraint.GEQ, 10))
+
+        self.assertFalse(solver.auto_solve)
+        self.assertTrue(solver.needs_solving)
+        solver.solve()
+        self.assertAlmostEqual(x.value, 10)
+
+    def test_batch_exception(self):
+        "Solver state is restored if an exception escapes a batch"
+        solver = SimplexSolver()
+        x = Variable(name='x', value=5)
+
+        with self.assertRaises(RequiredFailure):
+            with solver.batch():
+                solver.add_constraint(Constraint(x, Constraint.GEQ, 10))
+                solver.add_constraint(Constraint(x, Constraint.LEQ, 5))
+
+        self.assertTrue(solver.auto_solve)
+        self.assertTrue(solver.needs_solving)
+        solver.solve()
+        self.assertAlmostEqual(x.value, 10)
+
+    def test_entering_variable(self):
+        "The entering variable index agrees with a scan of the objective"
+        solver = SimplexSolver()
+        x = Variable(name='x', value=5)
+        y = Variable(name='y', value=10)
+
+        def check():
+            z_row = solver.rows[solver.objective]
+            candidates = [
+                v for v, c in z_row.terms.items()
+                if v.is_pivotable and c < -EPSILON
+            ]
+            expected = min(candidates, key=lambda v: v.ordinal) if candidates else None
+            self.assertEqual(solver.pricing.entering_variable(solver, solver.objective), expected)
+
+        solver.add_stay(x)
+        solver.add_stay(y)
+        check()
+        solver.add_constraint(Constraint(x + y, Constraint.EQ, 40))
+        check()
+        solver.add_constraint(Constraint(x, Constraint.GEQ, 30, strength=STRONG))
+        check()
+        self.assertAlmostEqual(x.value, 30)
+        self.assertAlmostEqual(y.value, 10)
+
+    def test_changed_external_vars(self):
+        "Only variables affected by a change are updated"
+        solver = SimplexSolver()
+        x = Variable(name='x', value=10)
+        y = Variable(name='y', value=20)
+        z = Variable(name='z', value=30)
+
+        solver.add_stay(x)
+        solver.add_stay(y)
+        solver.add_stay(z)
+        solver.add_constraint(Constraint(y, Constraint.GEQ, x + 5))
+        self.assertEqual(len(solver.changed_external_vars), 0)
+
+        # z is not affected by the edit, so its value isn't written.
+        z.value = 99
+
+        solver.add_edit_var(x)
+        with solver.edit():
+            solver.suggest_value(x, 50)
+            solver.resolve()
+
+        self.assertEqual(len(solver.changed_external_vars), 0)
+        self.assertAlmostEqual(x.value, 50)
+        self.assertAlmostEqual(y.value, 55)
+        self.assertAlmostEqual(z.value, 99)
+
+    def test_changed_stay_vars(self):
+        "Only stays whose rows were written are reset"
+        solver = SimplexSolver()
+        x = Variable(name='x', value=10)
+        y = Variable(name='y', value=20)
+        z = Variable(name='z', value=30)
+
+        solver.add_stay(x)
+        solver.add_stay(y)
+        solver.add_stay(z)
+        solver.add_constraint(Constraint(y, Constraint.GEQ, x + 5))
+        self.assertEqual(len(solver.stay_vars), 6)
+
+        solver.add_edit_var(x)
+        with solver.edit():
+            self.assertEqual(len(solver.changed_stay_vars), 0)
+            solver.suggest_value(x, 50)
+            solver.resolve()
+            self.assertEqual(len(solver.changed_stay_vars), 0)
+            for p_var, m_var in solver.stay_error_vars.values():
+                for v in (p_var, m_var):
+                    if v in solver.rows:
+                        self.assertEqual(solver.rows[v].constant, 0.0)
+
+        self.assertAlmostEqual(x.value, 50)
+        self.assertAlmostEqual(y.value, 55)
+        self.assertAlmostEqual(z.value, 30)
+
+        solver.remove_stays([x, y, z])
+        self.assertEqual(len(solver.stay_vars), 0)
+        self.assertEqual(len(solver.changed_stay_vars), 0)
+
+    def test_observers(self):
+        "Observers are told about changes in value"
+        solver = SimplexSolver()
+        x = Variable(name='x', value=10)
+        y = Variable(name='y', value=20)
+        z = Variable(name='z', value=30)
+        solver.add_stay(x)
+        solver.add_stay(y)
+        solver.add_stay(z)
+        solver.add_constraint(Constraint(y, Constraint.GEQ, x + 5))
+
+        x_changes = []
+        z_changes = []
+        batches = []
+
+        def x_observer(v, old, new):
+            x_changes.append((v, old, new))
+
+        solver.add_observer(x, x_observer)
+        solver.add_observer(z, lambda v, old, new: z_changes.append((v, old, new)))
+        solver.add_change_listener(batches.append)
+
+        solver.add_edit_var(x)
+        with solver.edit():
+            solver.suggest_value(x, 50)
+            solver.resolve()
+
+        self.assertEqual(x_changes, [(x, 10, 50)])
+        self.assertEqual(z_changes, [])
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(sorted(batches[0], key=lambda change: change[0].name), [(x, 10, 50), (y, 20, 55)])
+
+        # Changes below the tolerance aren't reported.
+        solver.change_tolerance = 1.0
+        solver.add_edit_var(x)
+        with solver.edit():
+            solver.suggest_value(x, 50.5)
+            solver.resolve()
+        self.assertEqual(len(x_changes), 1)
+        self.assertEqual(len(batches), 1)
+        self.assertAlmostEqual(x.value, 50.5)
+
+        # Observers can be removed.
+        solver.remove_observer(x, x_observer)
+        solver.remove_change_listener(batches.append)
+        solver.add_edit_var(x)
+        with solver.edit():
+            solver.suggest_value(x, 0)
+            solver.resolve()
+        self.assertEqual(len(x_changes), 1)
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(list(solver.observers), [z])
+
+    def test_persistent_edit_vars(self):
+        "Persistent edit variables survive the end of an edit session"
+        solver = SimplexSolver()
+        x = Variable('x', 10)
+        y = Variable('y', 20)
+        solver.add_stay(x)
+        solver.add_stay(y)
+        solver.add_constraint(x + 10 <= y)
+
+        cn = solver.add_edit_var(x, persistent=True)
+        self.assertIs(solver.add_edit_var(x, persistent=True), cn)
+        self.assertTrue(solver.edit_var_map[x].persistent)
+
+        solver.add_edit_var(y)
+        with solver.edit():
+            solver.suggest_value(x, 30)
+            solver.suggest_value(y, 50)
+            solver.resolve()
+        self.assertAlmostEqual(x.value, 30)
+        self.assertAlmostEqual(y.value, 50)
+        self.assertEqual(list(solver.edit_var_map), [x])
+        self.assertEqual(solver.edit_var_map[x].index, 0)
+
+        # The persistent variable can be edited outside a session...
+        solver.suggest_value(x, 60)
+        solver.resolve()
+        self.assertAlmostEqual(x.value, 60)
+        self.assertAlmostEqual(y.value, 70)
+
+        # ... and by set_edited_value(), which leaves it registered.
+        solver.set_edited_value(x, 5)
+        self.assertAlmostEqual(x.value, 5)
+        self.assertEqual(list(solver.edit_var_map), [x])
+
+        # Sessions nest around it.
+        solver.add_edit_var(y)
+        with solver.edit():
+            solver.suggest_value(y, 100)
+            solver.resolve()
+        self.assertAlmostEqual(y.value, 100)
+        self.assertEqual(list(solver.edit_var_map), [x])
+
+        solver.remove_edit_var(x)
+        self.assertEqual(len(solver.edit_var_map), 0)
+
+    def test_remove_edit_var_renumbers(self):
+        "Removing an edit variable keeps the edit indices contiguous"
+        solver = SimplexSolver()
+        a, b, c = Variable('a', 1), Variable('b', 2), Variable('c', 3)
+        solver.add_edit_var(a, persistent=True)
+        solver.add_edit_var(b, persistent=True)
+        solver.add_edit_var(c)
+        solver.begin_edit()
+        solver.remove_edit_var(a)
+        self.assertEqual(solver.edit_var_map[b].index, 0)
+        self.assertEqual(solver.edit_var_map[c].index, 1)
+        self.assertEqual(solver.edit_variable_stack, [0, 2])
+
+        solver.suggest_value(c, 10)
+        solver.end_edit()
+        self.assertEqual(list(solver.edit_var_map), [b])
+
+        solver.add_edit_var(c)
+        solver.remove_all_edit_vars()
+        self.assertEqual(len(solver.edit_var_map), 0)
+
+    def test_end_edit_renumbers_around_persistent(self):
+        "Ending a session renumbers the edit variables that are left"
+        solver = SimplexSolver()
+        variables = [Variable('v%d' % i, i) for i in range(6)]
+        solver.add_edit_var(variables[0])
+        solver.begin_edit()
+        for i, v in enumerate(variables[1:]):
+            solver.add_edit_var(v, persistent=i % 2 == 0)
+        solver.begin_edit()
+        solver.end_edit()
+        self.assertEqual(solver.edit_variable_stack, [0, 1])
+        solver.end_edit()
+
+        self.assertEqual(
+            [(v.name, cei.index) for v, cei in sorted(solver.edit_var_map.items(), key=lambda x: x[1].index)],
+            [('v1', 0), ('v3', 1), ('v5', 2)]
+        )
+        self.assertEqual(solver.edit_variable_stack, [0])
+
+    def test_add_edit_var_twice(self):
+        "Adding an existing edit variable returns its edit constraint"
+        solver = SimplexSolver()
+        y = Variable('y')
+        solver.add_stay(y)
+        cn = solver.add_edit_var(y, persistent=True)
+        self.assertIs(solver.add_edit_var(y), cn)
+        self.assertTrue(solver.edit_var_map[y].persistent)
+        self.assertEqual(len([c for c in solver.constraints_for(y) if c.is_edit_constraint]), 1)
+
+        with solver.edit():
+            solver.suggest_value(y, 3)
+        self.assertAlmostEqual(y.value, 3)
+        self.assertEqual(list(solver.edit_var_map), [y])
+
+        # A plain edit variable made persistent survives the session.
+        z = Variable('z')
+        solver.add_stay(z)
+        cn = solver.add_edit_var(z)
+        self.assertIs(solver.add_edit_var(z, persistent=True), cn)
+        with solver.edit():
+            solver.suggest_value(z, 4)
+        self.assertAlmostEqual(z.value, 4)
+        self.assertEqual(len(solver.edit_var_map), 2)
+
+    def test_remove_stays(self):
+        "The stays on several variables can be removed at once"
+        solver = SimplexSolver()
+        x = Variable('x', 10)
+        y = Variable('y', 20)
+        z = Variable('z', 30)
+        x_stays = [solver.add_stay(x), solver.add_stay(x, STRONG)]
+        y_stay = solver.add_stay(y, REQUIRED)
+        z_stay = solver.add_stay(z)
+        solver.add_constraint(x + y + z == 60)
+        self.assertEqual(len(solver.stay_error_vars), 3)
+
+        optimize_count = solver.optimize_count
+        removed = solver.remove_stays([x, y])
+        self.assertEqual(removed, x_stays + [y_stay])
+        self.assertEqual(solver.optimize_count, optimize_count + 1)
+        self.assertEqual(list(solver.stay_constraints), [z])
+        self.assertEqual(list(solver.stay_error_vars), [z_stay])
+
+        # Variables without stays are ignored.
+        self.assertEqual(solver.remove_stays([x]), [])
+
+        solver.remove_constraint(z_stay)
+        self.assertEqual(len(solver.stay_constraints), 0)
+        self.assertEqual(len(solver.stay_error_vars), 0)
+
+    def test_set_edited_values(self):
+        "Several variables can be set with a single edit session"
+        solver = SimplexSolver()
+        x = Variable('x', 10)
+        y = Variable('y', 20)
+        z = Variable('z', 30)
+        outside = Variable('outside', 0)
+        solver.add_stay(x)
+        solver.add_stay(y)
+        solver.add_stay(z)
+        solver.add_constraint(x + 10 <= y)
+        solver.add_edit_var(z, persistent=True)
+
+        solver.set_edited_values({x: 40, z: 5, outside: 7})
+        self.assertAlmostEqual(x.value, 40)
+        self.assertAlmostEqual(y.value, 50)
+        self.assertAlmostEqual(z.value, 5)
+        self.assertEqual(outside.value, 7)
+        self.assertEqual(list(solver.edit_var_map), [z])
+        self.assertEqual(solver.edit_variable_stack, [0])
+
+        solver.set_edited_value(y, 80)
+        self.assertAlmostEqual(x.value, 40)
+        self.assertAlmostEqual(y.value, 80)
+        self.assertEqual(list(solver.edit_var_map), [z])
+
+        # Nothing to edit.
+        solver.set_edited_values({})
+        self.assertEqual(solver.edit_variable_stack, [0])
+
+    def test_constraints_for(self):
+        "The solver indexes the constraints on each variable"
+        solver = SimplexSolver()
+        x = Variable('x', 10)
+        y = Variable('y', 20)
+        z = Variable('z', 30)
+        stay = solver.add_stay(x)
+        c1 = solver.add_constraint(x + 10 <= y)
+        c2 = solver.add_constraint(y == z, STRONG)
+
+        self.assertEqual(solver.constraints_for(x), [stay, c1])
+        self.assertEqual(solver.constraints_for(y), [c1, c2])
+        self.assertEqual(solver.constraints_for(Variable('w')), [])
+        self.assertEqual(set(solver.variables_for(c2)), set([y, z]))
+        self.assertEqual(solver.variables_for(stay), [x])
+
+        # Constraints added with a new strength are cloned.
+        c3 = solver.add_constraint(z >= 0, WEAK)
+        self.assertEqual(solver.constraints_for(z), [c2, c3])
+
+        solver.remove_constraint(c1)
+        self.assertEqual(solver.constraints_for(x), [stay])
+        self.assertEqual(solver.constraints_for(y), [c2])
+        with self.assertRaises(ConstraintNotFound):
+            solver.variables_for(c1)
+
+        solver.remove_stays([x])
+        self.assertEqual(solver.constraints_for(x), [])
+        self.assertNotIn(x, solver.variable_constraints)
+
+        # A fork has an index of its own.
+        fork = solver.fork()
+        fork.remove_constraint(c2)
+        self.assertEqual(fork.constraints_for(y), [])
+        self.assertEqual(solver.constraints_for(y), [c2])
+
+    def test_constraints_for_changed_expression(self):
+        "The index keeps the variables a constraint had when it was added"
+        solver = SimplexSolver()
+        x = Variable('x', 10)
+        y = Variable('y', 20)
+        z = Variable('z', 30)
+        cn = solver.add_constraint(Constraint(x + y, Constraint.EQ, 50))
+        cn.expression += z
+
+        self.assertEqual(set(solver.variables_for(cn)), set([x, y]))
+        self.assertEqual(solver.constraints_for(z), [])
+        solver.remove_constraint(cn)
+        self.assertEqual(solver.variable_constraints, {})
+        with self.assertRaises(ConstraintNotFound):
+            solver.variables_for(cn)
+
+    def test_fork_shares_rows(self):
+        "A fork shares rows with its parent until one of them changes a row"
+        solver = SimplexSolver()
+        x = Variable('x', 10)
+        y = Variable('y', 20)
+        solver.add_stay(x)
+        solver.add_stay(y)
+        solver.add_constraint(x + 10 <= y)
+
+        fork = solver.fork()
+        self.assertEqual(set(fork.rows), set(solver.rows))
+        self.assertIsNot(fork.rows[fork.objective], solver.rows[solver.objective])
+        for v in solver.shared_rows:
+            self.assertIs(fork.rows[v], solver.rows[v])
+        self.assertEqual(fork.shared_rows, set(solver.rows) - set([solver.objective]))
+
+        # A row written by the fork is copied first.
+        v = next(iter(fork.shared_rows))
+        row = fork.rows[v]
+        constant = row.constant
+        fork.writable_row(v).constant = constant + 1
+        self.assertIsNot(fork.rows[v], row)
+        self.assertEqual(row.constant, constant)
+        self.assertNotIn(v, fork.shared_rows)
+        self.assertIn(v, solver.shared_rows)
+
+    def test_fork_copies_stays(self):
+        "A stay or edit constraint added to a fork is copied, not changed"
+        solver = SimplexSolver()
+        x = Variable('x', 10)
+        solver.add_stay(x)
+        fork = solver.fork()
+        fork.add_constraint(Constraint(x, Constraint.EQ, 30, STRONG))
+        self.assertAlmostEqual(fork.value_for(x), 30)
+
+        stay = StayConstraint(x)
+        cn = fork.add_constraint(stay)
+        self.assertIsNot(cn, stay)
+        self.assertTrue(cn.is_stay_constraint)
+        self.assertEqual(cn.expression.constant, 30)
+        self.assertEqual(stay.expression.constant, 10)
+
+        edit = fork.add_edit_var(x)
+        self.assertTrue(edit.is_edit_constraint)
+        self.assertEqual(edit.expression.constant, 30)
+        fork.remove_constraint(cn)
+        fork.remove_edit_var(x)
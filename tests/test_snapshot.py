@@ -0,0 +1,165 @@
+from __future__ import print_function, unicode_literals, absolute_import, division
+
+import io
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+if not hasattr(TestCase, 'assertIsNotNone'):
+    # For Python2.6 compatibility
+    from unittest2 import TestCase, skipIf
+else:
+    from unittest import skipIf
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from cassowary import SimplexSolver, Variable, MEDIUM, WEAK
+
+# Internals
+from cassowary import snapshot
+from cassowary.expression import Constraint
+
+
+def tableau(solver):
+    "The rows and columns of a solver, by variable name."
+    rows = dict(
+        (v.name, (e.constant, sorted((clv.name, c) for clv, c in e.terms.items())))
+        for v, e in solver.rows.items()
+    )
+    columns = dict((v.name, sorted(r.name for r in column)) for v, column in solver.columns.items())
+    return rows, columns
+
+
+class SnapshotTestCase(TestCase):
+    backend = None
+
+    def build(self):
+        solver = SimplexSolver(backend=self.backend)
+        left = Variable('left', 0)
+        width = Variable('width', 30)
+        right = Variable('right', 100)
+        with solver.batch():
+            solver.add_constraint(Constraint(left, Constraint.GEQ, 0))
+            solver.add_constraint(Constraint(left + width, Constraint.EQ, right))
+            solver.add_constraint(Constraint(right, Constraint.LEQ, 200))
+            solver.add_constraint(Constraint(width, Constraint.EQ, 50, MEDIUM))
+            solver.add_stay(left, WEAK)
+            solver.add_stay(right, WEAK)
+        return solver, left, width, right
+
+    def round_trip(self, solver, variables=None):
+        f = io.BytesIO()
+        snapshot.dump(solver, f)
+        f.seek(0)
+        return snapshot.load(f, variables)
+
+    def test_round_trip(self):
+        "A loaded solver has the tableau and values of the original"
+        solver, left, width, right = self.build()
+        loaded, variables, constraints = self.round_trip(solver)
+
+        self.assertIsInstance(loaded, type(solver))
+        self.assertEqual(tableau(loaded), tableau(solver))
+        self.assertEqual(sorted(variables), ['left', 'right', 'width'])
+        for v in (left, width, right):
+            self.assertIsNot(variables[v.name], v)
+            self.assertAlmostEqual(variables[v.name].value, v.value)
+        self.assertEqual(len(constraints), 6)
+        self.assertEqual(len(loaded.stay_constraints), 2)
+        self.assertEqual(len(loaded.constraints_for(variables['left'])), 3)
+        self.assertEqual(len(loaded.constraints_for(variables['width'])), 2)
+
+    def test_no_pivots(self):
+        "Loading a solver doesn't pivot"
+        solver, left, width, right = self.build()
+        loaded, variables, constraints = self.round_trip(solver)
+
+        self.assertEqual(loaded.optimize_count, solver.optimize_count)
+        self.assertEqual(loaded.pricing.pivots, solver.pricing.pivots)
+        self.assertFalse(loaded.needs_solving)
+
+    def test_file(self):
+        "A snapshot can be written to, and loaded from, a file"
+        solver, left, width, right = self.build()
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'layout.snapshot')
+            snapshot.dump(solver, path)
+            loaded, variables, constraints = snapshot.load(path)
+        finally:
+            shutil.rmtree(directory)
+
+        self.assertEqual(tableau(loaded), tableau(solver))
+
+    def test_continue(self):
+        "A loaded solver can be edited, with the same results as the original"
+        solver, left, width, right = self.build()
+        solver.add_edit_var(width, persistent=True)
+        loaded, variables, constraints = self.round_trip(solver)
+        self.assertTrue(loaded.edit_var_map[variables['width']].persistent)
+
+        for s, w, r in ((solver, width, right), (loaded, variables['width'], variables['right'])):
+            s.suggest_value(w, 80)
+            s.resolve()
+            self.assertAlmostEqual(w.value, 80)
+            s.add_constraint(Constraint(r, Constraint.LEQ, 60))
+            s.remove_edit_var(w)
+
+        for v in (left, width, right):
+            self.assertAlmostEqual(variables[v.name].value, v.value)
+
+    def test_remove(self):
+        "The constraints of a loaded solver can be removed"
+        solver, left, width, right = self.build()
+        loaded, variables, constraints = self.round_trip(solver)
+
+        self.assertEqual(len(loaded.remove_stays([variables['left']])), 1)
+        loaded.remove_constraint(constraints[3])
+        loaded.add_constraint(Constraint(variables['left'], Constraint.EQ, 20))
+        self.assertAlmostEqual(variables['left'].value, 20)
+        self.assertAlmostEqual(variables['width'].value, 80)
+
+    def test_changed_expression(self):
+        "The variables of a constraint are those it had when it was added"
+        solver, left, width, right = self.build()
+        cn = solver.add_constraint(Constraint(left, Constraint.LEQ, 150))
+        cn.expression.add_variable(width, 1.0)
+        loaded, variables, constraints = self.round_trip(solver)
+
+        self.assertEqual([v.name for v in loaded.variables_for(constraints[-1])], ['left'])
+        self.assertEqual(len(loaded.constraints_for(variables['left'])), 4)
+        self.assertEqual(len(loaded.constraints_for(variables['width'])), 2)
+
+    def test_given_variables(self):
+        "Existing variables can be used for the variables of a snapshot"
+        solver, left, width, right = self.build()
+        f = io.BytesIO()
+        snapshot.dump(solver, f)
+        f.seek(0)
+
+        x = Variable('width')
+        loaded, variables, constraints = snapshot.load(f, {'width': x})
+        self.assertIs(variables['width'], x)
+        self.assertAlmostEqual(x.value, 50)
+        self.assertIn(x, loaded.rows)
+
+    def test_duplicate_names(self):
+        "Variables must have distinct names"
+        solver = SimplexSolver(backend=self.backend)
+        solver.add_constraint(Constraint(Variable('x'), Constraint.EQ, Variable('x')))
+        with self.assertRaises(ValueError):
+            snapshot.dump(solver, io.BytesIO())
+
+    def test_not_a_snapshot(self):
+        "Loading something that isn't a snapshot is an error"
+        with self.assertRaises(ValueError):
+            snapshot.load(io.BytesIO(b'not a snapshot'))
+
+
+@skipIf(numpy is None, 'NumPy is not installed')
+class DenseSnapshotTestCase(SnapshotTestCase):
+    "Run the snapshot tests against the dense NumPy tableau."
+    backend = 'dense'
@@ -5,8 +5,11 @@ if not hasattr(TestCase, 'assertIsNotNone'):
     # For Python2.6 compatibility
     from unittest2 import TestCase
 
+from cassowary import Variable
+
 # Internals
-from cassowary.tableau import Tableau
+from cassowary.expression import Expression, SlackVariable
+from cassowary.tableau import InfeasibleRows, Tableau
 
 
 class TableauTestCase(TestCase):
@@ -20,3 +23,104 @@ class TableauTestCase(TestCase):
         self.assertEqual(len(tableau.infeasible_rows), 0)
         self.assertEqual(len(tableau.external_rows), 0)
         self.assertEqual(len(tableau.external_parametric_vars), 0)
+
+    def test_substitute_out(self):
+        "Substituting a variable updates every row, column and infeasible row"
+        tableau = Tableau()
+        x = Variable('x')
+        y = Variable('y')
+        s1 = SlackVariable('s', 1)
+        s2 = SlackVariable('s', 2)
+        s3 = SlackVariable('s', 3)
+
+        # s1 = x + 2y + 1; s2 = -x - 1
+        tableau.add_row(s1, Expression(x, 1, 1) + Expression(y, 2))
+        tableau.add_row(s2, Expression(x, -1, -1))
+
+        # x = 3s3 - 2y + 4
+        tableau.substitute_out(x, Expression(s3, 3, 4) - 2 * y)
+
+        self.assertNotIn(x, tableau.columns)
+        self.assertEqual(tableau.rows[s1].terms, {s3: 3.0})
+        self.assertAlmostEqual(tableau.rows[s1].constant, 5.0)
+        self.assertEqual(tableau.rows[s2].terms, {s3: -3.0, y: 2.0})
+        self.assertAlmostEqual(tableau.rows[s2].constant, -5.0)
+        self.assertEqual(tableau.columns[s3], set([s1, s2]))
+        self.assertEqual(tableau.columns[y], set([s2]))
+        self.assertEqual(set(tableau.infeasible_rows), set([s2]))
+
+
+class InfeasibleRowsTestCase(TestCase):
+    def tableau(self, *constants):
+        tableau = Tableau()
+        variables = []
+        for n, constant in enumerate(constants):
+            var = SlackVariable('s', n)
+            tableau.add_row(var, Expression(constant=constant))
+            variables.append(var)
+        return tableau, variables
+
+    def test_magnitude(self):
+        "The most infeasible row is popped first, without duplicates"
+        tableau, (a, b, c) = self.tableau(-1.0, -5.0, -3.0)
+        queue = tableau.infeasible_rows
+        for var in (a, b, c, b):
+            queue.add(var)
+
+        self.assertEqual(len(queue), 3)
+        self.assertIn(b, queue)
+        self.assertEqual([queue.pop(), queue.pop(), queue.pop()], [b, c, a])
+        self.assertEqual(len(queue), 0)
+        with self.assertRaises(KeyError):
+            queue.pop()
+
+    def test_changed_constant(self):
+        "Keys are updated when a row is added again, or reaches the front of the queue"
+        tableau, (a, b) = self.tableau(-1.0, -5.0)
+        queue = tableau.infeasible_rows
+        queue.add(a)
+        queue.add(b)
+        tableau.rows[a].constant = -10.0
+        queue.add(a)
+        tableau.rows[b].constant = -0.5
+
+        self.assertEqual(queue.pop(), a)
+        self.assertEqual(queue.pop(), b)
+
+    def test_remove(self):
+        "Rows can be removed from the queue"
+        tableau, (a, b, c) = self.tableau(-1.0, -5.0, -3.0)
+        queue = tableau.infeasible_rows
+        for var in (a, b, c):
+            queue.add(var)
+        queue.remove(b)
+        queue.discard(b)
+        with self.assertRaises(KeyError):
+            queue.remove(b)
+
+        self.assertEqual([queue.pop(), queue.pop()], [c, a])
+
+        queue.add(a)
+        queue.clear()
+        self.assertEqual(len(queue), 0)
+
+    def test_rules(self):
+        "Rows can be ordered by other rules"
+        tableau, (a, b, c) = self.tableau(-1.0, -5.0, -3.0)
+        queue = InfeasibleRows(tableau, rule='fifo')
+        for var in (c, a, b):
+            queue.add(var)
+        self.assertEqual([queue.pop(), queue.pop(), queue.pop()], [c, a, b])
+
+        for var in (c, a, b):
+            queue.add(var)
+        queue.rule = 'ordinal'
+        self.assertEqual([queue.pop(), queue.pop(), queue.pop()], [a, b, c])
+
+        queue.rule = lambda tableau, var: -tableau.rows[var].constant
+        for var in (c, a, b):
+            queue.add(var)
+        self.assertEqual([queue.pop(), queue.pop(), queue.pop()], [a, c, b])
+
+        with self.assertRaises(ValueError):
+            queue.rule = 'random'
@@ -77,6 +77,29 @@ class VariableTestCase(TestCase):
 
         self.assertEqual(repr(var), 'foo:obj')
 
+    def test_slotted_variables(self):
+        "Variables don't carry an instance dictionary."
+        for var in [Variable('foo'), DummyVariable(3), SlackVariable('foo', 3), ObjectiveVariable('foo')]:
+            self.assertFalse(hasattr(var, '__dict__'))
+            with self.assertRaises(AttributeError):
+                var.extra = 42
+
+    def test_internal_names_follow_number(self):
+        "Internal variable names are generated from their number."
+        var = SlackVariable('em', 3)
+        var.number = 7
+        self.assertEqual(var.name, 'em7')
+
+        var = DummyVariable(3)
+        var.number = 7
+        self.assertEqual(var.name, 'd7')
+
+    def test_ordinals(self):
+        "Variables are numbered in order of creation."
+        variables = [Variable('foo'), DummyVariable(3), SlackVariable('foo', 3), ObjectiveVariable('foo')]
+        ordinals = [var.ordinal for var in variables]
+        self.assertEqual(ordinals, sorted(set(ordinals)))
+
     def test_add(self):
         x = Variable('x', 167)
 
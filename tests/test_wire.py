@@ -0,0 +1,94 @@
+from __future__ import print_function, unicode_literals, absolute_import, division
+
+from unittest import TestCase
+if not hasattr(TestCase, 'assertIsNotNone'):
+    # For Python2.6 compatibility
+    from unittest2 import TestCase
+
+from cassowary import SimplexSolver, Variable, MEDIUM, STRONG, WEAK
+
+# Internals
+from cassowary import wire
+from cassowary.expression import Constraint, EditConstraint, StayConstraint
+
+
+class WireTestCase(TestCase):
+    def model(self):
+        left = Variable('left', 10)
+        width = Variable('width', 30)
+        right = Variable('right', 100)
+        constraints = [
+            Constraint(left, Constraint.GEQ, 0),
+            Constraint(left + width, Constraint.EQ, right),
+            Constraint(right, Constraint.LEQ, 200),
+            Constraint(width, Constraint.EQ, 50, MEDIUM, 2.0),
+            StayConstraint(left, WEAK),
+            EditConstraint(right, STRONG),
+        ]
+        return [left, width, right], constraints
+
+    def test_round_trip(self):
+        "Decoded constraints are equivalent to the encoded ones"
+        variables, constraints = self.model()
+        table, decoded = wire.decode(wire.encode(constraints))
+
+        self.assertEqual([v.name for v in table], ['left', 'width', 'right'])
+        self.assertEqual([v.value for v in table], [10, 30, 100])
+        by_name = dict((v.name, v) for v in table)
+        self.assertEqual(len(decoded), len(constraints))
+        for original, cn in zip(constraints, decoded):
+            self.assertIs(type(cn), type(original))
+            self.assertEqual(cn.strength, original.strength)
+            self.assertEqual(cn.weight, original.weight)
+            self.assertEqual(cn.is_inequality, original.is_inequality)
+            self.assertEqual(cn.expression.constant, original.expression.constant)
+            self.assertEqual(
+                cn.expression.terms,
+                dict((by_name[v.name], c) for v, c in original.expression.terms.items())
+            )
+        self.assertIs(decoded[4].variable, by_name['left'])
+        self.assertIs(decoded[5].variable, by_name['right'])
+
+    def test_identity(self):
+        "A variable shared between constraints is decoded once"
+        variables, constraints = self.model()
+        table, decoded = wire.decode(wire.encode(constraints))
+
+        left = [v for v in decoded[0].expression.terms][0]
+        self.assertIn(left, decoded[1].expression.terms)
+        self.assertIs(decoded[4].variable, left)
+
+    def test_variables(self):
+        "The variable table can be ordered, and decoded into existing variables"
+        variables, constraints = self.model()
+        right, width = variables[2], variables[1]
+        data = wire.encode(constraints, [right, width])
+
+        x = Variable('x', 7)
+        table, decoded = wire.decode(data, [x])
+        self.assertIs(table[0], x)
+        self.assertEqual(x.value, 7)
+        self.assertEqual([v.name for v in table[1:]], ['width', 'left'])
+        self.assertIs(decoded[5].variable, x)
+
+    def test_solver(self):
+        "Decoded constraints can be added to a solver"
+        variables, constraints = self.model()
+        data = wire.encode(constraints)
+
+        solver = SimplexSolver()
+        with solver.batch():
+            for cn in constraints:
+                solver.add_constraint(cn)
+
+        decoded_solver = SimplexSolver()
+        table, decoded = wire.decode(data, solver=decoded_solver)
+        self.assertFalse(decoded_solver.needs_solving)
+        for v, decoded_v in zip(variables, table):
+            self.assertAlmostEqual(decoded_v.value, v.value)
+        self.assertIn(table[2], decoded_solver.edit_var_map)
+
+    def test_not_a_model(self):
+        "Decoding something that isn't an encoded model is an error"
+        with self.assertRaises(ValueError):
+            wire.decode(b'not a model')